@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+climate_cube.py
+-----------------------------------------
+Station x day x variable cube of the GHCN-Daily station CSVs, memory-mapped.
+
+build_cube() parses every station CSV once and writes
+
+    climate_cube/cube.npy     float32 [station, day, variable], NaN = missing
+    climate_cube/index.json   stations (id, name, city, lat/lon, source file),
+                              variables, first day, number of days, and the
+                              size/mtime of every source file
+
+Variables are the numeric columns (AWND, PRCP, TAVG, TMAX, TMIN, ...) with
+trace precipitation "T" as 0, plus the weather-type flags WT** as 1 (flag
+set) / 0 (record without the flag). A variable a station never reports is
+NaN for that station. A CSV holding several stations gives one row each.
+
+ClimateCube.open() maps cube.npy read-only (np.load(mmap_mode="r")), so
+opening costs nothing and slices are views of the file:
+
+    cube = ClimateCube.open()
+    prcp_2019 = cube.sel("PRCP", start="2019-01-01", end="2019-12-31")   # (stations, days)
+    miami = cube.sel(["TMAX", "TMIN"], stations="miami")                 # (days, 2)
+
+rain_features(cube) computes the meteorological_features.py columns for all
+stations at once straight from the cube.
+
+    python climate_cube.py build            # rebuilt only when a source changed
+    python climate_cube.py info
+    python climate_cube.py features         # -> meteorological_features_cube.csv
+-----------------------------------------
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from meteorological_features import CITY_FILES, SCRIPT_DIR, find_header_row
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
+
+CUBE_DIR = SCRIPT_DIR / "climate_cube"
+CUBE_PATH = CUBE_DIR / "cube.npy"
+INDEX_PATH = CUBE_DIR / "index.json"
+
+META_COLS = ["STATION", "NAME", "LATITUDE", "LONGITUDE", "ELEVATION", "DATE"]
+NA_VALUES = ["", "NA", "NaN", "M", "m"]
+
+
+# ---------- 1. Build ----------
+
+def _stamp(path: Path) -> dict:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_station_csv(path: Path, usecols=None) -> pd.DataFrame:
+    header_row = find_header_row(path)
+    df = pd.read_csv(path, header=header_row, dtype=str, na_values=NA_VALUES,
+                     keep_default_na=False, usecols=usecols)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _variable_values(df: pd.DataFrame, var: str) -> np.ndarray:
+    col = df[var]
+    if var.startswith("WT"):
+        return col.notna().to_numpy(dtype=np.float32)
+    if var == "PRCP":
+        col = col.str.replace("T", "0", regex=False)
+    values = pd.to_numeric(col.str.strip(), errors="coerce").to_numpy(dtype=np.float32)
+    if var == "PRCP":
+        values[values < -1e-6] = np.nan
+    return values
+
+
+def _scan(city_files) -> dict:
+    """Pass 1: stations, variables and the date range, from headers and DATE/STATION only."""
+    stations, variables, first, last = [], set(), None, None
+    for city, path in city_files.items():
+        cols = pd.read_csv(path, header=find_header_row(path), nrows=0).columns.str.strip()
+        variables.update(c for c in cols if c not in META_COLS)
+        df = _read_station_csv(path, usecols=lambda c: c.strip() in META_COLS)
+        dates = pd.to_datetime(df["DATE"], errors="coerce")
+        first = dates.min() if first is None else min(first, dates.min())
+        last = dates.max() if last is None else max(last, dates.max())
+        for sid, g in df.groupby("STATION", sort=False):
+            row = g.iloc[0]
+            stations.append({
+                "id": sid, "name": row["NAME"], "city": city, "file": path.name,
+                "lat": float(row["LATITUDE"]), "lon": float(row["LONGITUDE"]),
+                "elevation": float(row["ELEVATION"]),
+            })
+    numeric = sorted(v for v in variables if not v.startswith("WT"))
+    flags = sorted(v for v in variables if v.startswith("WT"))
+    return {"stations": stations, "variables": numeric + flags,
+            "day0": str(first.date()), "n_days": int((last - first).days) + 1}
+
+
+def is_current(city_files=CITY_FILES) -> bool:
+    if not (CUBE_PATH.exists() and INDEX_PATH.exists()):
+        return False
+    index = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+    return index.get("sources") == {p.name: _stamp(p) for p in city_files.values()}
+
+
+@stage("meteorological.build_cube")
+def build_cube(city_files=CITY_FILES, force: bool = False) -> Path:
+    """Parse the station CSVs into cube.npy + index.json (skipped when up to date)."""
+    if not force and is_current(city_files):
+        print(f"Cube up to date: {CUBE_PATH}")
+        return CUBE_PATH
+
+    index = _scan(city_files)
+    row_of = {s["id"]: i for i, s in enumerate(index["stations"])}
+    var_of = {v: j for j, v in enumerate(index["variables"])}
+    day0 = np.datetime64(index["day0"], "D")
+    shape = (len(row_of), index["n_days"], len(var_of))
+
+    CUBE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = CUBE_PATH.with_suffix(".tmp.npy")
+    cube = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+    cube[:] = np.nan
+
+    # Pass 2: one station CSV at a time straight into the map
+    for path in city_files.values():
+        df = _read_station_csv(path)
+        days = (pd.to_datetime(df["DATE"], errors="coerce").to_numpy(dtype="datetime64[D]")
+                - day0).astype(np.int64)
+        ok = days >= 0
+        rows = df["STATION"].map(row_of).to_numpy()
+        for var in (c for c in df.columns if c in var_of):
+            cube[rows[ok], days[ok], var_of[var]] = _variable_values(df, var)[ok]
+
+    cube.flush()
+    del cube
+    tmp.replace(CUBE_PATH)
+
+    index["sources"] = {p.name: _stamp(p) for p in city_files.values()}
+    index["dtype"] = "float32"
+    index["shape"] = list(shape)
+    INDEX_PATH.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    print(f"Built {CUBE_PATH} {shape} ({CUBE_PATH.stat().st_size / 1e6:.1f} MB)")
+    return CUBE_PATH
+
+
+# ---------- 2. Read ----------
+
+class ClimateCube:
+    """Read-only view of cube.npy with its station / date / variable index."""
+
+    def __init__(self, data: np.ndarray, index: dict):
+        self.data = data
+        self.index = index
+        self.stations = pd.DataFrame(index["stations"])
+        self.variables = list(index["variables"])
+        self.day0 = np.datetime64(index["day0"], "D")
+        self.dates = self.day0 + np.arange(index["n_days"])
+
+    @classmethod
+    def open(cls, cube_path: Path = CUBE_PATH, index_path: Path = INDEX_PATH):
+        return cls(np.load(cube_path, mmap_mode="r"),
+                   json.loads(index_path.read_text(encoding="utf-8")))
+
+    def day_slice(self, start=None, end=None) -> slice:
+        """Day positions of [start, end] (inclusive dates)."""
+        i0 = 0 if start is None else int((np.datetime64(start, "D") - self.day0).astype(int))
+        i1 = len(self.dates) if end is None else int((np.datetime64(end, "D") - self.day0).astype(int)) + 1
+        return slice(max(i0, 0), min(i1, len(self.dates)))
+
+    def station_pos(self, stations):
+        """Station id or city -> row; None -> all rows (as a slice)."""
+        if stations is None:
+            return slice(None)
+        keys = [stations] if isinstance(stations, str) else list(stations)
+        pos = []
+        for key in keys:
+            hit = np.flatnonzero((self.stations["id"] == key) | (self.stations["city"] == key))
+            if not len(hit):
+                raise KeyError(f"Unknown station '{key}'")
+            pos.extend(hit.tolist())
+        return pos[0] if isinstance(stations, str) and len(pos) == 1 else pos
+
+    def variable_pos(self, variables):
+        if isinstance(variables, str):
+            return self.variables.index(variables)
+        return [self.variables.index(v) for v in variables]
+
+    def sel(self, variables=None, stations=None, start=None, end=None) -> np.ndarray:
+        """
+        Sub-array of the cube. A single station / variable drops that axis.
+        One station (or all) with one variable (or all) and a date range is a
+        view of the mapped file; lists of several stations or variables are
+        gathered into a copy.
+        """
+        s = self.station_pos(stations)
+        v = slice(None) if variables is None else self.variable_pos(variables)
+        d = self.day_slice(start, end)
+        if isinstance(s, list) or isinstance(v, list):
+            return self.data[s, d][..., v]
+        return self.data[s, d, v]
+
+    def valid(self, variables=None, stations=None, start=None, end=None) -> np.ndarray:
+        """Boolean mask of non-missing values for the same selection."""
+        return ~np.isnan(self.sel(variables, stations, start, end))
+
+
+# ---------- 3. Features from the cube ----------
+
+@stage("meteorological.rain_features")
+def rain_features(cube: ClimateCube, heavy_q: float = 0.9) -> pd.DataFrame:
+    """meteorological_features.py columns for every station, vectorized over stations."""
+    prcp = cube.sel("PRCP").astype(np.float64)          # (stations, days)
+    ok = ~np.isnan(prcp)
+
+    mean = np.nanmean(prcp, axis=1)
+    peak = np.nanmax(prcp, axis=1)
+    thresh = np.nanquantile(prcp, heavy_q, axis=1)
+
+    years = cube.dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    bounds = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+    with np.errstate(invalid="ignore"):
+        heavy = np.add.reduceat(prcp >= thresh[:, None], bounds, axis=1)
+    has_year = np.add.reduceat(ok, bounds, axis=1) > 0
+    heavy_per_year = (heavy * has_year).sum(axis=1) / has_year.sum(axis=1)
+
+    year_of = years[bounds]
+    first = np.array([year_of[h].min() for h in has_year])
+    last = np.array([year_of[h].max() for h in has_year])
+
+    return pd.DataFrame({
+        "city": cube.stations["city"],
+        "station": cube.stations["id"],
+        "rain_daily_mean": mean,
+        "rain_daily_max": peak,
+        "heavy_rain_threshold": thresh,
+        "heavy_rain_days_per_year": heavy_per_year,
+        "years_covered": [f"{a}–{b}" for a, b in zip(first, last)],
+    })
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped station x day x variable climate cube.")
+    parser.add_argument("command", choices=["build", "info", "features"])
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_cube(force=args.force)
+        return
+
+    if not is_current():
+        build_cube()
+    t0 = time.perf_counter()
+    cube = ClimateCube.open()
+    print(f"Opened {CUBE_PATH.name} {cube.data.shape} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    if args.command == "info":
+        print(f"Days: {cube.dates[0]} .. {cube.dates[-1]}")
+        print(f"Variables: {', '.join(cube.variables)}")
+        shown = [v for v in ("PRCP", "TMAX", "AWND") if v in cube.variables]
+        coverage = pd.DataFrame(cube.valid(shown).mean(axis=1), columns=shown)
+        print(pd.concat([cube.stations[["id", "city", "name"]], coverage.round(3).add_prefix("cov_")],
+                        axis=1).to_string(index=False))
+        return
+
+    out = rain_features(cube)
+    out_path = SCRIPT_DIR / "meteorological_features_cube.csv"
+    out.to_csv(out_path, index=False)
+    print(out.to_string(index=False))
+    print("\nSaved:", out_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,15 @@
 #         years_covered
 
 import csv
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
+
 
 # ---------- 1. Paths and city<->file mapping ----------
 
@@ -52,14 +56,13 @@ def find_header_row(csv_path: Path) -> int:
     return 0
 
 
-# ---------- 3. Load & extract features for one city ----------
-
-def load_and_extract(city: str, csv_path: Path) -> dict:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"Missing file for {city}: {csv_path}")
-
-    print(f"\nProcessing {city} from {csv_path.name} ...")
+# ---------- 3. Daily precipitation of one station ----------
 
+def read_daily_precip(csv_path: Path, verbose: bool = False) -> pd.DataFrame:
+    """
+    DATE / PRCP rows of a NOAA daily CSV: trace ("T") counts as 0, missing
+    and negative values are dropped.
+    """
     header_row = find_header_row(csv_path)
 
     df = pd.read_csv(
@@ -71,7 +74,8 @@ def load_and_extract(city: str, csv_path: Path) -> dict:
     )
 
     df.columns = df.columns.str.strip()
-    print("  Columns:", list(df.columns))
+    if verbose:
+        print("  Columns:", list(df.columns))
 
     date_candidates = [c for c in df.columns if c.upper().startswith("DATE")]
     if not date_candidates:
@@ -91,7 +95,8 @@ def load_and_extract(city: str, csv_path: Path) -> dict:
         )
 
     precip_col = precip_candidates[0]
-    print(f"  Using precipitation column: {precip_col}")
+    if verbose:
+        print(f"  Using precipitation column: {precip_col}")
 
     df = df[[date_col, precip_col]].copy()
     df.rename(columns={date_col: "DATE", precip_col: "PRCP"}, inplace=True)
@@ -103,7 +108,19 @@ def load_and_extract(city: str, csv_path: Path) -> dict:
     df = df.dropna(subset=["DATE", "PRCP"])
 
     df.loc[df["PRCP"] < -1e-6, "PRCP"] = np.nan
-    df = df.dropna(subset=["PRCP"])
+    return df.dropna(subset=["PRCP"])
+
+
+# ---------- 4. Load & extract features for one city ----------
+
+@stage("meteorological.load_and_extract")
+def load_and_extract(city: str, csv_path: Path) -> dict:
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Missing file for {city}: {csv_path}")
+
+    print(f"\nProcessing {city} from {csv_path.name} ...")
+
+    df = read_daily_precip(csv_path, verbose=True)
 
     if df.empty:
         print("  ⚠ After cleaning, dataframe is empty. Here are first 10 raw rows:")
@@ -137,7 +154,7 @@ def load_and_extract(city: str, csv_path: Path) -> dict:
     }
 
 
-# ---------- 4. Main ----------
+# ---------- 5. Main ----------
 
 def main():
     rows = []
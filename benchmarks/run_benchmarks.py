@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py
+-----------------------------------------
+Time the pipeline hot paths on synthetic inputs (see synthetic.py) at
+several sizes and track the results over time.
+
+    case                   function                                   size unit
+    flood_cleaning         combined_dataset/flood_cleaning.clean_flood_events     rows
+    flood_preprocess       combined_dataset/flood_preprocess.process_flood_data   rows
+    flood_episodes         combined_dataset/flood_episodes.merge_episodes         rows
+    hourly_to_daily_max    oceanographic/oceanographic.hourly_to_daily_max       years of hourly data
+    meteorological         Meteorological/meteorological_features.load_and_extract days
+    sea_level              sea_level/sea_level_features.load_and_extract         months
+    land_cover_summarize   land_cover/land_cover.summarize                       raster side (px)
+    compound_join          combined_dataset/compound_events.compound_counts      station pairs x 30 years
+    extreme_values         combined_dataset/extreme_values.return_levels         stations x 40 years, 50 bootstraps
+    fit_random_forest      model_registry "random_forest" fit + predict           panel rows
+    fit_hist_gb            model_registry "hist_gradient_boosting" fit + predict  panel rows
+    fit_hist_gb_city       the same, plus the categorical city column              panel rows
+    predict_forest         200-tree forest (fit on 5k rows) predict, sklearn       rows
+    predict_forest_flat    the same forest, forest_compiler.CompiledForest.predict rows
+
+Each case runs --repeat times per size (input generation is not timed);
+min / median wall time and peak RSS are recorded. Every run is appended
+to results/history.jsonl. With a baseline (results/baseline.json, written
+by --save-baseline; otherwise the previous run on this host) a case whose
+median grows by more than its threshold is reported and the script exits
+with status 1.
+
+    python benchmarks/run_benchmarks.py                       # sizes s, m
+    python benchmarks/run_benchmarks.py --sizes s,m,l --repeat 5
+    python benchmarks/run_benchmarks.py --cases flood_cleaning --save-baseline
+-----------------------------------------
+"""
+
+import os
+os.environ.setdefault("PIPELINE_REPORT", "0")   # results go to history.jsonl instead
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import synthetic
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+HISTORY = RESULTS_DIR / "history.jsonl"
+BASELINE = RESULTS_DIR / "baseline.json"
+
+sys.path.insert(0, str(PROJECT_ROOT))
+from instrumentation import RUN, stage  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.25     # relative slowdown of the median that counts as a regression
+MIN_DELTA_S = 0.01           # ignore differences below timer noise
+
+
+def load_script(rel_path: str):
+    """Import a pipeline script by path (the stage folders are not packages)."""
+    path = PROJECT_ROOT / rel_path
+    name = "bench_" + path.stem
+    if name in sys.modules:
+        return sys.modules[name]
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+# ---------- 1. Cases ----------
+# setup(size, tmp) -> args (untimed);  run(*args) is timed
+
+def _flood_cleaning():
+    mod = load_script("combined_dataset/flood_cleaning.py")
+    return (lambda n, tmp: (synthetic.storm_events(n),),
+            mod.clean_flood_events)
+
+
+def _flood_preprocess():
+    clean = load_script("combined_dataset/flood_cleaning.py").clean_flood_events
+    mod = load_script("combined_dataset/flood_preprocess.py")
+    return (lambda n, tmp: (clean(synthetic.storm_events(n)),),
+            mod.process_flood_data)
+
+
+def _flood_episodes():
+    clean = load_script("combined_dataset/flood_cleaning.py").clean_flood_events
+    mod = load_script("combined_dataset/flood_episodes.py")
+    dates = ["BEGIN_YEARMONTH", "BEGIN_DAY", "END_YEARMONTH", "END_DAY"]
+
+    def setup(n_rows, tmp):
+        df = synthetic.storm_events(n_rows)
+        # zone rows of one episode share its dates, as in the NOAA files
+        df[dates] = df.groupby("EPISODE_ID")[dates].transform("first")
+        return (clean(df),)
+    return setup, mod.merge_episodes
+
+
+def _hourly_to_daily_max():
+    mod = load_script("oceanographic/oceanographic.py")
+
+    def setup(years, tmp):
+        src = synthetic.write_coops_hourly(tmp / f"9999999_{years}y_hourly.csv", years)
+        return src, "Synthetic Station", tmp
+    return setup, mod.hourly_to_daily_max
+
+
+def _meteorological():
+    mod = load_script("Meteorological/meteorological_features.py")
+    return (lambda days, tmp: ("synthetic", synthetic.write_ghcn_daily(tmp / f"ghcn_{days}.csv", days)),
+            mod.load_and_extract)
+
+
+def _sea_level():
+    mod = load_script("sea_level/sea_level_features.py")
+    return (lambda months, tmp: ("synthetic",
+                                 synthetic.write_sea_level_monthly(tmp / f"sl_{months}.csv", months)),
+            mod.load_and_extract)
+
+
+def _land_cover_summarize():
+    mod = load_script("land_cover/land_cover.py")
+    return (lambda side, tmp: (synthetic.nlcd_raster(side),),
+            mod.summarize)
+
+
+def _compound_join():
+    mod = load_script("combined_dataset/compound_events.py")
+
+    def setup(n_pairs, tmp):
+        days = 30 * 365
+        tide = synthetic.station_days(n_pairs, days, seed=1)
+        rain = synthetic.station_days(n_pairs, days, gamma_shape=0.5, seed=2)
+        ids = np.arange(n_pairs).astype(str)
+        pairs = pd.DataFrame({"city": ids, "tide_station": ids, "rain_station": np.roll(ids, 1)})
+        return tide, rain, pairs, (-1, 1)
+    return setup, mod.compound_counts
+
+
+def _extreme_values():
+    mod = load_script("combined_dataset/extreme_values.py")
+
+    def setup(n_stations, tmp):
+        return synthetic.station_days(n_stations, 40 * 365, gamma_shape=0.5, seed=3), "rain", 0.98, 3, 50
+    return setup, mod.return_levels
+
+
+def _model_fit(name, with_city=False):
+    def load_case():
+        registry = load_script("combined_dataset/model_registry.py")
+        columns = (["city"] if with_city else []) + registry.FEATURES
+
+        def setup(n_rows, tmp):
+            panel = synthetic.city_year_panel(n_rows)
+            return panel[columns], panel["flood_count"]
+
+        def fit_predict(X, y):
+            return registry.MODEL_FACTORIES[name]().fit(X, y).predict(X)
+        return setup, fit_predict
+    return load_case
+
+
+def _forest_predict(compiled):
+    def load_case():
+        registry = load_script("combined_dataset/model_registry.py")
+        compiler = load_script("combined_dataset/forest_compiler.py")
+        fitted = {}
+
+        def setup(n_rows, tmp):
+            if not fitted:
+                panel = synthetic.city_year_panel(5_000)
+                forest = registry.MODEL_FACTORIES["random_forest"]().fit(
+                    panel[registry.FEATURES], panel["flood_count"])
+                fitted["sklearn"] = forest
+                fitted["flat"] = compiler.compile_and_save(forest, tmp / "forest.forest", registry.FEATURES)
+            X = synthetic.city_year_panel(n_rows, seed=1)[registry.FEATURES]
+            return fitted["flat" if compiled else "sklearn"], X
+
+        return setup, lambda model, X: model.predict(X)
+    return load_case
+
+
+CASES = {
+    "flood_cleaning":       {"load": _flood_cleaning,       "sizes": {"s": 10_000, "m": 100_000, "l": 1_000_000}},
+    "flood_preprocess":     {"load": _flood_preprocess,     "sizes": {"s": 10_000, "m": 100_000, "l": 1_000_000}},
+    "flood_episodes":       {"load": _flood_episodes,       "sizes": {"s": 10_000, "m": 100_000, "l": 1_000_000}},
+    "hourly_to_daily_max":  {"load": _hourly_to_daily_max,  "sizes": {"s": 1, "m": 10, "l": 50}},
+    "meteorological":       {"load": _meteorological,       "sizes": {"s": 3_650, "m": 36_500, "l": 365_000}},
+    "sea_level":            {"load": _sea_level,            "sizes": {"s": 1_200, "m": 12_000, "l": 120_000}},
+    "land_cover_summarize": {"load": _land_cover_summarize, "sizes": {"s": 1_000, "m": 4_000, "l": 10_000},
+                             "threshold": 0.35},
+    "compound_join":        {"load": _compound_join,        "sizes": {"s": 10, "m": 100, "l": 500}},
+    "extreme_values":       {"load": _extreme_values,       "sizes": {"s": 10, "m": 50, "l": 200}},
+    "fit_random_forest":    {"load": _model_fit("random_forest"),          "sizes": {"s": 2_000, "m": 20_000, "l": 200_000}},
+    "fit_hist_gb":          {"load": _model_fit("hist_gradient_boosting"), "sizes": {"s": 2_000, "m": 20_000, "l": 200_000}},
+    "fit_hist_gb_city":     {"load": _model_fit("hist_gradient_boosting", with_city=True),
+                             "sizes": {"s": 2_000, "m": 20_000, "l": 200_000}},
+    "predict_forest":       {"load": _forest_predict(False), "sizes": {"s": 10_000, "m": 100_000, "l": 1_000_000}},
+    "predict_forest_flat":  {"load": _forest_predict(True),  "sizes": {"s": 10_000, "m": 100_000, "l": 1_000_000}},
+}
+
+
+# ---------- 2. Running ----------
+
+def run_case(name: str, sizes, repeat: int) -> list:
+    spec = CASES[name]
+    try:
+        setup, fn = spec["load"]()
+    except ImportError as e:
+        print(f"  {name}: skipped ({e})")
+        return []
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in sizes:
+            size = spec["sizes"][label]
+            args = setup(size, Path(tmp))
+            walls, peaks = [], []
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()), stage(f"bench.{name}", size=size):
+                    fn(*args)
+                rec = RUN.records[-1]
+                walls.append(rec["wall_s"])
+                peaks.append(rec["rss_peak_mb"])
+            row = {"case": name, "size_label": label, "size": size,
+                   "median_s": round(statistics.median(walls), 6), "min_s": round(min(walls), 6),
+                   "rss_peak_mb": max(peaks), "repeat": repeat}
+            rows.append(row)
+            print(f"  {name:22s} {label}  size={size:<9d} median {row['median_s']:8.4f} s  "
+                  f"min {row['min_s']:8.4f} s  peak RSS {row['rss_peak_mb']:8.1f} MB")
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(host: str):
+    if BASELINE.exists():
+        return json.loads(BASELINE.read_text(encoding="utf-8")), str(BASELINE)
+    if HISTORY.exists():
+        runs = [json.loads(line) for line in HISTORY.read_text(encoding="utf-8").splitlines() if line]
+        runs = [r for r in runs if r["host"] == host]
+        if runs:
+            return runs[-1], f"previous run {runs[-1]['timestamp']}"
+    return None, None
+
+
+def regressions(run: dict, base: dict) -> list:
+    prev = {(r["case"], r["size"]): r for r in base["results"]}
+    out = []
+    for r in run["results"]:
+        b = prev.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        limit = CASES[r["case"]].get("threshold", DEFAULT_THRESHOLD)
+        ratio = r["median_s"] / b["median_s"] if b["median_s"] > 0 else 1.0
+        if ratio > 1 + limit and r["median_s"] - b["median_s"] > MIN_DELTA_S:
+            out.append({**r, "baseline_s": b["median_s"], "ratio": round(ratio, 3), "threshold": limit})
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline hot paths on synthetic data.")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--sizes", default="s,m", help="comma-separated size labels (s, m, l)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as baseline")
+    parser.add_argument("--no-history", action="store_true", help="do not append to history.jsonl")
+    args = parser.parse_args()
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s) {unknown}; choose from {sorted(CASES)}")
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+
+    host = socket.gethostname()
+    print(f"Benchmarking {len(cases)} case(s), sizes {sizes}, repeat {args.repeat}")
+    results = [row for c in cases for row in run_case(c, sizes, args.repeat)]
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "host": host,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+
+    base, base_name = load_baseline(host)
+    RESULTS_DIR.mkdir(exist_ok=True)
+    if not args.no_history:
+        with HISTORY.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+    if args.save_baseline:
+        BASELINE.write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print("Saved baseline:", BASELINE)
+
+    if base is None:
+        print("\nNo baseline yet; nothing to compare.")
+        return
+    bad = regressions(run, base)
+    print(f"\nCompared with {base_name}: {len(bad)} regression(s)")
+    for r in bad:
+        print(f"  {r['case']:22s} {r['size_label']}  {r['baseline_s']:.4f} s -> {r['median_s']:.4f} s "
+              f"(x{r['ratio']}, limit x{1 + r['threshold']:.2f})")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic.py
+-----------------------------------------
+Generators for inputs shaped like the real pipeline inputs, at any size,
+without the network or the 20 GB NLCD raster:
+
+    storm_events(n_rows)                 NOAA StormEvents "details" table
+    write_coops_hourly(path, years)      CO-OPS hourly_height CSV
+    write_ghcn_daily(path, days)         GHCN-Daily CSV as in Meteorological/
+    write_sea_level_monthly(path, months) NOAA monthly mean sea level CSV
+    nlcd_raster(side)                    uint8 NLCD land-cover classes, 0 = nodata
+    station_days(n_stations, days)       long (station, day, value) daily series with gaps
+    city_year_panel(n_rows)              city-year model panel (FEATURES, city, flood_count)
+
+Everything is seeded, so the same size always gives the same data.
+-----------------------------------------
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STATES = ["FLORIDA", "LOUISIANA", "VIRGINIA", "TEXAS", "NEW YORK", "CALIFORNIA"]
+CZ_NAMES = ["MIAMI-DADE", "BROWARD", "MONROE", "ORLEANS", "JEFFERSON", "ST. BERNARD",
+            "PLAQUEMINES", "NORFOLK (C)", "HARRIS", "KINGS", "LOS ANGELES", "PALM BEACH"]
+EVENT_TYPES = ["Flood", "Flash Flood", "Coastal Flood", "Thunderstorm Wind", "Hail",
+               "Heavy Rain", "Tornado", "Storm Surge/Tide"]
+EVENT_P = [0.18, 0.22, 0.05, 0.25, 0.15, 0.08, 0.04, 0.03]
+
+# NLCD 2021 classes with rough coastal-county shares
+NLCD_CLASSES = [11, 21, 22, 23, 24, 31, 41, 42, 43, 52, 71, 81, 82, 90, 95]
+NLCD_P = [0.20, 0.08, 0.07, 0.05, 0.03, 0.01, 0.05, 0.05, 0.03, 0.05, 0.04, 0.04, 0.05, 0.16, 0.09]
+
+
+def storm_events(n_rows: int, years=range(2010, 2025), seed: int = 0) -> pd.DataFrame:
+    """StormEvents details rows with the columns the cleaning scripts use."""
+    rng = np.random.default_rng(seed)
+    years = np.asarray(list(years))
+    year = rng.choice(years, n_rows)
+    month = rng.integers(1, 13, n_rows)
+    day = rng.integers(1, 29, n_rows)
+    hour = rng.integers(0, 2400, n_rows)
+    dur_days = rng.integers(0, 3, n_rows)
+
+    amount = np.round(rng.lognormal(2.0, 1.5, n_rows), 2)
+    unit = rng.choice(np.array(["K", "M", ""]), n_rows, p=[0.7, 0.1, 0.2])
+    damage = pd.Series(np.char.add(amount.astype(str), unit)).where(rng.random(n_rows) > 0.3)
+
+    state_idx = rng.integers(0, len(STATES), n_rows)
+    event_id = np.arange(1, n_rows + 1) + 900_000
+    return pd.DataFrame({
+        "BEGIN_YEARMONTH": year * 100 + month,
+        "BEGIN_DAY": day,
+        "BEGIN_TIME": hour,
+        "END_YEARMONTH": year * 100 + month,
+        "END_DAY": np.minimum(day + dur_days, 28),
+        "END_TIME": hour,
+        "EPISODE_ID": event_id // 3,
+        "EVENT_ID": event_id,
+        "STATE": np.array(STATES)[state_idx],
+        "STATE_FIPS": state_idx + 1,
+        "YEAR": year,
+        "EVENT_TYPE": rng.choice(np.array(EVENT_TYPES), n_rows, p=EVENT_P),
+        "CZ_TYPE": rng.choice(np.array(["C", "Z"]), n_rows),
+        "CZ_FIPS": rng.integers(1, 200, n_rows),
+        "CZ_NAME": rng.choice(np.array(CZ_NAMES), n_rows),
+        "DAMAGE_PROPERTY": damage,
+        "DAMAGE_CROPS": "0.00K",
+        "BEGIN_LAT": np.round(rng.uniform(25, 41, n_rows), 4),
+        "BEGIN_LON": np.round(rng.uniform(-95, -73, n_rows), 4),
+    })
+
+
+def write_storm_events(path: Path, n_rows: int, seed: int = 0) -> Path:
+    storm_events(n_rows, seed=seed).to_csv(path, index=False)
+    return path
+
+
+def write_coops_hourly(path: Path, years: int, start_year: int = 2000, seed: int = 0) -> Path:
+    """Hourly water levels (tide + surge + noise) in the CO-OPS CSV layout."""
+    rng = np.random.default_rng(seed)
+    t = pd.date_range(f"{start_year}-01-01", periods=int(years * 8760), freq="h")
+    hours = np.arange(len(t))
+    level = (0.35 * np.sin(2 * np.pi * hours / 12.42) + 0.1 * np.sin(2 * np.pi * hours / 24.0)
+             + rng.normal(0, 0.05, len(t)))
+    df = pd.DataFrame({
+        "Date Time": t.strftime("%Y-%m-%d %H:%M"),
+        " Water Level": np.round(level, 3),
+        " Sigma": np.round(np.abs(rng.normal(0.01, 0.005, len(t))), 3),
+        " I": 0,
+        " L": 0,
+    })
+    df.to_csv(path, index=False)
+    return path
+
+
+def write_ghcn_daily(path: Path, days: int, start: str = "1950-01-01", seed: int = 0) -> Path:
+    """GHCN-Daily station CSV: wet-day gamma rainfall, some trace (T) and missing (M)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    wet = rng.random(days) < 0.35
+    prcp = np.where(wet, np.round(rng.gamma(0.8, 12.0, days), 1), 0.0).astype(object)
+    prcp[rng.random(days) < 0.02] = "T"
+    prcp[rng.random(days) < 0.01] = "M"
+    df = pd.DataFrame({
+        "STATION": "USW00099999",
+        "NAME": "SYNTHETIC STATION, FL US",
+        "LATITUDE": "25.78805",
+        "LONGITUDE": "-80.31694",
+        "ELEVATION": "1.4",
+        "DATE": dates.strftime("%Y-%m-%d"),
+        "AWND": np.round(rng.gamma(2.0, 2.0, days), 1),
+        "PRCP": prcp,
+        "TAVG": np.round(rng.normal(24, 3, days), 1),
+        "TMAX": np.round(rng.normal(28, 3, days), 1),
+        "TMIN": np.round(rng.normal(20, 3, days), 1),
+    })
+    df.to_csv(path, index=False, quoting=1)
+    return path
+
+
+def write_sea_level_monthly(path: Path, months: int, start_year: int = 1900, seed: int = 0) -> Path:
+    """NOAA 'monthly mean sea level, seasonal cycle removed' CSV with its 5 preamble lines."""
+    rng = np.random.default_rng(seed)
+    m = np.arange(months)
+    trend = -0.2 + 0.0003 * m
+    msl = trend + rng.normal(0, 0.04, months)
+    lines = [
+        "Monthly mean sea levels with the average seasonal cycle removed.",
+        "The values are in meters relative to the most recent Mean Sea Level datum established by CO-OPS.",
+        "Column values are the Year; Month; Monthly Mean; Relative Sea Level Trend Line; "
+        "Higher 95% Confidence Interval; and Lower 95% Confidence Interval.",
+        "Product of NOAAs National Ocean Service / Center for Operational Oceanographic "
+        "Products and Services (CO-OPS)",
+        "",
+        "Year, Month, Monthly_MSL, Linear_Trend, High_Conf., Low_Conf.",
+    ]
+    body = pd.DataFrame({
+        "y": start_year + m // 12, "m": m % 12 + 1,
+        "msl": msl, "trend": trend, "hi": trend + 0.012, "lo": trend - 0.012,
+    })
+    text = body.to_csv(index=False, header=False, float_format="%.3f", lineterminator=",\n")
+    Path(path).write_text("\n".join(lines) + "\n" + text, encoding="utf-8")
+    return path
+
+
+def nlcd_raster(side: int, nodata_frac: float = 0.1, seed: int = 0) -> np.ndarray:
+    """side x side uint8 array of NLCD classes; a band on the right is nodata (0)."""
+    rng = np.random.default_rng(seed)
+    arr = rng.choice(np.array(NLCD_CLASSES, dtype=np.uint8), size=(side, side), p=NLCD_P)
+    arr[:, side - int(side * nodata_frac):] = 0
+    return arr
+
+
+def station_days(n_stations: int, days: int, gamma_shape: float = None, gap_frac: float = 0.05,
+                 seed: int = 0) -> pd.DataFrame:
+    """Daily values of many stations as long rows; gamma_shape set -> rainfall-like."""
+    rng = np.random.default_rng(seed)
+    n = n_stations * days
+    value = (rng.gamma(gamma_shape, 8.0, n) if gamma_shape is not None
+             else rng.normal(0.5, 0.2, n))
+    df = pd.DataFrame({
+        "station": np.repeat(np.arange(n_stations), days).astype(str),
+        "day": np.tile(np.arange(days) + 16_000, n_stations),
+        "value": value,
+    })
+    return df[rng.random(n) > gap_frac].reset_index(drop=True)
+
+
+def city_year_panel(n_rows: int, n_cities: int = None, seed: int = 0) -> pd.DataFrame:
+    """City-year rows with the model_registry FEATURES, a categorical city and a count target."""
+    rng = np.random.default_rng(seed)
+    n_cities = n_cities or max(3, n_rows // 15)
+    city = rng.integers(0, n_cities, n_rows)
+    base = rng.normal(size=(n_cities, 8))[city]            # city-level feature values
+    noise = rng.normal(scale=0.2, size=(n_rows, 8))
+    x = base + noise
+    df = pd.DataFrame({
+        "city": pd.Categorical(np.char.add("city_", city.astype(str))),
+        "YEAR": rng.integers(2010, 2025, n_rows),
+        "urban_ratio": 1 / (1 + np.exp(-x[:, 0])),
+        "densityMi": np.exp(5 + x[:, 1]),
+        "sea_level_trend": 0.05 * x[:, 2],
+        "sea_level_recent_mean": 0.05 * x[:, 3],
+        "sea_level_max_anomaly": 0.2 + 0.05 * np.abs(x[:, 4]),
+        "rain_daily_mean": 4 + x[:, 5],
+        "rain_daily_max": 150 + 30 * x[:, 6],
+        "heavy_rain_days_per_year": 37 + 3 * x[:, 7],
+    })
+    rate = np.exp(0.5 + 0.8 * df["urban_ratio"] + 0.3 * x[:, 5] + 0.4 * np.sin(x[:, 3] * 2))
+    df["flood_count"] = rng.poisson(rate)
+    return df
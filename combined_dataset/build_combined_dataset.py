@@ -4,8 +4,11 @@ Output:
   combined_dataset.csv  
 """
 
+import sys
 from pathlib import Path
-import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
 
 
 HERE = Path(__file__).resolve().parent         
@@ -28,23 +31,19 @@ def main():
     print(f"Using land cover summary: {LAND_COVER_CSV}")
     print(f"Using population CSV:    {POP_CSV}\n")
 
-    df_lc = pd.read_csv(LAND_COVER_CSV)
+    df_lc = load("land_cover_summary", path=LAND_COVER_CSV)
     print("[Land cover columns]")
     print(list(df_lc.columns), "\n")
 
     df_lc["city"] = df_lc["city"].str.lower().str.strip()
     df_lc["state"] = df_lc["city"].map(CITY_TO_STATE)
 
-    df_pop = pd.read_csv(POP_CSV)
+    needed_cols = ["state", "densityMi", "population", "TotalArea"]
+    df_pop = load("population", columns=needed_cols, path=POP_CSV)
     print("[Population CSV columns]")
     print(list(df_pop.columns), "\n")
 
-    needed_cols = ["state", "densityMi", "population", "TotalArea"]
-    for col in needed_cols:
-        if col not in df_pop.columns:
-            raise RuntimeError(f" Missing column '{col}' in population CSV!")
-
-    df_pop = df_pop[needed_cols].copy().set_index("state")
+    df_pop = df_pop.set_index("state")
 
     df = df_lc.join(df_pop, on="state", how="left")
 
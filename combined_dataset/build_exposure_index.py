@@ -7,23 +7,22 @@ Output:
 -----------------------------------------
 """
 
-import pandas as pd
+import sys
 import numpy as np
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 INPUT_CSV = PROJECT_ROOT / "combined_dataset.csv"
 OUTPUT_CSV = PROJECT_ROOT / "exposure_dataset.csv"
 
 print("Loading:", INPUT_CSV)
-df = pd.read_csv(INPUT_CSV)
+df = load("combined", path=INPUT_CSV)
 
-# Check necessary columns
-required = ["city", "state", "urban_ratio", "densityMi"]
-for col in required:
-    if col not in df.columns:
-        raise RuntimeError(f" Missing required column: {col}")
+# Required columns (city, state, urban_ratio, densityMi) are checked by the schema
 
 # Compute Exposure Raw Score 
 df["exposure_raw"] = df["urban_ratio"] * df["densityMi"]
@@ -1,8 +1,11 @@
 # build_model_dataset.py
 # Combine exposure, sea-level, and meteorological features into one modeling dataset.
 
+import sys
 from pathlib import Path
-import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
 
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -11,9 +14,9 @@ exp_path = BASE_DIR / "exposure_dataset.csv"
 sea_path = BASE_DIR.parent / "sea_level" / "sea_level_features.csv"
 met_path = BASE_DIR.parent / "Meteorological" / "meteorological_features.csv"
 
-df_exp = pd.read_csv(exp_path)
-df_sea = pd.read_csv(sea_path)
-df_met = pd.read_csv(met_path)
+df_exp = load("exposure", path=exp_path)
+df_sea = load("sea_level_features", path=sea_path)
+df_met = load("meteorological_features", path=met_path)
 
 # Make city names consistent (lowercase)
 for df in (df_exp, df_sea, df_met):
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+compound_events.py
+-----------------------------------------
+Compound flood days: daily tide extremes x heavy rainfall.
+
+Tide-gauge daily maxima (oceanographic.hourly_to_daily_max output) and
+station daily rainfall (the GHCN CSVs in Meteorological/) are put on one
+integer day grid (days since 1970-01-01), one row per station:
+
+    tide[s, d]  daily max water level of tide station s on day d (NaN = no data)
+    rain[s, d]  daily precipitation of rain station s on day d
+
+A day is an exceedance when the value is above the station's quantile
+threshold (--tide-q, --rain-q) or a fixed rainfall amount (--rain-mm).
+Rain is matched to a tide day over a lag window [lo, hi] of days relative to
+the tide day: (0, 0) = same day, (-1, 1) = the day before to the day after,
+(-3, 0) = as-of join over the 3 days before. The window is a rolling "any"
+computed with cumulative sums, for all stations at once.
+
+For every (city, tide station, rain station) pair and year:
+
+    days_valid          days with tide data and rain data in the window
+    tide_days           tide exceedance days
+    rain_days           days with a rain exceedance in the window
+    joint_days          both on the same day
+    joint_events        runs of consecutive joint days
+    p_rain_given_tide   joint_days / tide_days
+    p_tide_given_rain   joint_days / rain_days
+    expected_joint      tide_days * rain_days / days_valid  (independence)
+    co_occurrence       joint_days / expected_joint  (> 1: occur together
+                        more often than by chance)
+
+All pairs are evaluated in one pass over (pairs x days) boolean arrays;
+per-year counts are np.add.reduceat over the year boundaries.
+
+    python compound_events.py --tide-dir ~/Desktop/noaa_daily
+    python compound_events.py --lag=-1:1 --tide-q 0.98 --rain-mm 50
+-----------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+
+sys.path.insert(0, str(PROJECT_ROOT))  # instrumentation.py
+sys.path.insert(0, str(PROJECT_ROOT / "Meteorological"))
+from instrumentation import stage  # noqa: E402
+from meteorological_features import CITY_FILES, read_daily_precip  # noqa: E402
+
+TIDE_DIR = Path.home() / "Desktop" / "noaa_daily"   # where oceanographic.py writes
+OUT_CSV = HERE / "compound_events.csv"
+
+# CO-OPS station id -> city (see oceanographic.STATIONS)
+TIDE_STATION_CITY = {
+    "8723214": "miami",
+    "8761927": "new_orleans",
+    "8638610": "norfolk",
+}
+
+COUNT_COLS = ["days_valid", "tide_days", "rain_days", "joint_days", "joint_events"]
+
+
+# ---------- 1. Day grid ----------
+
+def day_key(dates) -> np.ndarray:
+    """Dates -> int64 days since 1970-01-01."""
+    return pd.to_datetime(dates).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def day_grid(series: pd.DataFrame, day0: int, n_days: int, stations=None):
+    """
+    Long (station, day, value) rows -> (stations, float32 [station, day] grid).
+    Days outside [day0, day0 + n_days) are dropped; a repeated day keeps the max.
+    """
+    series = series[(series["day"] >= day0) & (series["day"] < day0 + n_days)]
+    if stations is None:
+        stations = np.sort(series["station"].unique())
+    codes = pd.Index(stations).get_indexer(series["station"])
+    keep = codes >= 0
+
+    grid = np.full((len(stations), n_days), np.nan, dtype=np.float32)
+    values = series["value"].to_numpy(dtype=np.float32)[keep]
+    np.fmax.at(grid, (codes[keep], series["day"].to_numpy()[keep] - day0), values)
+    return np.asarray(stations), grid
+
+
+def window_any(flags: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """out[:, d] = flags[:, d+lo : d+hi+1].any(axis=1); days off the grid count as False."""
+    n_days = flags.shape[1]
+    csum = np.zeros((flags.shape[0], n_days + 1), dtype=np.int32)
+    np.cumsum(flags, axis=1, out=csum[:, 1:])
+    d = np.arange(n_days)
+    start = np.clip(d + lo, 0, n_days)
+    stop = np.clip(d + hi + 1, 0, n_days)
+    return (csum[:, stop] - csum[:, start]) > 0
+
+
+def exceedance(grid: np.ndarray, q: float = None, fixed: float = None):
+    """(exceeds, valid, thresholds): per-station quantile threshold, or one fixed value."""
+    valid = ~np.isnan(grid)
+    if fixed is not None:
+        thresh = np.full(grid.shape[0], fixed, dtype=np.float32)
+    else:
+        thresh = np.full(grid.shape[0], np.nan, dtype=np.float32)
+        has_data = valid.any(axis=1)
+        thresh[has_data] = np.nanquantile(grid[has_data], q, axis=1)
+    with np.errstate(invalid="ignore"):
+        exceeds = grid > thresh[:, None]
+    return exceeds & valid, valid, thresh
+
+
+# ---------- 2. Join engine ----------
+
+@stage("compound.join")
+def compound_counts(tide: pd.DataFrame, rain: pd.DataFrame, pairs: pd.DataFrame,
+                    lag=(0, 0), tide_q: float = 0.95, rain_q: float = 0.9,
+                    rain_mm: float = None) -> pd.DataFrame:
+    """
+    tide, rain  long frames with columns station, day (day_key), value
+    pairs       columns city, tide_station, rain_station
+    lag         (lo, hi) rain window in days relative to the tide day
+
+    Returns one row per pair and year with the COUNT_COLS counts.
+    """
+    lo, hi = lag
+    day0 = int(min(tide["day"].min(), rain["day"].min()))
+    n_days = int(max(tide["day"].max(), rain["day"].max())) - day0 + 1
+
+    tide_ids, tide_grid = day_grid(tide, day0, n_days, np.sort(pairs["tide_station"].unique()))
+    rain_ids, rain_grid = day_grid(rain, day0, n_days, np.sort(pairs["rain_station"].unique()))
+
+    tide_x, tide_ok, _ = exceedance(tide_grid, q=tide_q)
+    rain_x, rain_ok, _ = exceedance(rain_grid, q=rain_q, fixed=rain_mm)
+    rain_x = window_any(rain_x, lo, hi)
+    rain_ok = window_any(rain_ok, lo, hi)
+
+    # (pairs x days) views of the station rows
+    ti = pd.Index(tide_ids).get_indexer(pairs["tide_station"])
+    ri = pd.Index(rain_ids).get_indexer(pairs["rain_station"])
+    valid = tide_ok[ti] & rain_ok[ri]
+    t = tide_x[ti] & valid
+    r = rain_x[ri] & valid
+    joint = t & r
+    starts = joint.copy()
+    starts[:, 1:] &= ~joint[:, :-1]
+
+    years = (np.arange(day0, day0 + n_days).astype("datetime64[D]")
+             .astype("datetime64[Y]").astype(np.int64) + 1970)
+    bounds = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+
+    counts = {name: np.add.reduceat(arr, bounds, axis=1, dtype=np.int64)
+              for name, arr in zip(COUNT_COLS, (valid, t, r, joint, starts))}
+
+    n_pairs, n_years = len(pairs), len(bounds)
+    out = pd.DataFrame({
+        "city": np.repeat(pairs["city"].to_numpy(), n_years),
+        "tide_station": np.repeat(pairs["tide_station"].to_numpy(), n_years),
+        "rain_station": np.repeat(pairs["rain_station"].to_numpy(), n_years),
+        "year": np.tile(years[bounds], n_pairs),
+        **{name: c.ravel() for name, c in counts.items()},
+    })
+    return out[out["days_valid"] > 0].reset_index(drop=True)
+
+
+def compound_stats(counts: pd.DataFrame) -> pd.DataFrame:
+    """Add conditional probabilities and the co-occurrence ratio to count rows."""
+    df = counts.copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["p_rain_given_tide"] = df["joint_days"] / df["tide_days"].where(df["tide_days"] > 0)
+        df["p_tide_given_rain"] = df["joint_days"] / df["rain_days"].where(df["rain_days"] > 0)
+        df["expected_joint"] = df["tide_days"] * df["rain_days"] / df["days_valid"]
+        df["co_occurrence"] = df["joint_days"] / df["expected_joint"].where(df["expected_joint"] > 0)
+    return df
+
+
+def pair_totals(counts: pd.DataFrame) -> pd.DataFrame:
+    """Counts summed over years, with the same statistics."""
+    keys = ["city", "tide_station", "rain_station"]
+    totals = counts.groupby(keys, as_index=False)[COUNT_COLS].sum()
+    return compound_stats(totals)
+
+
+# ---------- 3. Inputs ----------
+
+def read_tide_daily(tide_dir: Path) -> pd.DataFrame:
+    """<station>_..._daily_max.csv files -> long (station, day, value) rows."""
+    frames = []
+    for path in sorted(Path(tide_dir).glob("*_daily_max.csv")):
+        df = pd.read_csv(path, usecols=["date", "daily_max_tide_m"])
+        frames.append(pd.DataFrame({
+            "station": path.name.split("_")[0],
+            "day": day_key(df["date"]),
+            "value": df["daily_max_tide_m"].to_numpy(dtype=float),
+        }))
+    if not frames:
+        raise FileNotFoundError(f"No *_daily_max.csv files in {tide_dir} (run oceanographic.py)")
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_rain_daily(city_files=CITY_FILES) -> pd.DataFrame:
+    """Meteorological station CSVs -> long (station, day, value) rows, station = city."""
+    frames = []
+    for city, path in city_files.items():
+        df = read_daily_precip(path)
+        frames.append(pd.DataFrame({"station": city, "day": day_key(df["DATE"]),
+                                    "value": df["PRCP"].to_numpy(dtype=float)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def default_pairs(tide: pd.DataFrame, rain: pd.DataFrame) -> pd.DataFrame:
+    """Each tide station with the rain station of its city."""
+    rows = [{"city": TIDE_STATION_CITY[s], "tide_station": s, "rain_station": TIDE_STATION_CITY[s]}
+            for s in sorted(tide["station"].unique())
+            if TIDE_STATION_CITY.get(s) in set(rain["station"])]
+    if not rows:
+        raise RuntimeError("No tide station matches a rain station; check TIDE_STATION_CITY.")
+    return pd.DataFrame(rows)
+
+
+# ---------- 4. CLI ----------
+
+def _lag(text: str):
+    lo, _, hi = text.partition(":")
+    lo, hi = int(lo), int(hi or lo)
+    if lo > hi:
+        raise argparse.ArgumentTypeError("lag must be lo:hi with lo <= hi")
+    return lo, hi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compound tide x rainfall exceedance statistics.")
+    parser.add_argument("--tide-dir", type=Path, default=TIDE_DIR,
+                        help="folder with <station>_..._daily_max.csv files")
+    parser.add_argument("--pairs", type=Path, default=None,
+                        help="CSV with city,tide_station,rain_station (default: by city)")
+    parser.add_argument("--lag", type=_lag, default=(0, 0),
+                        help="rain window lo:hi in days around the tide day, e.g. --lag=-1:1")
+    parser.add_argument("--tide-q", type=float, default=0.95, help="tide exceedance quantile")
+    parser.add_argument("--rain-q", type=float, default=0.9, help="rain exceedance quantile")
+    parser.add_argument("--rain-mm", type=float, default=None,
+                        help="fixed rain threshold in mm (overrides --rain-q)")
+    parser.add_argument("--out", type=Path, default=OUT_CSV)
+    args = parser.parse_args()
+
+    tide = read_tide_daily(args.tide_dir)
+    rain = read_rain_daily()
+    pairs = (pd.read_csv(args.pairs, dtype=str) if args.pairs is not None
+             else default_pairs(tide, rain))
+
+    t0 = time.perf_counter()
+    counts = compound_counts(tide, rain, pairs, lag=args.lag, tide_q=args.tide_q,
+                             rain_q=args.rain_q, rain_mm=args.rain_mm)
+    elapsed = time.perf_counter() - t0
+
+    yearly = compound_stats(counts)
+    yearly.to_csv(args.out, index=False)
+
+    print(f"{len(pairs)} pair(s), {yearly['year'].nunique()} year(s), lag {args.lag}: "
+          f"{elapsed * 1000:.1f} ms")
+    print(pair_totals(counts).round(3).to_string(index=False))
+    print("\nSaved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,49 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+from pathlib import Path
 
-# ------------- Load Data -------------
-file_path = os.path.join(os.path.dirname(__file__), "modeling_dataset.csv")
-df = pd.read_csv(file_path)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
 
-# Select numeric columns only 
-numeric_df = df.select_dtypes(include=['float64', 'int64'])
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# ------------- Compute Correlation -------------
-corr = numeric_df.corr()
+# Save at project root folder
+OUT_PATH = os.path.join(os.path.dirname(BASE_DIR), "correlation_heatmap.png")
 
-# ------------- Plot Heatmap -------------
-plt.figure(figsize=(12, 8))
-sns.set(style="whitegrid")
 
-ax = sns.heatmap(
-    corr, 
-    annot=True, 
-    fmt=".2f", 
-    cmap="coolwarm", 
-    linewidths=.5, 
-    square=True, 
-    cbar_kws={"shrink": .8}
-)
+def plot_correlation_heatmap(df, out_path=OUT_PATH):
+    # Select numeric columns only
+    numeric_df = df.select_dtypes(include=['float64', 'int64'])
 
-plt.title("Correlation Heatmap of Environmental Features", fontsize=16)
-plt.tight_layout()
+    # ------------- Compute Correlation -------------
+    corr = numeric_df.corr()
+
+    # ------------- Plot Heatmap -------------
+    plt.figure(figsize=(12, 8))
+    sns.set(style="whitegrid")
+
+    ax = sns.heatmap(
+        corr,
+        annot=True,
+        fmt=".2f",
+        cmap="coolwarm",
+        linewidths=.5,
+        square=True,
+        cbar_kws={"shrink": .8}
+    )
+
+    plt.title("Correlation Heatmap of Environmental Features", fontsize=16)
+    plt.tight_layout()
+
+    plt.savefig(out_path, dpi=300)
+    plt.close()
+
+    print("Generated:", out_path)
+    print("Heatmap complete!")
 
-# Save at project root folder
-output_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "correlation_heatmap.png")
-plt.savefig(output_path, dpi=300)
 
-print("Generated:", output_path)
-print("Heatmap complete!")
+if __name__ == "__main__":
+    # ------------- Load Data -------------
+    plot_correlation_heatmap(load("modeling"))
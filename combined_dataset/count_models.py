@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+count_models.py
+-----------------------------------------
+Poisson / negative binomial (NB2) regression for yearly flood counts,
+fitted with IRLS written directly in NumPy (log link).
+
+Two entry points:
+    fit_glm(...)        one panel, optional per-city fixed effects and an
+                        offset. Fixed effects are never expanded into dummy
+                        columns: every IRLS step demeans X and the working
+                        response by weighted group means (np.bincount), so
+                        thousands of locations cost the same as one.
+    irls_batch(...)     many independent regressions at once, stacked as
+                        X (B, n, p) / y (B, n); every IRLS step is one
+                        batched einsum + np.linalg.solve. Rows padded with
+                        mask=False are ignored.
+
+NB2 variance is mu + alpha * mu^2; alpha is estimated by alternating IRLS
+with the Cameron-Trivedi moment estimator.
+
+Output (python count_models.py):
+    count_model_results.csv   coefficients, SE and rate ratios
+-----------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import HERE
+
+OUT_CSV = HERE / "count_model_results.csv"
+
+FAMILIES = ("poisson", "negbin")
+
+
+# ---------- 1. Family helpers ----------
+
+def _working_weights(mu, alpha):
+    """IRLS weights for a log link: mu / (1 + alpha * mu)."""
+    return mu / (1.0 + alpha * mu)
+
+
+def unit_deviance(y, mu, alpha=0.0):
+    """Element-wise Poisson (alpha=0) or NB2 deviance; alpha broadcasts against y."""
+    y = np.asarray(y, dtype=float)
+    alpha = np.asarray(alpha, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ylog = np.where(y > 0, y * np.log(y / mu), 0.0)
+        poisson = 2 * (ylog - (y - mu))
+        if np.all(alpha == 0):
+            return poisson
+        inv = 1.0 / alpha
+        negbin = 2 * (ylog - (y + inv) * np.log((1 + alpha * y) / (1 + alpha * mu)))
+    return np.where(alpha == 0, poisson, negbin)
+
+
+def deviance(y, mu, alpha=0.0, axis=None):
+    """Poisson (alpha=0) or NB2 deviance, summed along `axis`."""
+    return np.nansum(unit_deviance(y, mu, alpha), axis=axis)
+
+
+def moment_alpha(y, mu, mask=None, axis=None):
+    """Cameron-Trivedi NB2 dispersion: sum((y-mu)^2 - y) / sum(mu^2), >= 1e-8."""
+    num = (y - mu) ** 2 - y
+    den = mu ** 2
+    if mask is not None:
+        num = np.where(mask, num, 0.0)
+        den = np.where(mask, den, 0.0)
+    num, den = num.sum(axis=axis), den.sum(axis=axis)
+    # no observations (a fully masked batch row): no overdispersion to estimate
+    ratio = np.divide(num, den, out=np.zeros_like(den, dtype=float), where=den > 0)
+    return np.maximum(ratio, 1e-8)
+
+
+# ---------- 2. Single panel with fixed effects ----------
+
+def _group_means(values, codes, weights, n_groups):
+    """Weighted mean of every column of `values` within each group."""
+    wsum = np.bincount(codes, weights=weights, minlength=n_groups)
+    if values.ndim == 1:
+        return np.bincount(codes, weights=weights * values, minlength=n_groups) / wsum
+    return np.column_stack([
+        np.bincount(codes, weights=weights * values[:, j], minlength=n_groups) / wsum
+        for j in range(values.shape[1])
+    ])
+
+
+def _irls_within(X, y, codes, n_groups, offset, alpha, beta=None, fe=None,
+                 max_iter=100, tol=1e-10):
+    """IRLS with group effects absorbed by weighted within-transformation."""
+    if beta is None:
+        mu = y + 0.5
+        eta = np.log(mu)
+    else:
+        eta = X @ beta + fe[codes] + offset
+        mu = np.exp(eta)
+
+    dev_old = np.inf
+    for it in range(1, max_iter + 1):
+        w = _working_weights(mu, alpha)
+        z = eta - offset + (y - mu) / mu
+
+        z_bar = _group_means(z, codes, w, n_groups)
+        z_t = z - z_bar[codes]
+        if X.shape[1]:
+            X_bar = _group_means(X, codes, w, n_groups)
+            X_t = X - X_bar[codes]
+            xtwx = (X_t * w[:, None]).T @ X_t
+            beta = np.linalg.solve(xtwx, (X_t * w[:, None]).T @ z_t)
+            fe = z_bar - X_bar @ beta
+        else:
+            xtwx = np.zeros((0, 0))
+            beta = np.zeros(0)
+            fe = z_bar
+
+        eta = X @ beta + fe[codes] + offset
+        mu = np.exp(eta)
+
+        dev = deviance(y, mu, alpha)
+        if abs(dev - dev_old) <= tol * (abs(dev) + 0.1):
+            break
+        dev_old = dev
+
+    return beta, fe, mu, xtwx, dev, it
+
+
+def fit_glm(df: pd.DataFrame, y_col: str, x_cols, family: str = "poisson",
+            group_col: str = None, offset_col: str = None,
+            max_iter: int = 100, tol: float = 1e-10) -> dict:
+    """
+    Fit a Poisson or NB2 GLM on one panel.
+
+    group_col adds one fixed effect per group (replaces the intercept);
+    without it a single intercept is estimated. offset_col is added to the
+    linear predictor as-is (pass log-exposure). Groups whose counts are all
+    zero have no finite fixed effect and are dropped.
+    """
+    if family not in FAMILIES:
+        raise ValueError(f"family must be one of {FAMILIES}, got '{family}'")
+
+    x_cols = list(x_cols)
+    if group_col is not None:
+        totals = df.groupby(group_col)[y_col].transform("sum")
+        dropped = sorted(df.loc[totals == 0, group_col].unique())
+        df = df[totals > 0]
+        codes, groups = pd.factorize(df[group_col], sort=True)
+    else:
+        dropped = []
+        codes = np.zeros(len(df), dtype=np.intp)
+        groups = np.array(["(intercept)"])
+
+    X = df[x_cols].to_numpy(dtype=float)
+    y = df[y_col].to_numpy(dtype=float)
+    offset = (df[offset_col].to_numpy(dtype=float) if offset_col
+              else np.zeros(len(df)))
+
+    t0 = time.perf_counter()
+    alpha = 0.0
+    beta, fe, mu, xtwx, dev, n_iter = _irls_within(
+        X, y, codes, len(groups), offset, alpha, max_iter=max_iter, tol=tol)
+
+    if family == "negbin":
+        for _ in range(max_iter):
+            alpha_new = float(moment_alpha(y, mu))
+            beta, fe, mu, xtwx, dev, it = _irls_within(
+                X, y, codes, len(groups), offset, alpha_new, beta, fe,
+                max_iter=max_iter, tol=tol)
+            n_iter += it
+            converged = abs(alpha_new - alpha) <= 1e-6 * (alpha + 1e-6)
+            alpha = alpha_new
+            if converged:
+                break
+    fit_ms = (time.perf_counter() - t0) * 1000
+
+    cov = np.linalg.inv(xtwx) if X.shape[1] else np.zeros((0, 0))
+    se = np.sqrt(np.diag(cov))
+
+    coef = pd.DataFrame({
+        "term": x_cols,
+        "coef": beta,
+        "se": se,
+        "z": beta / se,
+        "rate_ratio": np.exp(beta),
+    })
+    effects = pd.Series(fe, index=groups, name="fixed_effect")
+
+    return {
+        "family": family,
+        "coef": coef,
+        "fixed_effects": effects,
+        "alpha": alpha,
+        "deviance": float(dev),
+        "n_obs": int(len(y)),
+        "n_iter": int(n_iter),
+        "fit_ms": fit_ms,
+        "mu": mu,
+        "dropped_groups": dropped,
+    }
+
+
+# ---------- 3. Many independent regressions at once ----------
+
+def irls_batch(X, y, offset=None, mask=None, family: str = "poisson",
+               max_iter: int = 100, tol: float = 1e-10, ridge: float = 1e-10):
+    """
+    Fit B independent log-link GLMs in one batched IRLS.
+
+    X: (B, n, p), y: (B, n), offset: (B, n), mask: (B, n) bool (False = padding).
+    Returns dict with beta (B, p), se (B, p), cov (B, p, p), alpha (B,),
+    deviance (B,), mu (B, n), iteration count and dropped (B,) bool.
+    As in fit_glm, a regression whose counts are all zero has no finite
+    estimate: it is left out of the fit, with NaN beta / se / cov and
+    mu = 0.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    B, n, p = X.shape
+    mask = np.ones((B, n), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    offset = np.zeros((B, n)) if offset is None else np.asarray(offset, dtype=float)
+    y = np.where(mask, y, 0.0)
+    dropped = y.sum(axis=1) == 0
+    mask = mask & ~dropped[:, None]
+    eye = ridge * np.eye(p)
+
+    def solve(alpha, mu, eta, beta):
+        dev_old = np.full(B, np.inf)
+        for it in range(1, max_iter + 1):
+            w = np.where(mask, _working_weights(mu, alpha[:, None]), 0.0)
+            z = eta - offset + (y - mu) / mu
+            xtwx = np.einsum("bnp,bn,bnq->bpq", X, w, X) + eye
+            xtwz = np.einsum("bnp,bn->bp", X, w * z)
+            beta = np.linalg.solve(xtwx, xtwz[..., None])[..., 0]
+
+            eta = np.einsum("bnp,bp->bn", X, beta) + offset
+            mu = np.exp(eta)
+
+            # padded slots are left out of the sum, not given a neutral mu
+            dev = np.where(mask, unit_deviance(y, mu, alpha[:, None]), 0.0).sum(axis=1)
+            if np.all(np.abs(dev - dev_old) <= tol * (np.abs(dev) + 0.1)):
+                break
+            dev_old = dev
+        return beta, eta, mu, xtwx, dev, it
+
+    alpha = np.zeros(B)
+    mu = np.where(mask, y + 0.5, 1.0)
+    eta = np.log(mu)
+    beta, eta, mu, xtwx, dev, n_iter = solve(alpha, mu, eta, None)
+
+    if family == "negbin":
+        for _ in range(max_iter):
+            alpha_new = moment_alpha(y, mu, mask, axis=1)
+            beta, eta, mu, xtwx, dev, it = solve(alpha_new, mu, eta, beta)
+            n_iter += it
+            done = np.all(np.abs(alpha_new - alpha) <= 1e-6 * (alpha + 1e-6))
+            alpha = alpha_new
+            if done:
+                break
+    elif family != "poisson":
+        raise ValueError(f"family must be one of {FAMILIES}, got '{family}'")
+
+    cov = np.linalg.inv(xtwx)
+    se = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    beta[dropped], se[dropped], cov[dropped] = np.nan, np.nan, np.nan
+    mu[dropped] = 0.0
+    return {"beta": beta, "se": se, "cov": cov, "alpha": alpha, "deviance": dev,
+            "mu": mu, "n_iter": n_iter, "dropped": dropped}
+
+
+def stack_panel(df: pd.DataFrame, group_col: str, y_col: str, x_cols,
+                add_intercept: bool = True):
+    """Turn a long panel into padded (B, n, p) / (B, n) arrays for irls_batch."""
+    codes, groups = pd.factorize(df[group_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+
+    counts = np.bincount(codes, minlength=len(groups))
+    pos = np.arange(len(codes)) - np.repeat(np.cumsum(counts) - counts, counts)
+    n = counts.max()
+
+    cols = df[list(x_cols)].to_numpy(dtype=float)[order]
+    if add_intercept:
+        cols = np.column_stack([np.ones(len(cols)), cols])
+
+    X = np.zeros((len(groups), n, cols.shape[1]))
+    y = np.zeros((len(groups), n))
+    mask = np.zeros((len(groups), n), dtype=bool)
+    X[codes, pos] = cols
+    y[codes, pos] = df[y_col].to_numpy(dtype=float)[order]
+    mask[codes, pos] = True
+    return X, y, mask, np.asarray(groups)
+
+
+# ---------- 4. Main ----------
+
+def complete_years(flood: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add zero-count rows for city-years missing from flood_events_yearly.csv.
+    Only years that appear for at least one city are filled, since a year
+    absent for every city means its StormEvents file was not downloaded.
+    """
+    full = pd.MultiIndex.from_product(
+        [sorted(flood["city"].unique()), sorted(flood["YEAR"].unique())],
+        names=["city", "YEAR"],
+    )
+    return (flood.set_index(["city", "YEAR"])
+                 .reindex(full, fill_value=0)
+                 .reset_index())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poisson / NB count models for flood_count.")
+    parser.add_argument("--family", choices=FAMILIES + ("both",), default="both")
+    parser.add_argument("--no-fe", action="store_true", help="drop the city fixed effects")
+    args = parser.parse_args()
+
+    flood = complete_years(load("flood_yearly"))
+    base_year = int(flood["YEAR"].min())
+    flood["year_c"] = flood["YEAR"] - base_year
+
+    families = FAMILIES if args.family == "both" else (args.family,)
+    rows = []
+    for family in families:
+        res = fit_glm(flood, "flood_count", ["year_c"], family=family,
+                      group_col=None if args.no_fe else "city")
+        print(f"\n===== {family} (city FE: {not args.no_fe}) =====")
+        print(res["coef"].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        print(res["fixed_effects"].to_string(float_format=lambda v: f"{v:.4f}"))
+        print(f"alpha={res['alpha']:.4f}  deviance={res['deviance']:.3f}  "
+              f"n={res['n_obs']}  iter={res['n_iter']}  fit={res['fit_ms']:.2f} ms")
+
+        out = res["coef"].copy()
+        out.insert(0, "family", family)
+        out["alpha"] = res["alpha"]
+        out["deviance"] = res["deviance"]
+        rows.append(out)
+
+    # per-city trend models, all cities in one batched IRLS
+    X, y, mask, groups = stack_panel(flood, "city", "flood_count", ["year_c"])
+    t0 = time.perf_counter()
+    batch = irls_batch(X, y, mask=mask, family="poisson")
+    print(f"\nPer-city Poisson trends (batched, {(time.perf_counter() - t0) * 1000:.2f} ms):")
+    for g, (b0, b1), dropped in zip(groups, batch["beta"], batch["dropped"]):
+        if dropped:
+            print(f"  {g:12s} no floods recorded, no trend")
+        else:
+            print(f"  {g:12s} rate ratio per year = {np.exp(b1):.3f}")
+
+    pd.concat(rows, ignore_index=True).to_csv(OUT_CSV, index=False)
+    print("\nSaved:", OUT_CSV)
+
+
+if __name__ == "__main__":
+    main()
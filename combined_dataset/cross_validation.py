@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+cross_validation.py
+-----------------------------------------
+Out-of-sample evaluation for the flood models on the city-year panel
+(flood_events_yearly.csv joined with the city features in
+modeling_dataset.csv).
+
+Two split schemes:
+    city   leave-one-city-out (one fold per city)
+    time   expanding-window time-series split over years
+
+Every (model, hyper-parameters, split, fold) combination is one task on a
+process pool. The panel is written once to .npy files and every worker
+opens them with mmap_mode="r", so the training data is shared read-only
+instead of being pickled into every task. Random forests are grown with
+warm_start: one task fits 50 trees, scores, adds trees up to 100, scores,
+and so on, instead of refitting each forest size from scratch. Gradient
+boosting runs with one OpenMP thread per worker, since the pool already
+uses every core.
+
+Output:
+    cv_results.csv   one row per configuration and split scheme with
+                     pooled out-of-sample R², mean fold MAE / RMSE and
+                     fit / predict wall time
+-----------------------------------------
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import FEATURES, HERE, HistGBRegressor
+
+OUT_CSV = HERE / "cv_results.csv"
+
+PANEL_TARGET = "flood_count"
+PANEL_FEATURES = FEATURES + ["YEAR"]
+
+# forest sizes evaluated inside one warm-started fit
+RF_STAGES = [50, 100, 200]
+
+# model name -> list of hyper-parameter candidates
+CANDIDATES = {
+    "linear_regression": [{}],
+    "ridge": [{"alpha": a} for a in (0.1, 1.0, 10.0)],
+    "random_forest": [
+        {"max_depth": d, "min_samples_leaf": leaf}
+        for d, leaf in itertools.product([None, 4], [1, 3])
+    ],
+    "hist_gradient_boosting": [
+        {"learning_rate": lr, "max_leaf_nodes": leaves}
+        for lr, leaves in itertools.product([0.05, 0.1], [15, 31])
+    ],
+}
+
+
+# ---------- 1. Panel ----------
+
+def build_panel(flood_csv: Path = None, features_csv: Path = None,
+                point_in_time: bool = False, horizon: int = 1) -> pd.DataFrame:
+    """
+    City-year rows: yearly flood counts + static city features, or with
+    point_in_time=True features computed only from data before each year
+    (feature_store.py; rows with a feature not yet observable are dropped).
+    """
+    if point_in_time:
+        from feature_store import training_panel
+        return training_panel(horizon).dropna(subset=FEATURES).reset_index(drop=True)
+
+    flood = load("flood_yearly", path=flood_csv)
+    feats = load("modeling", columns=["city"] + FEATURES, path=features_csv)
+    panel = flood.merge(feats[["city"] + FEATURES], on="city", how="inner")
+    return panel.sort_values(["YEAR", "city"]).reset_index(drop=True)
+
+
+def city_splits(groups: np.ndarray):
+    """Leave-one-city-out folds."""
+    for g in np.unique(groups):
+        test = np.flatnonzero(groups == g)
+        train = np.flatnonzero(groups != g)
+        yield str(g), train, test
+
+
+def time_splits(years: np.ndarray, n_splits: int = 4):
+    """Expanding window: train on all years before each test block."""
+    uniq = np.unique(years)
+    n_splits = min(n_splits, len(uniq) - 1)
+    blocks = np.array_split(uniq, n_splits + 1)
+    # first block is always training-only
+    for block in blocks[1:]:
+        train = np.flatnonzero(years < block[0])
+        test = np.flatnonzero(np.isin(years, block))
+        yield f"{block[0]}-{block[-1]}", train, test
+
+
+# ---------- 2. Worker side ----------
+
+_X = None
+_Y = None
+
+
+def _init_worker(x_path: str, y_path: str):
+    """Open the shared panel arrays read-only in each worker."""
+    global _X, _Y
+    # one OpenMP thread per worker (gradient boosting); the pool is the parallelism
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    _X = np.load(x_path, mmap_mode="r")
+    _Y = np.load(y_path, mmap_mode="r")
+
+
+def _make_estimator(name: str, params: dict):
+    if name == "linear_regression":
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(**params)
+    if name == "ridge":
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), Ridge(**params))
+    if name == "random_forest":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(n_estimators=RF_STAGES[0], warm_start=True,
+                                     random_state=42, n_jobs=1, **params)
+    if name == "hist_gradient_boosting":
+        # point model only; the quantile models do not enter the CV metrics
+        return HistGBRegressor(quantiles=(), **params)
+    raise KeyError(f"Unknown model '{name}'")
+
+
+def _run_task(task):
+    """Fit one fold (all warm-start stages) and return per-stage results."""
+    name, params, scheme, fold, train, test = task
+    X_train, y_train = _X[train], _Y[train]
+    X_test = _X[test]
+
+    est = _make_estimator(name, params)
+    stages = RF_STAGES if name == "random_forest" else [None]
+
+    results = []
+    fit_seconds = 0.0
+    for n_trees in stages:
+        if n_trees is not None:
+            est.set_params(n_estimators=n_trees)
+        t0 = time.perf_counter()
+        est.fit(X_train, y_train)
+        fit_seconds += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        pred = est.predict(X_test)
+        predict_seconds = time.perf_counter() - t0
+
+        results.append({
+            "model": name,
+            "params": repr(params),
+            "n_estimators": n_trees,
+            "scheme": scheme,
+            "fold": fold,
+            "test_idx": test,
+            "pred": pred,
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+        })
+    return results
+
+
+# ---------- 3. Driver ----------
+
+def summarize(fold_results: list, y: np.ndarray) -> pd.DataFrame:
+    """Pool out-of-fold predictions per configuration and compute metrics."""
+    rows = []
+    key = lambda r: (r["model"], r["params"], str(r["n_estimators"]), r["scheme"])
+    for (model, params, n_trees, scheme), grp in itertools.groupby(
+            sorted(fold_results, key=key), key=key):
+        grp = list(grp)
+        idx = np.concatenate([r["test_idx"] for r in grp])
+        pred = np.concatenate([r["pred"] for r in grp])
+        err = pred - y[idx]
+
+        ss_res = float(np.sum(err ** 2))
+        ss_tot = float(np.sum((y[idx] - y[idx].mean()) ** 2))
+        fold_mae = [np.mean(np.abs(r["pred"] - y[r["test_idx"]])) for r in grp]
+        fold_rmse = [np.sqrt(np.mean((r["pred"] - y[r["test_idx"]]) ** 2)) for r in grp]
+
+        rows.append({
+            "model": model,
+            "params": params,
+            "n_estimators": None if n_trees == "None" else int(n_trees),
+            "scheme": scheme,
+            "folds": len(grp),
+            "oos_r2": 1 - ss_res / ss_tot if ss_tot > 0 else np.nan,
+            "mae": float(np.mean(fold_mae)),
+            "rmse": float(np.mean(fold_rmse)),
+            "fit_seconds": float(np.sum([r["fit_seconds"] for r in grp])),
+            "predict_seconds": float(np.sum([r["predict_seconds"] for r in grp])),
+        })
+
+    out = pd.DataFrame(rows)
+    out["n_estimators"] = out["n_estimators"].astype("Int64")
+    return (out
+              .sort_values(["scheme", "oos_r2"], ascending=[True, False])
+              .reset_index(drop=True))
+
+
+def run_cv(panel: pd.DataFrame, schemes=("city", "time"), candidates=CANDIDATES,
+           target: str = PANEL_TARGET, features=PANEL_FEATURES,
+           n_jobs: int = None) -> pd.DataFrame:
+    X = panel[features].to_numpy(dtype=np.float64)
+    y = panel[target].to_numpy(dtype=np.float64)
+
+    splits = []
+    if "city" in schemes:
+        splits += [("city",) + s for s in city_splits(panel["city"].to_numpy())]
+    if "time" in schemes:
+        splits += [("time",) + s for s in time_splits(panel["YEAR"].to_numpy())]
+
+    tasks = [
+        (name, params, scheme, fold, train, test)
+        for name, grid in candidates.items()
+        for params in grid
+        for scheme, fold, train, test in splits
+    ]
+    print(f"Panel: {len(panel)} rows, {len(features)} features | "
+          f"{len(tasks)} tasks ({len(splits)} folds)")
+
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path = os.path.join(tmp, "X.npy")
+        y_path = os.path.join(tmp, "y.npy")
+        np.save(x_path, X)
+        np.save(y_path, y)
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(x_path, y_path)) as pool:
+            fold_results = [r for res in pool.map(_run_task, tasks) for r in res]
+    print(f"Cross-validation wall time: {time.perf_counter() - t0:.2f} s")
+
+    return summarize(fold_results, y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel CV / hyper-parameter search.")
+    parser.add_argument("--scheme", choices=["city", "time", "both"], default="both")
+    parser.add_argument("--target", default=PANEL_TARGET)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--point-in-time", action="store_true",
+                        help="features as of each year (feature_store.py) instead of static ones")
+    parser.add_argument("--horizon", type=int, default=1, help="years ahead, with --point-in-time")
+    args = parser.parse_args()
+
+    schemes = ("city", "time") if args.scheme == "both" else (args.scheme,)
+    panel = build_panel(point_in_time=args.point_in_time, horizon=args.horizon)
+    results = run_cv(panel, schemes, target=args.target, n_jobs=args.jobs)
+
+    pd.set_option("display.width", 160)
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    results.to_csv(OUT_CSV, index=False)
+    print("\nSaved:", OUT_CSV)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+feature_store.py
+-----------------------------------------
+Point-in-time city features keyed by (city, as_of_year).
+
+modeling_dataset.csv has one row per city whose features use every year
+on file: sea level up to the last year, rainfall 2015-2024. Joined to
+flood counts 2010-2024, each training row sees its own future. Here a row
+(city, A) only uses observations dated before January 1 of year A:
+
+  sea level (monthly MSL, sea_level/)
+    sea_level_trend          mean of the OLS trend line fitted to the months
+                             before A (the static feature averages NOAA's
+                             Linear_Trend column, fitted on the full record)
+    sea_level_slope_mm_yr    slope of that line
+    sea_level_recent_mean    mean MSL of years A-11 .. A-1
+    sea_level_max_anomaly    highest monthly MSL before A
+  rainfall (daily PRCP, Meteorological/)
+    rain_daily_mean, rain_daily_max, heavy_rain_threshold (90th pct of the
+    days before A), heavy_rain_days_per_year (mean over the years before A)
+  floods (flood_events_yearly.csv)
+    flood_count_prev (year A-1), flood_mean_prior, flood_years_prior
+  static (exposure_dataset.csv, a single land-cover / census vintage)
+    urban_ratio, densityMi
+
+Every source is reduced once to per-year aggregates (sums, counts, maxima,
+value histograms) and the features of all as-of years come from cumulative
+sums / maxima over those, so adding a year costs one more aggregate row.
+The 90th percentile is exact: it is read off the cumulative histogram of
+the 0.01 mm-rounded daily values.
+
+The table is stored as
+    feature_store/features-v<FEATURE_VERSION>-<sources hash>.parquet (+ .json)
+so a changed input or feature definition gives a new file and old versions
+stay readable. training_panel(horizon=h) pairs features as of A with the
+flood count of year A + h - 1, and forecast_inputs() gives the rows for
+future years.
+
+    python feature_store.py build --as-of 2000-2030
+    python feature_store.py info
+    python feature_store.py panel --horizon 1 --out panel_h1.csv
+-----------------------------------------
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+
+sys.path.insert(0, str(PROJECT_ROOT))  # instrumentation.py, data_access.py
+sys.path.insert(0, str(PROJECT_ROOT / "sea_level"))
+from data_access import dataset_path, file_hash, load  # noqa: E402
+from instrumentation import stage  # noqa: E402
+from compound_events import CITY_FILES, read_rain_daily  # noqa: E402
+from sea_level_features import SEA_LEVEL_FILES  # noqa: E402
+
+STORE_DIR = HERE / "feature_store"
+
+# bump when a feature definition changes
+FEATURE_VERSION = 1
+
+AS_OF = (2010, 2025)
+RECENT_YEARS = 11          # sea_level_recent_mean window, as in sea_level_features.py
+HEAVY_Q = 0.9
+RAIN_RES = 0.01            # histogram resolution of daily rainfall (mm)
+
+KEY = ["city", "as_of_year"]
+
+
+# ---------- 1. Per-year aggregates -> features ----------
+
+def _cum_before(per_year: np.ndarray, years: np.ndarray, as_of: np.ndarray, op=np.cumsum):
+    """
+    Cumulative `op` of per-year rows over years < as_of, one row per as_of.
+    per_year is (n_years, ...) over consecutive `years`; before the first
+    year the result is 0 (sums) or -inf (maxima).
+    """
+    acc = op(per_year, axis=0)
+    pos = np.searchsorted(years, as_of, side="left") - 1          # last year < as_of
+    empty = np.zeros_like(acc[:1]) if op is np.cumsum else np.full_like(acc[:1], -np.inf)
+    return np.concatenate([empty, acc])[pos + 1]
+
+
+def _year_table(years_of_rows, values, first: int, last: int) -> pd.DataFrame:
+    """n / sum / max of `values` per calendar year, reindexed to first..last."""
+    df = pd.DataFrame({"year": years_of_rows, "v": values})
+    g = df.groupby("year")["v"].agg(["count", "sum", "max"])
+    return g.reindex(range(first, last + 1)).fillna({"count": 0, "sum": 0.0, "max": -np.inf})
+
+
+def read_msl(csv_path: Path) -> pd.DataFrame:
+    """Year, Month, msl rows of a NOAA monthly sea-level CSV."""
+    # rows end with a trailing comma; index_col=False keeps Year as the first column
+    df = pd.read_csv(csv_path, skiprows=5, index_col=False)
+    df.columns = df.columns.str.strip()
+    monthly_col = next(c for c in df.columns if "Monthly" in c)
+    df = df[df["Year"].astype(str).str.strip().str.isnumeric()]
+    return pd.DataFrame({"Year": df["Year"].astype(int), "Month": pd.to_numeric(df["Month"]),
+                         "msl": pd.to_numeric(df[monthly_col], errors="coerce")})
+
+
+def sea_level_features(monthly: pd.DataFrame, as_of: np.ndarray) -> pd.DataFrame:
+    """monthly: Year, Month, msl rows of one gauge."""
+    m = monthly.dropna(subset=["msl"])
+    t = m["Year"] + (m["Month"] - 0.5) / 12
+    first, last = int(m["Year"].min()), int(m["Year"].max())
+    years = np.arange(first, last + 1)
+
+    sums = pd.DataFrame({"year": m["Year"], "n": 1.0, "t": t, "y": m["msl"],
+                         "tt": t * t, "ty": t * m["msl"]}).groupby("year").sum()
+    sums = sums.reindex(years, fill_value=0.0).to_numpy()
+    n, st, sy, stt, sty = _cum_before(sums, years, as_of).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sty - st * sy) / (n * stt - st * st)
+        mean = sy / n                  # mean of the OLS fitted values = mean of y
+
+    peak = _cum_before(_year_table(m["Year"], m["msl"], first, last)["max"].to_numpy(),
+                       years, as_of, op=np.maximum.accumulate)
+
+    recent_lo = _cum_before(sums[:, :3], years, as_of - RECENT_YEARS)
+    recent = _cum_before(sums[:, :3], years, as_of) - recent_lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_mean = recent[:, 2] / recent[:, 0]
+
+    return pd.DataFrame({
+        "as_of_year": as_of,
+        "sea_level_trend": mean,
+        "sea_level_slope_mm_yr": slope * 1000,
+        "sea_level_recent_mean": recent_mean,
+        "sea_level_max_anomaly": np.where(np.isfinite(peak), peak, np.nan),
+    })
+
+
+def rain_features(daily: pd.DataFrame, as_of: np.ndarray) -> pd.DataFrame:
+    """daily: day (days since 1970), value (mm) rows of one station."""
+    year = (daily["day"].to_numpy().astype("datetime64[D]").astype("datetime64[Y]")
+            .astype(np.int64) + 1970)
+    code = np.rint(daily["value"].to_numpy() / RAIN_RES).astype(np.int64)
+    first, last = int(year.min()), int(year.max())
+    years = np.arange(first, last + 1)
+    yi = year - first
+
+    # per-year histogram of the rounded values, cumulated over years
+    n_bins = int(code.max()) + 1
+    hist = np.bincount(yi * n_bins + code, minlength=len(years) * n_bins).reshape(len(years), n_bins)
+    tab = _year_table(year, daily["value"].to_numpy(), first, last)
+    count, total = _cum_before(tab[["count", "sum"]].to_numpy(), years, as_of).T
+    peak = _cum_before(tab["max"].to_numpy(), years, as_of, op=np.maximum.accumulate)
+
+    pos = np.searchsorted(years, as_of, side="left")               # years [0, pos) are before A
+    cum_hist = np.cumsum(np.cumsum(hist, axis=0), axis=1)           # [years seen, <= bin]
+    at_or_above = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1]         # [year, >= bin]
+    has_year = hist.sum(axis=1) > 0
+
+    thresh = np.full(len(as_of), np.nan)
+    heavy = np.full(len(as_of), np.nan)
+    for i, p in enumerate(pos):
+        if p == 0 or count[i] == 0:
+            continue
+        cdf = cum_hist[p - 1]
+        h = (count[i] - 1) * HEAVY_Q                                 # pandas "linear" quantile
+        lo = int(np.floor(h))
+        x_lo = np.searchsorted(cdf, lo, side="right")
+        x_hi = np.searchsorted(cdf, min(lo + 1, int(count[i]) - 1), side="right")
+        thresh[i] = (x_lo + (h - lo) * (x_hi - x_lo)) * RAIN_RES
+        t_code = int(np.ceil(thresh[i] / RAIN_RES - 1e-9))
+        seen = has_year[:p]
+        heavy[i] = at_or_above[:p][seen, min(t_code, n_bins - 1)].mean() if t_code < n_bins else 0.0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    return pd.DataFrame({
+        "as_of_year": as_of,
+        "rain_daily_mean": mean,
+        "rain_daily_max": np.where(np.isfinite(peak), peak, np.nan),
+        "heavy_rain_threshold": thresh,
+        "heavy_rain_days_per_year": heavy,
+    })
+
+
+def flood_history(flood: pd.DataFrame, as_of: np.ndarray) -> pd.DataFrame:
+    """flood: YEAR, flood_count rows of one city (missing years are unobserved)."""
+    first, last = int(flood["YEAR"].min()), int(flood["YEAR"].max())
+    years = np.arange(first, last + 1)
+    tab = _year_table(flood["YEAR"], flood["flood_count"].astype(float), first, last)
+    n, total = _cum_before(tab[["count", "sum"]].to_numpy(), years, as_of).T
+    prev = flood.set_index("YEAR")["flood_count"].reindex(as_of - 1).to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+    return pd.DataFrame({"as_of_year": as_of, "flood_count_prev": prev,
+                         "flood_mean_prior": mean, "flood_years_prior": n.astype(int)})
+
+
+# ---------- 2. Build / store ----------
+
+def _sources() -> dict:
+    paths = {"flood_yearly": dataset_path("flood_yearly"), "exposure": dataset_path("exposure")}
+    paths.update({f"sea_level/{c}": p for c, p in SEA_LEVEL_FILES.items()})
+    paths.update({f"rain/{c}": p for c, p in CITY_FILES.items()})
+    return {name: file_hash(p) for name, p in sorted(paths.items())}
+
+
+def _digest(sources: dict, as_of) -> str:
+    text = json.dumps({"sources": sources, "as_of": list(as_of)}, sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+@stage("features.build")
+def build_features(as_of=AS_OF) -> pd.DataFrame:
+    """All (city, as_of_year) rows for as_of_year in [as_of[0], as_of[1]]."""
+    as_of_years = np.arange(as_of[0], as_of[1] + 1)
+    flood = load("flood_yearly")
+    exposure = load("exposure", columns=["city", "urban_ratio", "densityMi"])
+    rain = read_rain_daily()
+
+    parts = []
+    for city in exposure["city"]:
+        frames = [pd.DataFrame({"city": city, "as_of_year": as_of_years})]
+        if city in SEA_LEVEL_FILES:
+            frames.append(sea_level_features(read_msl(SEA_LEVEL_FILES[city]), as_of_years))
+        city_rain = rain[rain["station"] == city]
+        if len(city_rain):
+            frames.append(rain_features(city_rain, as_of_years))
+        city_flood = flood[flood["city"] == city]
+        if len(city_flood):
+            frames.append(flood_history(city_flood, as_of_years))
+        part = frames[0]
+        for f in frames[1:]:
+            part = part.merge(f, on="as_of_year", how="left")
+        parts.append(part)
+
+    out = pd.concat(parts, ignore_index=True).merge(exposure, on="city", how="left")
+    return out.sort_values(KEY).reset_index(drop=True)
+
+
+def store_path(digest: str) -> Path:
+    return STORE_DIR / f"features-v{FEATURE_VERSION}-{digest}.parquet"
+
+
+def materialize(as_of=AS_OF, force: bool = False) -> pd.DataFrame:
+    """The feature table for the current inputs, built and stored on first use."""
+    sources = _sources()
+    path = store_path(_digest(sources, as_of))
+    if path.exists() and not force:
+        return pd.read_parquet(path)
+
+    df = build_features(as_of)
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(path)
+    path.with_suffix(".json").write_text(json.dumps({
+        "version": FEATURE_VERSION,
+        "as_of": list(as_of),
+        "sources": sources,
+        "rows": len(df),
+        "columns": list(df.columns),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }, indent=2), encoding="utf-8")
+    return df
+
+
+def features_as_of(city_years: pd.DataFrame, as_of=AS_OF) -> pd.DataFrame:
+    """Attach point-in-time features to (city, as_of_year) rows."""
+    return city_years.merge(materialize(as_of), on=KEY, how="left")
+
+
+# ---------- 3. Panels ----------
+
+def training_panel(horizon: int = 1, as_of=AS_OF) -> pd.DataFrame:
+    """
+    Rows (city, YEAR) with flood_count of YEAR and features as of
+    YEAR - horizon + 1, i.e. using data up to horizon years before YEAR.
+    """
+    flood = load("flood_yearly")
+    rows = flood.assign(as_of_year=flood["YEAR"] - horizon + 1)
+    rows = rows[rows["as_of_year"].between(*as_of)]
+    panel = features_as_of(rows, as_of)
+    return panel.sort_values(["YEAR", "city"]).reset_index(drop=True)
+
+
+def forecast_inputs(years, horizon: int = 1, as_of=AS_OF) -> pd.DataFrame:
+    """Feature rows for target YEARs (e.g. 2025-2030) of every city."""
+    cities = load("exposure", columns=["city"])["city"]
+    rows = pd.DataFrame([(c, y) for c in cities for y in years], columns=["city", "YEAR"])
+    rows["as_of_year"] = rows["YEAR"] - horizon + 1
+    rows["as_of_year"] = rows["as_of_year"].clip(upper=as_of[1])   # latest features available
+    return features_as_of(rows, as_of)
+
+
+# ---------- 4. CLI ----------
+
+def _year_range(text: str):
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point-in-time (city, as_of_year) feature store.")
+    parser.add_argument("command", choices=["build", "info", "panel"])
+    parser.add_argument("--as-of", type=_year_range, default=AS_OF, help="as-of years, e.g. 2000-2030")
+    parser.add_argument("--horizon", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="rebuild even if stored")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.command == "info":
+        current = store_path(_digest(_sources(), args.as_of))
+        for meta_path in sorted(STORE_DIR.glob("features-v*.json")):
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            mark = "*" if meta_path.with_suffix(".parquet") == current else " "
+            print(f" {mark} {meta_path.stem}  v{meta['version']}  as_of {meta['as_of']}  "
+                  f"{meta['rows']} rows  created {meta['created']}")
+        return
+
+    if args.command == "build":
+        df = materialize(args.as_of, force=args.force)
+        pd.set_option("display.width", 200)
+        print(df.round(4).to_string(index=False, max_rows=40))
+        print("\nStored:", store_path(_digest(_sources(), args.as_of)))
+        return
+
+    panel = training_panel(args.horizon, args.as_of)
+    print(f"{len(panel)} rows, horizon {args.horizon}")
+    print(panel.head(10).round(4).to_string(index=False))
+    if args.out is not None:
+        panel.to_csv(args.out, index=False)
+        print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
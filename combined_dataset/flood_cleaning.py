@@ -1,17 +1,15 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-df = pd.read_csv("data_download/flood_events_2010_2024.csv", low_memory=False)
+import pandas as pd
 
-df = df[df["EVENT_TYPE"].isin(["Flood", "Flash Flood"])]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py, data_access.py
+from data_access import load
+from instrumentation import stage
 
-df["BEGIN_DATE"] = pd.to_datetime(
-    df["BEGIN_YEARMONTH"].astype(str) + df["BEGIN_DAY"].astype(str).str.zfill(2),
-    format="%Y%m%d",
-    errors="coerce"
-)
+HERE = Path(__file__).resolve().parent
+OUT_CSV = HERE / "flood_events_cleaned.csv"
 
-df["YEAR"] = df["BEGIN_DATE"].dt.year
-df["MONTH"] = df["BEGIN_DATE"].dt.month
 
 def parse_damage(x):
     if pd.isna(x):
@@ -23,9 +21,37 @@ def parse_damage(x):
         return float(x[:-1]) * 1_000_000
     return float(x)
 
-df["DAMAGE_PROPERTY_CLEAN"] = df["DAMAGE_PROPERTY"].apply(parse_damage)
 
-df.to_csv("flood_events_cleaned.csv", index=False)
+def clean_flood_events(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep Flood / Flash Flood rows, add BEGIN_DATE, YEAR, MONTH, DAMAGE_PROPERTY_CLEAN."""
+    df = df[df["EVENT_TYPE"].isin(["Flood", "Flash Flood"])].copy()
+
+    df["BEGIN_DATE"] = pd.to_datetime(
+        df["BEGIN_YEARMONTH"].astype(str) + df["BEGIN_DAY"].astype(str).str.zfill(2),
+        format="%Y%m%d",
+        errors="coerce"
+    )
+
+    df["YEAR"] = df["BEGIN_DATE"].dt.year
+    df["MONTH"] = df["BEGIN_DATE"].dt.month
+
+    with stage("flood.clean.parse_damage"):
+        df["DAMAGE_PROPERTY_CLEAN"] = df["DAMAGE_PROPERTY"].apply(parse_damage)
+    return df
+
+
+def main(in_csv=None, out_csv=OUT_CSV):
+    """in_csv defaults to the "storm_events" dataset (data_download/flood_events_2010_2024.csv)."""
+    with stage("flood.clean.read"):
+        df = load("storm_events", path=in_csv)
+
+    df = clean_flood_events(df)
+
+    df.to_csv(out_csv, index=False)
+
+    print(f"Saved → {out_csv}")
+    print("Total rows:", len(df))
+
 
-print("Saved → flood_events_cleaned.csv")
-print("Total rows:", len(df))
+if __name__ == "__main__":
+    main()
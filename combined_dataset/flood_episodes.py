@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+flood_episodes.py
+-----------------------------------------
+Episode-level flood records from the cleaned StormEvents rows.
+
+NOAA files one row per forecast zone / county, so one storm episode over
+Miami-Dade, Broward and Monroe is three or more rows, and flood_count in
+flood_events_yearly.csv counts all of them. merge_episodes() collapses them:
+
+  1. rows are keyed by (EPISODE_ID, region), region = city of CITY_MAP
+     (flood_preprocess.py) or the STATE outside the three cities; a row
+     without an EPISODE_ID is its own episode
+  2. within a key, rows are sorted by begin time and merged while they
+     overlap: a row starts a new record when it begins after the running
+     maximum end of the rows before it (plus --gap-hours)
+  3. each merged record gets begin / end, duration, number of rows and
+     zones, the extent of the begin points, and the summed damage
+
+Step 2 is a single lexsort and one running maximum over all rows (times are
+offset per key so the maximum never crosses keys), with no pairwise
+comparisons, so national tables take seconds.
+
+Output:
+    combined_dataset/flood_episodes.csv
+    flood_preprocess.py --unit episodes counts these instead of rows
+
+    python flood_episodes.py --gap-hours 6
+    python flood_episodes.py --smoke     # merge_intervals vs a pairwise union-find
+-----------------------------------------
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(HERE.parent))  # project root: instrumentation.py, data_access.py
+from data_access import load  # noqa: E402
+from instrumentation import stage  # noqa: E402
+
+OUT_CSV = HERE / "flood_episodes.csv"
+
+EPISODE_COLS = ["EPISODE_ID", "EVENT_ID", "EVENT_TYPE", "STATE", "CZ_NAME",
+                "BEGIN_YEARMONTH", "BEGIN_DAY", "BEGIN_TIME",
+                "END_YEARMONTH", "END_DAY", "END_TIME",
+                "DAMAGE_PROPERTY_CLEAN", "BEGIN_LAT", "BEGIN_LON"]
+
+
+# ---------- 1. Times ----------
+
+def _minutes(yearmonth, day, hhmm) -> np.ndarray:
+    """StormEvents YYYYMM / DD / HHMM columns -> minutes since 1970 (int64; -1 if invalid)."""
+    ym = pd.to_numeric(yearmonth, errors="coerce")
+    stamp = pd.to_datetime(pd.DataFrame({"year": ym // 100, "month": ym % 100,
+                                         "day": pd.to_numeric(day, errors="coerce")}),
+                           errors="coerce")
+    hhmm = pd.to_numeric(hhmm, errors="coerce").fillna(0).to_numpy()
+    days = stamp.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    minutes = days * 1440 + (hhmm // 100) * 60 + hhmm % 100
+    return np.where(stamp.isna().to_numpy(), -1, minutes).astype(np.int64)
+
+
+def event_times(df: pd.DataFrame):
+    """(begin, end) in minutes; a missing or earlier end is the begin."""
+    begin = _minutes(df["BEGIN_YEARMONTH"], df["BEGIN_DAY"], df["BEGIN_TIME"])
+    end = _minutes(df["END_YEARMONTH"], df["END_DAY"], df["END_TIME"])
+    return begin, np.maximum(end, begin)
+
+
+# ---------- 2. Interval merging ----------
+
+def merge_intervals(key: np.ndarray, begin: np.ndarray, end: np.ndarray, gap: int = 0) -> np.ndarray:
+    """
+    Cluster id per row: rows with the same key whose [begin, end] intervals
+    overlap (or are at most `gap` apart), chained, share an id.
+    """
+    n = len(key)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((begin, key))
+    k, b, e = key[order], begin[order], end[order]
+
+    # offset each key past the previous one so one running max serves all keys
+    first = np.r_[True, k[1:] != k[:-1]]
+    rank = np.cumsum(first) - 1
+    span = int(e.max() - b.min()) + gap + 1
+    shift = rank * span - b.min()
+    running = np.maximum.accumulate(e + shift)
+
+    new = first.copy()
+    new[1:] |= (b[1:] + shift[1:]) > running[:-1] + gap
+    cluster = np.empty(n, dtype=np.int64)
+    cluster[order] = np.cumsum(new) - 1
+    return cluster
+
+
+def _merge_pairwise(key, begin, end, gap: int = 0) -> np.ndarray:
+    """Reference for merge_intervals: union-find over every overlapping pair."""
+    parent = list(range(len(key)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(key)):
+        for j in range(i + 1, len(key)):
+            if key[i] == key[j] and begin[j] <= end[i] + gap and begin[i] <= end[j] + gap:
+                parent[find(i)] = find(j)
+    return np.array([find(i) for i in range(len(key))], dtype=np.int64)
+
+
+def _same_partition(a: np.ndarray, b: np.ndarray) -> bool:
+    """True if the two labelings group the rows identically (a one-to-one label map)."""
+    pairs = len(set(zip(a.tolist(), b.tolist())))
+    return pairs == len(set(a.tolist())) == len(set(b.tolist()))
+
+
+def smoke_test(n_cases: int = 300, seed: int = 0):
+    """merge_intervals against the pairwise union-find on random small tables."""
+    rng = np.random.default_rng(seed)
+    for case in range(n_cases):
+        n = int(rng.integers(0, 40))
+        key = rng.integers(0, 4, n)
+        begin = rng.integers(0, 200, n)
+        end = begin + rng.integers(0, 30, n)
+        gap = int(rng.choice([0, 0, 5]))
+        got = merge_intervals(key, begin, end, gap)
+        want = _merge_pairwise(key, begin, end, gap)
+        if not _same_partition(got, want):
+            raise AssertionError(f"case {case}: merge_intervals differs from union-find "
+                                 f"(key={key.tolist()}, begin={begin.tolist()}, end={end.tolist()}, gap={gap})")
+    print(f"smoke test passed: {n_cases} random cases match the pairwise union-find")
+
+
+# ---------- 3. Episodes ----------
+
+@stage("flood.episodes")
+def merge_episodes(df: pd.DataFrame, gap_hours: float = 0) -> pd.DataFrame:
+    """Cleaned StormEvents rows -> one row per merged (episode, region) interval."""
+    from flood_preprocess import CITY_MAP
+
+    df = df.reset_index(drop=True)
+    city = df["CZ_NAME"].astype(str).str.upper().str.strip().map(CITY_MAP)
+    region = city.fillna(df["STATE"].astype(str).str.lower())
+    begin, end = event_times(df)
+    valid = begin >= 0
+
+    episode = pd.to_numeric(df["EPISODE_ID"], errors="coerce")
+    episode = episode.fillna(-pd.to_numeric(df["EVENT_ID"], errors="coerce"))
+    key = pd.MultiIndex.from_arrays([episode, region]).factorize()[0]
+
+    df, begin, end, key, region = df[valid], begin[valid], end[valid], key[valid], region[valid]
+    cluster = merge_intervals(key, begin, end, gap=int(round(gap_hours * 60)))
+
+    def column(name, fill):
+        if name not in df:
+            return np.full(len(df), fill)
+        return pd.to_numeric(df[name], errors="coerce").fillna(fill).to_numpy()
+
+    rows = pd.DataFrame({
+        "cluster": cluster,
+        "EPISODE_ID": pd.to_numeric(df["EPISODE_ID"], errors="coerce").to_numpy(),
+        "region": region.to_numpy(),
+        "state": df["STATE"].astype(str).to_numpy(),
+        "begin": begin, "end": end,
+        "zone": df["CZ_NAME"].astype(str).to_numpy(),
+        "flash": (df["EVENT_TYPE"].astype(str) == "Flash Flood").to_numpy(),
+        "damage": column("DAMAGE_PROPERTY_CLEAN", 0.0),
+        "lat": column("BEGIN_LAT", np.nan),
+        "lon": column("BEGIN_LON", np.nan),
+    })
+    ep = rows.groupby("cluster", sort=True).agg(
+        EPISODE_ID=("EPISODE_ID", "first"), region=("region", "first"), state=("state", "first"),
+        begin=("begin", "min"), end=("end", "max"),
+        n_events=("zone", "size"), n_zones=("zone", "nunique"), n_flash=("flash", "sum"),
+        damage_property=("damage", "sum"),
+        lat_min=("lat", "min"), lat_max=("lat", "max"), lon_min=("lon", "min"), lon_max=("lon", "max"),
+    )
+
+    begin_ts = pd.to_datetime(ep["begin"].to_numpy() * 60, unit="s")
+    out = pd.DataFrame({
+        "EPISODE_ID": ep["EPISODE_ID"].astype("Int64").to_numpy(),
+        "region": ep["region"].to_numpy(),
+        "state": ep["state"].to_numpy(),
+        "YEAR": begin_ts.year,
+        "begin": begin_ts,
+        "end": pd.to_datetime(ep["end"].to_numpy() * 60, unit="s"),
+        "duration_h": (ep["end"] - ep["begin"]).to_numpy() / 60,
+        "n_events": ep["n_events"].to_numpy(),
+        "n_zones": ep["n_zones"].to_numpy(),
+        "n_flash_flood": ep["n_flash"].to_numpy(),
+        # diagonal of the begin-point bounding box (equirectangular)
+        "extent_km": 111.2 * np.hypot(ep["lat_max"] - ep["lat_min"],
+                                      (ep["lon_max"] - ep["lon_min"])
+                                      * np.cos(np.radians((ep["lat_max"] + ep["lat_min"]) / 2))).to_numpy(),
+        "damage_property": ep["damage_property"].to_numpy(),
+    })
+    return out.sort_values(["region", "begin"], kind="stable").reset_index(drop=True)
+
+
+def episode_counts(episodes: pd.DataFrame, cities=None) -> pd.DataFrame:
+    """Episodes -> flood_count per city and YEAR (same layout as flood_events_yearly.csv)."""
+    if cities is None:
+        from flood_preprocess import CITY_MAP
+        cities = set(CITY_MAP.values())
+    ep = episodes[episodes["region"].isin(cities)]
+    return (
+        ep.groupby(["region", "YEAR"])
+          .size()
+          .reset_index(name="flood_count")
+          .rename(columns={"region": "city"})
+          .sort_values(["city", "YEAR"])
+    )
+
+
+def load_flood_rows(path=None) -> pd.DataFrame:
+    """Cleaned rows with the columns merge_episodes needs, flood types only."""
+    df = load("storm_events_cleaned", columns=EPISODE_COLS, path=path)
+    return df[df["EVENT_TYPE"].astype(str).str.contains("Flood", case=False, na=False)]
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge zone-level StormEvents rows into flood episodes.")
+    parser.add_argument("--in-csv", type=Path, default=None, help="cleaned events (default: storm_events_cleaned)")
+    parser.add_argument("--gap-hours", type=float, default=0, help="merge rows at most this far apart")
+    parser.add_argument("--out", type=Path, default=OUT_CSV)
+    parser.add_argument("--smoke", action="store_true",
+                        help="only check merge_intervals against a pairwise union-find")
+    args = parser.parse_args()
+
+    if args.smoke:
+        smoke_test()
+        return
+
+    df = load_flood_rows(args.in_csv)
+    episodes = merge_episodes(df, gap_hours=args.gap_hours)
+    episodes.to_csv(args.out, index=False)
+
+    print(f"{len(df)} rows -> {len(episodes)} episodes "
+          f"({len(df) / max(len(episodes), 1):.2f} rows per episode)")
+    print(episode_counts(episodes).pivot(index="YEAR", columns="city", values="flood_count")
+          .fillna(0).astype(int).to_string())
+    print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
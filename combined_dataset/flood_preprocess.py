@@ -1,45 +1,72 @@
+import argparse
+import sys
+from pathlib import Path
+
 import pandas as pd
 
-def load_and_process_flood_data(
-        path="combined_dataset/flood_events_cleaned.csv"):
-    df = pd.read_csv(path)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py, data_access.py
+from data_access import load
+from instrumentation import stage
 
-    df = df[df["EVENT_TYPE"].str.contains("Flood", case=False, na=False)]
-    df["YEAR"] = df["YEAR"].astype(int)
+HERE = Path(__file__).resolve().parent
 
-    df["CZ_NAME_CLEAN"] = df["CZ_NAME"].str.upper().str.strip()
+CITY_MAP = {
+    "ORLEANS": "new_orleans",
+    "NEW ORLEANS": "new_orleans",
+    "JEFFERSON": "new_orleans",
+    "ST. BERNARD": "new_orleans",
+    "PLAQUEMINES": "new_orleans",
+
+    "MIAMI-DADE": "miami",
+    "MIAMI DADE": "miami",
+    "MIAMI": "miami",
+    "BROWARD": "miami",
+    "MONROE": "miami",
+
+    "NORFOLK (C)": "norfolk",
+}
 
-    CITY_MAP = {
-        "ORLEANS": "new_orleans",
-        "NEW ORLEANS": "new_orleans",
-        "JEFFERSON": "new_orleans",
-        "ST. BERNARD": "new_orleans",
-        "PLAQUEMINES": "new_orleans",
 
-        "MIAMI-DADE": "miami",
-        "MIAMI DADE": "miami",
-        "MIAMI": "miami",
-        "BROWARD": "miami",
-        "MONROE": "miami",
+def process_flood_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Cleaned StormEvents rows -> flood_count per city and YEAR."""
+    df = df[df["EVENT_TYPE"].str.contains("Flood", case=False, na=False)].copy()
+    df["YEAR"] = df["YEAR"].astype(int)
 
-        "NORFOLK (C)": "norfolk",
-    }
+    df["CZ_NAME_CLEAN"] = df["CZ_NAME"].str.upper().str.strip()
 
     df["city"] = df["CZ_NAME_CLEAN"].map(CITY_MAP)
     df = df[df["city"].notna()]
 
-    flood_summary = (
+    return (
         df.groupby(["city", "YEAR"])
           .size()
           .reset_index(name="flood_count")
           .sort_values(["city", "YEAR"])
     )
 
-    out_path = "combined_dataset/flood_events_yearly.csv"
+
+@stage("flood.preprocess")
+def load_and_process_flood_data(path=None, out_path=HERE / "flood_events_yearly.csv", unit="events"):
+    """unit="episodes" counts merged storm episodes (flood_episodes.py) instead of rows."""
+    if unit == "episodes":
+        from flood_episodes import episode_counts, load_flood_rows, merge_episodes
+
+        flood_summary = episode_counts(merge_episodes(load_flood_rows(path)))
+    else:
+        df = load("storm_events_cleaned", columns=["EVENT_TYPE", "YEAR", "CZ_NAME"], path=path)
+        flood_summary = process_flood_data(df)
+
     flood_summary.to_csv(out_path, index=False)
 
     print("Saved:", out_path)
     print(flood_summary.head(20))
 
 if __name__ == "__main__":
-    load_and_process_flood_data()
+    parser = argparse.ArgumentParser(description="Yearly flood counts per city.")
+    parser.add_argument("--unit", choices=["events", "episodes"], default="events",
+                        help="count StormEvents rows or merged episodes")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="default: flood_events_yearly.csv / flood_episodes_yearly.csv")
+    args = parser.parse_args()
+    out = args.out or HERE / ("flood_events_yearly.csv" if args.unit == "events" else "flood_episodes_yearly.csv")
+    load_and_process_flood_data(out_path=out, unit=args.unit)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+forest_compiler.py
+-----------------------------------------
+Flat-array form of a fitted RandomForestRegressor for fast loading.
+
+Loading the joblib pickle rebuilds 200 Tree objects, and predict() calls
+each tree once. compile_forest() lays all trees out end to end in flat
+arrays instead:
+
+    feature.npy       split feature per node (-1 on leaves)
+    threshold.npy     split threshold (float32, see below)
+    children.npy      (nodes, 2) global index of the left / right child
+    missing_left.npy  NaN goes to the left child
+    value.npy         node mean (float64; read on the leaves)
+    roots.npy         root node of every tree
+    forest.json       features, tree count, depth, source model
+
+The directory is opened with np.load(mmap_mode="r"), so loading only maps
+the files. CompiledForest.predict() works on a block of rows at a time:
+
+  1. the root split of every tree is one column gather and a broadcast
+     compare over (trees x rows)
+  2. below the root all (tree, row) pairs advance one level per step.
+     `x <= threshold` goes left, NaN follows missing_left. Pairs that
+     reached a leaf are dropped from the working set once they are a
+     sizeable share, so deep, unbalanced trees do not pay for their
+     longest branch on every row.
+  3. the leaf values are added tree by tree in forest order and the sum is
+     divided by the tree count
+
+The arithmetic is the same as sklearn's. sklearn casts the rows to float32
+and compares them with float64 thresholds. Each threshold is stored as the
+largest float32 <= the sklearn threshold, which gives the same result for
+every float32 x, and the trees are summed in the same order. The
+predictions are therefore bit-identical, and compile_and_save() checks
+this before writing.
+
+The gain is load time, not prediction speed. On one core, predict() runs
+about as fast as sklearn, e.g. 1M rows through the project forest:
+sklearn 2.8-2.9 s, compiled 2.4-3.0 s; 200k rows through a deep forest
+with NaN: 1.5 s vs 1.9 s. A pointer-free complete-tree layout was tried
+and was no faster. predict(n_threads=k) spreads the blocks over k threads
+(NumPy releases the GIL inside take() and comparisons). This has not
+been measured on more than one core, so the default is one thread.
+
+    python forest_compiler.py                          # random_forest_model.pkl -> random_forest_model.forest/
+    python forest_compiler.py --model random_forest    # registered model -> model_registry/random_forest.forest/
+    python forest_compiler.py --bench 1000000          # compare with sklearn on random rows
+
+score_models.py --compiled and scenario_api.py --compiled load the
+compiled form of a registered forest (compiled on first use) instead of
+unpickling it: a faster start, the same predictions and throughput.
+-----------------------------------------
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(HERE.parent))  # project root: instrumentation.py, data_access.py
+from instrumentation import stage  # noqa: E402
+
+PICKLE_PATH = HERE / "random_forest_model.pkl"
+
+ARRAYS = ("feature", "threshold", "children", "missing_left", "value", "roots")
+
+# (tree, row) pairs per block: the working arrays stay in cache
+BLOCK_PAIRS = 1 << 18
+
+# drop finished pairs once they are this share of the working set
+COMPACT_SHARE = 0.3
+
+
+# ---------- 1. Compiled forest ----------
+
+class CompiledForest:
+    """All trees of a regression forest as flat node arrays."""
+
+    def __init__(self, arrays: dict, info: dict):
+        for name in ARRAYS:
+            # plain ndarray views (still file-backed when memory-mapped)
+            setattr(self, name, np.asarray(arrays[name]))
+        self.info = info
+        self.features = info["features"]
+        self.n_trees = len(self.roots)
+        self.max_depth = info["max_depth"]
+
+        root_feature = self.feature[self.roots]
+        self._root_leaf = root_feature < 0
+        self._root_feature = np.where(self._root_leaf, 0, root_feature)
+        self._root_threshold = self.threshold[self.roots][:, None]
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode="r"):
+        path = Path(path)
+        info = json.loads((path / "forest.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(arrays, info)
+
+    def save(self, path: Path):
+        """Write the arrays next to each other; the directory is replaced as a whole."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in ARRAYS:
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        (tmp / "forest.json").write_text(json.dumps(self.info, indent=2), encoding="utf-8")
+        shutil.rmtree(path, ignore_errors=True)
+        tmp.replace(path)
+        return path
+
+    def _matrix(self, X) -> np.ndarray:
+        if hasattr(X, "columns") and self.features is not None:
+            X = X[self.features]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.info["n_features"]:
+            raise ValueError(f"Expected {self.info['n_features']} feature columns, got {X.shape}")
+        return X
+
+    def _go_right(self, x, threshold, node, has_nan: bool):
+        go = x > threshold
+        if has_nan:
+            nan = np.isnan(x)
+            go[nan] = ~self.missing_left.take(node[nan])
+        return go
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """(trees, rows) leaf index of every row of a float32 block in every tree."""
+        n, f = X.shape
+        has_nan = bool(np.isnan(X).any())
+        children = self.children.ravel()
+
+        # 1. root level: one (trees x rows) gather of the root features
+        roots = np.repeat(self.roots[:, None], n, axis=1)
+        go = self._go_right(X.T.take(self._root_feature, axis=0), self._root_threshold,
+                            roots, has_nan)
+        go[self._root_leaf] = False
+        node = children.take(2 * roots + go).ravel()
+
+        # 2. one level per step over the unfinished pairs
+        offset = np.tile(np.arange(n, dtype=node.dtype) * f, self.n_trees)
+        flat = X.ravel()
+        pos = None        # positions of the working pairs in `done`
+        done = node
+        while True:
+            feature = self.feature.take(node)
+            at_leaf = feature < 0
+            n_leaf = int(np.count_nonzero(at_leaf))
+            if n_leaf == len(node):
+                break
+            if n_leaf > COMPACT_SHARE * len(node):
+                keep = np.flatnonzero(~at_leaf)
+                if pos is None:
+                    done, pos = node.copy(), keep
+                else:
+                    done[pos] = node
+                    pos = pos.take(keep)
+                node, offset, feature = node.take(keep), offset.take(keep), feature.take(keep)
+            elif n_leaf:
+                feature[at_leaf] = 0     # leaves point to themselves; any column will do
+            feature += offset
+            go = self._go_right(flat.take(feature), self.threshold.take(node), node, has_nan)
+            node <<= 1
+            node += go
+            node = children.take(node)
+        if pos is None:
+            done = node
+        else:
+            done[pos] = node
+        return done.reshape(self.n_trees, n)
+
+    def _predict_block(self, X: np.ndarray, out: np.ndarray):
+        leaf_values = self.value.take(self.apply(X))
+        # tree by tree, in order, like RandomForestRegressor.predict
+        for t in range(self.n_trees):
+            out += leaf_values[t]
+        out /= self.n_trees
+
+    def predict(self, X, n_threads: int = 1) -> np.ndarray:
+        X = self._matrix(X)
+        out = np.zeros(len(X), dtype=np.float64)
+        block = max(1, BLOCK_PAIRS // self.n_trees)
+        starts = range(0, len(X), block)
+        n_threads = min(n_threads or os.cpu_count() or 1, len(starts))
+        if n_threads <= 1:
+            for s in starts:
+                self._predict_block(X[s:s + block], out[s:s + block])
+        else:
+            with ThreadPoolExecutor(n_threads) as pool:
+                list(pool.map(lambda s: self._predict_block(X[s:s + block], out[s:s + block]), starts))
+        return out
+
+
+def _float32_floor(a: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each value: for float32 x, x <= a  <=>  x <= result."""
+    a32 = a.astype(np.float32)
+    up = a32.astype(np.float64) > a
+    a32[up] = np.nextafter(a32[up], np.float32(-np.inf))
+    return a32
+
+
+def compile_forest(forest, features=None, source: str = None) -> CompiledForest:
+    """Fitted single-output RandomForestRegressor -> CompiledForest."""
+    import sklearn
+
+    if getattr(forest, "n_outputs_", 1) != 1 or not hasattr(forest, "estimators_"):
+        raise ValueError(f"Only fitted single-output regression forests can be compiled, "
+                         f"got {type(forest).__name__}")
+    if features is None and hasattr(forest, "feature_names_in_"):
+        features = [str(c) for c in forest.feature_names_in_]
+
+    trees = [est.tree_ for est in forest.estimators_]
+    sizes = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots = np.r_[0, np.cumsum(sizes)[:-1]].astype(np.int64)
+    total = int(sizes.sum())
+    # 2 * node + 1 indexes `children`
+    index_dtype = np.int32 if 2 * total < np.iinfo(np.int32).max else np.int64
+
+    feature, threshold, children, missing_left, value = [], [], [], [], []
+    for root, t in zip(roots, trees):
+        own = np.arange(t.node_count, dtype=np.int64)
+        leaf = t.children_left < 0
+        feature.append(np.where(leaf, -1, t.feature))
+        threshold.append(np.where(leaf, np.inf, t.threshold))
+        # a leaf points to itself on both sides
+        children.append(np.column_stack([np.where(leaf, own, t.children_left),
+                                         np.where(leaf, own, t.children_right)]) + root)
+        missing = getattr(t, "missing_go_to_left", None)
+        missing_left.append(np.zeros(t.node_count, dtype=bool) if missing is None
+                            else np.asarray(missing, dtype=bool))
+        value.append(t.value[:, 0, 0].astype(np.float64))
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(index_dtype),
+        "threshold": _float32_floor(np.concatenate(threshold)),
+        "children": np.concatenate(children).astype(index_dtype),
+        "missing_left": np.concatenate(missing_left),
+        "value": np.concatenate(value),
+        "roots": roots.astype(index_dtype),
+    }
+    info = {
+        "n_trees": len(trees),
+        "n_nodes": total,
+        "n_features": int(forest.n_features_in_),
+        "features": list(features) if features is not None else None,
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "source": source,
+        "sklearn_version": sklearn.__version__,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return CompiledForest(arrays, info)
+
+
+# ---------- 2. Verification ----------
+
+def random_rows(forest: CompiledForest, n: int, seed: int = 0, nan_share: float = 0.0) -> np.ndarray:
+    """Rows drawn around the split thresholds of every feature, so all branches get exercised."""
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, forest.info["n_features"]), dtype=np.float64)
+    for j in range(X.shape[1]):
+        thr = forest.threshold[forest.feature == j].astype(np.float64)
+        thr = thr[np.isfinite(thr)]   # inf: a split that only separates NaN
+        if len(thr) == 0:
+            X[:, j] = rng.standard_normal(n)
+            continue
+        lo, hi = thr.min(), thr.max()
+        pad = (hi - lo) * 0.1 + 1e-9
+        X[:, j] = rng.uniform(lo - pad, hi + pad, n)
+        # some rows exactly on a threshold, where the <= comparison decides
+        on = rng.random(n) < 0.3
+        X[on, j] = rng.choice(thr, int(on.sum()))
+    if nan_share:
+        X[rng.random(X.shape) < nan_share] = np.nan
+    return X
+
+
+def verify(compiled: CompiledForest, forest, X) -> float:
+    """Max |difference| to sklearn; raises unless the predictions are identical."""
+    import pandas as pd
+
+    if compiled.features is not None:
+        X = pd.DataFrame(np.asarray(X), columns=compiled.features)
+    ref = forest.predict(X)
+    got = compiled.predict(X)
+    diff = float(np.max(np.abs(ref - got))) if len(ref) else 0.0
+    if not np.array_equal(ref, got):
+        raise AssertionError(f"Compiled forest differs from sklearn (max |diff| {diff:g})")
+    return diff
+
+
+@stage("forest.compile")
+def compile_and_save(forest, out_dir: Path, features=None, source: str = None,
+                     check_rows: int = 10_000) -> CompiledForest:
+    """Compile, check against sklearn on random rows (also with NaN if the forest routes it), save."""
+    compiled = compile_forest(forest, features, source)
+    verify(compiled, forest, random_rows(compiled, check_rows))
+    if compiled.missing_left.any():
+        verify(compiled, forest, random_rows(compiled, check_rows, seed=1, nan_share=0.05))
+    compiled.save(out_dir)
+    return CompiledForest.load(out_dir)
+
+
+# ---------- 3. Registry ----------
+
+def compiled_path(name: str) -> Path:
+    from model_registry import REGISTRY_DIR
+    return REGISTRY_DIR / f"{name}.forest"
+
+
+def load_compiled(name: str = "random_forest", df=None):
+    """
+    (CompiledForest, meta) for a registered forest, without unpickling it
+    when the compiled copy is current. With `df`, the model is retrained
+    first if it was fit on other data (as get_model does). The forest is
+    compiled on first use and again after every refit.
+    """
+    from model_registry import data_hash, get_model, load_model, meta_path
+
+    model = None
+    meta = (json.loads(meta_path(name).read_text(encoding="utf-8"))
+            if meta_path(name).exists() else None)
+    if meta is None or (df is not None
+                        and meta["data_hash"] != data_hash(df, meta["features"], meta["target"])):
+        model, meta = get_model(name, df)
+
+    source = f"{name}:{meta['data_hash']}:{meta['created']}"
+    path = compiled_path(name)
+    if (path / "forest.json").exists():
+        compiled = CompiledForest.load(path)
+        if compiled.info.get("source") == source:
+            return compiled, meta
+    if model is None:
+        model, meta = load_model(name)
+    print(f"Compiling '{name}' -> {path}", file=sys.stderr)
+    return compile_and_save(model, path, meta["features"], source), meta
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a random forest into flat, memory-mappable arrays.")
+    parser.add_argument("--model", default=None,
+                        help="registered model name (default: random_forest_model.pkl)")
+    parser.add_argument("--pkl", type=Path, default=PICKLE_PATH)
+    parser.add_argument("--out", type=Path, default=None,
+                        help="output directory (default: <pkl stem>.forest or model_registry/<name>.forest)")
+    parser.add_argument("--bench", type=int, default=0, metavar="ROWS",
+                        help="time sklearn vs compiled prediction on this many random rows")
+    parser.add_argument("--threads", type=int, default=1, help="threads for --bench (0: all cores)")
+    args = parser.parse_args()
+
+    import joblib
+
+    t0 = time.perf_counter()
+    if args.model is not None:
+        from model_registry import load_model
+
+        forest, meta = load_model(args.model)
+        source = f"{args.model}:{meta['data_hash']}:{meta['created']}"
+        features = meta["features"]
+        out = args.out or compiled_path(args.model)
+    else:
+        forest = joblib.load(args.pkl)
+        source, features = args.pkl.name, None
+        out = args.out or args.pkl.with_suffix(".forest")
+    pickle_s = time.perf_counter() - t0
+
+    compiled = compile_and_save(forest, out, features, source)
+    size = sum(p.stat().st_size for p in Path(out).iterdir())
+    print(f"{compiled.n_trees} trees, {compiled.info['n_nodes']} nodes, depth {compiled.max_depth} "
+          f"-> {out} ({size / 1e6:.2f} MB)")
+
+    t0 = time.perf_counter()
+    CompiledForest.load(out)
+    print(f"Load: pickle {pickle_s * 1000:.1f} ms, compiled {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    if args.bench:
+        import pandas as pd
+
+        X = random_rows(compiled, args.bench, seed=2)
+        frame = pd.DataFrame(X, columns=compiled.features) if compiled.features else X
+        t0 = time.perf_counter()
+        ref = forest.predict(frame)
+        sk_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = compiled.predict(X, n_threads=args.threads)
+        fl_s = time.perf_counter() - t0
+        print(f"Predict {args.bench} rows: sklearn {sk_s:.2f} s, compiled {fl_s:.2f} s "
+              f"({args.bench / fl_s:,.0f} rows/s), identical: {np.array_equal(ref, got)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,44 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.linear_model import LinearRegression
 import numpy as np
 
-df = pd.read_csv("combined_dataset/flood_events_yearly.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from forecast_engine import forecast
+
+HERE = Path(__file__).resolve().parent
+OUT_PATH = HERE / "future_flood_forecast.png"
+
 
-plt.figure(figsize=(10,6))
+def plot_future_forecast(df, out_path=OUT_PATH):
+    fig = plt.figure(figsize=(10,6))
 
-cities = df["city"].unique()
+    # Predict until 2030, all cities in one vectorized fit
+    future_years = np.arange(2010, 2031)
+    fc = forecast(df, future_years, method="linear")
 
-for city in cities:
-    temp = df[df["city"] == city].copy()
-    X = temp["YEAR"].values.reshape(-1, 1)
-    y = temp["flood_count"].values
+    for city, temp in fc.groupby("location", sort=False):
+        actual = temp.dropna(subset=["observed"])
 
-    model = LinearRegression()
-    model.fit(X, y)
+        # Plot actual data
+        plt.plot(actual["YEAR"], actual["observed"], "o-", label=f"{city} (actual)")
 
-    # Predict until 2030
-    future_years = np.arange(2010, 2031).reshape(-1, 1)
-    future_pred = model.predict(future_years)
+        # Plot forecast
+        plt.plot(temp["YEAR"], temp["forecast"], "--", label=f"{city} (forecast)")
 
-    # Plot actual data
-    plt.plot(temp["YEAR"], temp["flood_count"], "o-", label=f"{city} (actual)")
+    plt.title("Flood Events Forecast (2010–2030)")
+    plt.xlabel("Year")
+    plt.ylabel("Flood Count")
+    plt.legend()
+    plt.tight_layout()
 
-    # Plot forecast
-    plt.plot(future_years, future_pred, "--", label=f"{city} (forecast)")
+    plt.savefig(out_path, dpi=300)
+    plt.close(fig)
+    print("Saved:", out_path)
 
-plt.title("Flood Events Forecast (2010–2030)")
-plt.xlabel("Year")
-plt.ylabel("Flood Count")
-plt.legend()
-plt.tight_layout()
 
-plt.savefig("combined_dataset/future_flood_forecast.png", dpi=300)
-print("Saved: combined_dataset/future_flood_forecast.png")
+if __name__ == "__main__":
+    plot_future_forecast(load("flood_yearly"))
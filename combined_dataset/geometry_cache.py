@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+geometry_cache.py
+-----------------------------------------
+Pre-processed region geometries for choropleths.
+
+The raw GeoJSON of a source (states, counties) is read ONCE, reduced to a
+few columns (region_id, name, ...), names normalized, and written as
+GeoParquet at several zoom levels:
+
+    geometry_cache/<source>_full.parquet     original vertices
+    geometry_cache/<source>_z<zoom>.parquet  simplified for web-mercator zoom
+
+The tolerance of a zoom level is one 256-px tile pixel in degrees,
+360 / (256 * 2**zoom). Simplification is coverage-aware (shared borders
+between neighbouring regions are simplified once, so no gaps or slivers)
+when GEOS >= 3.12 is available, otherwise per-polygon
+simplify(preserve_topology=True).
+
+load_regions(...) reads a level from the cache (rebuilt automatically when
+the source file changes) and keeps it in memory, so later subsets in the
+same process are a plain isin() filter.
+
+    python geometry_cache.py build --source states
+    python geometry_cache.py info
+-----------------------------------------
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CACHE_DIR = HERE / "geometry_cache"
+
+ZOOM_LEVELS = (4, 6, 8, 10)
+
+# source -> raw file, download url, {cache column: raw column}, id builder
+SOURCES = {
+    "states": {
+        "path": HERE / "states.geojson",
+        "url": (
+            "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/"
+            "geojson/ne_110m_admin_1_states_provinces.geojson"
+        ),
+        "columns": {"name": "name", "postal": "postal"},
+        "region_id": lambda raw: raw["postal"],
+    },
+    "counties": {
+        "path": HERE / "counties.geojson",
+        "url": "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json",
+        "columns": {"name": "NAME", "state_fips": "STATE"},
+        "region_id": lambda raw: raw["STATE"].astype(str).str.zfill(2) + raw["COUNTY"].astype(str).str.zfill(3),
+    },
+}
+
+_LOADED = {}
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Width of one pixel at this zoom level, in degrees of longitude."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def layer_path(source: str, zoom=None) -> Path:
+    suffix = "full" if zoom is None else f"z{zoom}"
+    return CACHE_DIR / f"{source}_{suffix}.parquet"
+
+
+def meta_path(source: str) -> Path:
+    return CACHE_DIR / f"{source}.json"
+
+
+# ---------- 1. Source files ----------
+
+def fetch_source(source: str) -> Path:
+    """Raw GeoJSON path; downloaded on first use."""
+    spec = SOURCES[source]
+    path = spec["path"]
+    if not path.exists():
+        import requests
+
+        print(f"Downloading {source} GeoJSON...")
+        r = requests.get(spec["url"], timeout=60)
+        r.raise_for_status()
+        path.write_bytes(r.content)
+        print("Saved:", path)
+    return path
+
+
+def source_stamp(source: str) -> dict:
+    st = fetch_source(source).stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "zoom_levels": list(ZOOM_LEVELS)}
+
+
+# ---------- 2. Build ----------
+
+def simplify(geoms, tolerance: float):
+    """Coverage simplification if GEOS supports it, per-polygon otherwise."""
+    try:
+        return geoms.simplify_coverage(tolerance), "coverage"
+    except (AttributeError, NotImplementedError):
+        return geoms.simplify(tolerance, preserve_topology=True), "preserve_topology"
+
+
+def build_cache(source: str = "states", force: bool = False) -> dict:
+    import geopandas as gpd
+
+    stamp = source_stamp(source)
+    meta_file = meta_path(source)
+    if not force and meta_file.exists():
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        if meta.get("stamp") == stamp and all(
+            layer_path(source, z).exists() for z in [None, *ZOOM_LEVELS]
+        ):
+            return meta
+
+    t0 = time.perf_counter()
+    spec = SOURCES[source]
+    raw = gpd.read_file(spec["path"]).to_crs(4326)
+
+    gdf = gpd.GeoDataFrame(
+        {col: raw[src] for col, src in spec["columns"].items()},
+        geometry=raw.geometry.make_valid(),
+        crs=raw.crs,
+    )
+    gdf.insert(0, "region_id", spec["region_id"](raw).astype(str))
+    gdf["name"] = gdf["name"].str.title()
+    gdf = gdf.sort_values("region_id").reset_index(drop=True)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(layer_path(source))
+
+    levels = {"full": int(gdf.geometry.count_coordinates().sum())}
+    method = None
+    for z in ZOOM_LEVELS:
+        simple = gdf.copy()
+        simple["geometry"], method = simplify(gdf.geometry, zoom_tolerance(z))
+        simple.to_parquet(layer_path(source, z))
+        levels[f"z{z}"] = int(simple.geometry.count_coordinates().sum())
+
+    meta = {"source": source, "stamp": stamp, "n_regions": len(gdf),
+            "method": method, "vertices": levels}
+    meta_file.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    _LOADED.clear()
+    print(f"Built {source} geometry cache ({len(gdf)} regions) in {time.perf_counter() - t0:.2f} s")
+    return meta
+
+
+# ---------- 3. Load ----------
+
+def cache_zoom(zoom):
+    """Cached level to serve a requested zoom: the coarsest level that is fine enough."""
+    if zoom is None:
+        return None
+    finer = [z for z in ZOOM_LEVELS if z >= zoom]
+    return finer[0] if finer else None
+
+
+def load_regions(source: str = "states", zoom=8, names=None, ids=None):
+    """
+    Regions of one source as a GeoDataFrame (EPSG:4326).
+
+    zoom   web-mercator zoom the map is drawn at (None = full resolution)
+    names  keep only these names (title case, e.g. "Florida")
+    ids    keep only these region_id values (state postal code, county FIPS)
+    """
+    import geopandas as gpd
+
+    level = cache_zoom(zoom)
+    key = (source, level)
+    if key not in _LOADED:
+        build_cache(source)
+        _LOADED[key] = gpd.read_parquet(layer_path(source, level))
+    gdf = _LOADED[key]
+
+    mask = None
+    if names is not None:
+        mask = gdf["name"].isin(list(names))
+    if ids is not None:
+        by_id = gdf["region_id"].isin([str(i) for i in ids])
+        mask = by_id if mask is None else mask & by_id
+    return (gdf if mask is None else gdf[mask]).copy()
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplified geometry cache for choropleths.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="(re)build the cache of a source")
+    p_build.add_argument("--source", choices=sorted(SOURCES), default="states")
+    p_build.add_argument("--force", action="store_true")
+    sub.add_parser("info", help="show cached sources")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        meta = build_cache(args.source, force=args.force)
+        print(json.dumps(meta["vertices"], indent=2))
+        return
+
+    for f in sorted(CACHE_DIR.glob("*.json")):
+        meta = json.loads(f.read_text(encoding="utf-8"))
+        sizes = {p.stem: f"{p.stat().st_size / 1024:.0f} KB"
+                 for p in sorted(CACHE_DIR.glob(f"{meta['source']}_*.parquet"))}
+        print(f"{meta['source']}: {meta['n_regions']} regions, {meta['method']} simplification")
+        for level, n in meta["vertices"].items():
+            print(f"  {level:5s} {n:9d} vertices  {sizes.get(meta['source'] + '_' + level, '')}")
+
+
+if __name__ == "__main__":
+    main()
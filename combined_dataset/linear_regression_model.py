@@ -4,41 +4,30 @@ Linear Regression model for climate exposure index prediction.
 
 """
 
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
+import sys
+from pathlib import Path
 
-df = pd.read_csv("/Users/helen/Desktop/5550 project/combined_dataset/modeling_dataset.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import FEATURES, TARGET, train_model
+
+df = load("modeling")
 
 print("\n===== Loaded Modeling Dataset =====")
 print(df.head(), "\n")
 
 
-target = "exposure_index"
+target = TARGET
 
-features = [
-    "urban_ratio",
-    "densityMi",
-    "sea_level_trend",
-    "sea_level_recent_mean",
-    "sea_level_max_anomaly",
-    "rain_daily_mean",
-    "rain_daily_max",
-    "heavy_rain_days_per_year"
-]
+features = FEATURES
 
 X = df[features]
 y = df[target]
 
 print("Using features:", features, "\n")
 
-model = Pipeline([
-    ("scaler", StandardScaler()),
-    ("lr", LinearRegression())
-])
-
-model.fit(X, y)
+# StandardScaler + LinearRegression, fitted and saved to model_registry/
+model, meta = train_model("linear_regression", df)
 
 print("=== Model Fitted ===\n")
 
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+location_report.py
+-----------------------------------------
+One report page per location, for any number of locations:
+
+    radar profile | observed flood time series
+    2030 forecast | risk bubble (location highlighted among all others)
+
+All numbers are computed up front for every location at once (min-max
+profile, forecast_engine.forecast, risk_index.compute_risk_index) and
+packed into arrays. Each worker then builds ONE figure, draws the static
+parts (axes, ticks, labels, the grey cloud of all locations) once, and for
+every location only updates the data of a handful of artists:
+
+    png   blitting: the static background is cached with copy_from_bbox and
+          each page is restore_region + draw_artist of the changed artists
+    pdf   artists updated in place with set_data / set_offsets, one PdfPages
+          file per worker chunk (vector output needs a full draw per page)
+
+Axes limits are shared by all pages so small multiples stay comparable.
+An HTML index (PAGE_SIZE locations per page, sorted by risk) links to the
+pages / PDF parts.
+
+    python location_report.py                     # png pages + index.html
+    python location_report.py --format pdf --jobs 4
+-----------------------------------------
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import argparse
+import html
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.ticker import MaxNLocator
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from forecast_engine import forecast
+from risk_index import city_inputs, compute_risk_index
+
+HERE = Path(__file__).resolve().parent
+OUT_DIR = HERE / "location_report"
+
+RADAR_FEATURES = [
+    "urban_ratio",
+    "densityMi",
+    "sea_level_trend",
+    "sea_level_recent_mean",
+    "rain_daily_max",
+    "heavy_rain_days_per_year",
+]
+FORECAST_YEARS = np.arange(2010, 2031)
+PAGE_SIZE = 100
+DPI = 100
+PNG_COMPRESS = 1   # zlib level; encoding dominates once drawing is blitted
+
+
+# ---------- 1. Precompute everything for all locations ----------
+
+def minmax_columns(X: np.ndarray) -> np.ndarray:
+    lo = np.nanmin(X, axis=0)
+    span = np.nanmax(X, axis=0) - lo
+    return (X - lo) / np.where(span > 0, span, 1.0)
+
+
+def build_report_data(modeling: pd.DataFrame, flood: pd.DataFrame,
+                      exposure: pd.DataFrame, method: str = "linear") -> dict:
+    """Arrays indexed by location position; NaN where a location has no data."""
+    locations = sorted(set(modeling["city"]) | set(flood["city"]) | set(exposure["city"]))
+
+    prof = modeling.set_index("city").reindex(locations)
+    radar = minmax_columns(prof[RADAR_FEATURES].to_numpy(dtype=float))
+
+    fc = forecast(flood, FORECAST_YEARS, method=method)
+    grid = pd.MultiIndex.from_product([locations, FORECAST_YEARS], names=["location", "YEAR"])
+    fc = fc.set_index(["location", "YEAR"]).reindex(grid)
+    shape = (len(locations), len(FORECAST_YEARS))
+    observed = fc["observed"].to_numpy(dtype=float).reshape(shape)
+    predicted = fc["forecast"].to_numpy(dtype=float).reshape(shape)
+
+    risk = compute_risk_index(city_inputs(exposure, flood), score_col="risk_2030")
+    risk = risk.set_index("city").reindex(locations)
+
+    state = prof["state"].fillna(exposure.set_index("city")["state"].reindex(locations))
+
+    with np.errstate(all="ignore"):
+        y_max = np.nanmax([np.nanmax(observed), np.nanmax(predicted), 1.0])
+
+    return {
+        "locations": locations,
+        "page_names": page_names(locations),
+        "state": state.fillna("").tolist(),
+        "radar": radar,
+        "years": FORECAST_YEARS,
+        "observed": observed,
+        "forecast": predicted,
+        "lower": fc["lower"].to_numpy(dtype=float).reshape(shape),
+        "upper": fc["upper"].to_numpy(dtype=float).reshape(shape),
+        "y_max": 1.1 * y_max,
+        "exposure": risk["exposure_index"].to_numpy(dtype=float),
+        "flood_norm": risk["flood_norm"].to_numpy(dtype=float),
+        "risk": risk["risk_2030"].to_numpy(dtype=float),
+        "risk_level": risk["risk_level"].astype(object).where(risk["risk_level"].notna(), "").tolist(),
+        "method": method,
+    }
+
+
+# ---------- 2. One reusable page ----------
+
+class ReportPage:
+    """
+    A figure whose static parts are drawn once; draw(i) updates it to
+    location i. With blit=True the changed artists are animated and drawn
+    on top of a cached background (png); otherwise they are regular
+    artists updated in place (pdf).
+    """
+
+    def __init__(self, data: dict, blit: bool = True):
+        self.data = data
+        self.blit = blit
+        self.fig = plt.figure(figsize=(11, 8.5), dpi=DPI)
+        fig = self.fig
+
+        # radar profile
+        n = len(RADAR_FEATURES)
+        self.angles = np.r_[np.linspace(0, 2 * np.pi, n, endpoint=False), 0.0]
+        ax = fig.add_subplot(2, 2, 1, polar=True)
+        ax.set_xticks(self.angles[:-1])
+        ax.set_xticklabels(RADAR_FEATURES, fontsize=8)
+        ax.set_yticklabels([])
+        ax.set_ylim(0, 1)
+        ax.set_title("Environmental profile (min-max over all locations)", fontsize=10, pad=14)
+        (self.radar_line,) = ax.plot([], [], color="#4F81BD", linewidth=2)
+        (self.radar_fill,) = ax.fill(np.zeros(1), np.zeros(1), color="#4F81BD", alpha=0.15)
+
+        years = data["years"]
+        y_lim = (0, data["y_max"])
+
+        # observed time series
+        ax = fig.add_subplot(2, 2, 2)
+        ax.set_xlim(years[0] - 0.5, years[-1] + 0.5)
+        ax.set_ylim(*y_lim)
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.set_title("Observed annual flood events", fontsize=10)
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Flood count")
+        ax.grid(True, linestyle="--", alpha=0.3)
+        (self.obs_line,) = ax.plot([], [], "o-", color="tab:blue")
+
+        # forecast
+        ax = fig.add_subplot(2, 2, 3)
+        ax.set_xlim(years[0] - 0.5, years[-1] + 0.5)
+        ax.set_ylim(*y_lim)
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.set_title(f"Forecast to {years[-1]} ({data['method']}, 90% interval)", fontsize=10)
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Flood count")
+        ax.grid(True, linestyle="--", alpha=0.3)
+        self.fc_band = ax.fill_between([], [], [], color="tab:orange", alpha=0.2)
+        (self.fc_obs,) = ax.plot([], [], "o", color="tab:blue", markersize=4)
+        (self.fc_line,) = ax.plot([], [], "--", color="tab:orange")
+
+        # risk bubble: every location in grey, this one highlighted
+        ax = fig.add_subplot(2, 2, 4)
+        ax.set_xlim(-0.05, 1.05)
+        ax.set_ylim(-0.05, 1.05)
+        ax.set_title("Projected 2030 risk", fontsize=10)
+        ax.set_xlabel("Exposure index")
+        ax.set_ylabel("Flood frequency (normalized)")
+        ax.grid(True, linestyle="--", alpha=0.3)
+        ok = np.isfinite(data["exposure"]) & np.isfinite(data["flood_norm"])
+        ax.scatter(data["exposure"][ok], data["flood_norm"][ok], s=20, color="0.6",
+                   alpha=0.6, zorder=2, rasterized=True)
+        self.bubble = ax.scatter([], [], s=[], c=[], cmap="viridis", vmin=0, vmax=1,
+                                 edgecolor="black", linewidth=0.8, zorder=3)
+        fig.colorbar(self.bubble, ax=ax, pad=0.02, label="Risk index (0–1)")
+
+        self.title = fig.suptitle("", fontsize=14, fontweight="bold")
+        fig.tight_layout(rect=(0, 0, 1, 0.95))
+
+        self.dynamic = [self.radar_fill, self.radar_line, self.obs_line, self.fc_band,
+                        self.fc_obs, self.fc_line, self.bubble, self.title]
+        self.background = None
+        if blit:
+            for artist in self.dynamic:
+                artist.set_animated(True)
+            self.fig.canvas.draw()
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def update(self, i: int):
+        d = self.data
+        years = d["years"]
+
+        r = d["radar"][i]
+        r = np.r_[r, r[:1]]
+        self.radar_line.set_data(self.angles, r)
+        self.radar_fill.set_xy(np.column_stack([self.angles, np.nan_to_num(r)]))
+
+        self.obs_line.set_data(years, d["observed"][i])
+        self.fc_obs.set_data(years, d["observed"][i])
+        self.fc_line.set_data(years, d["forecast"][i])
+
+        lo, up = d["lower"][i], d["upper"][i]
+        ok = np.isfinite(lo) & np.isfinite(up)
+        if ok.any():
+            x = years[ok]
+            verts = np.column_stack([np.r_[x, x[::-1]], np.r_[lo[ok], up[ok][::-1]]])
+            self.fc_band.set_verts([verts])
+        else:
+            self.fc_band.set_verts([])
+
+        x, y, risk = d["exposure"][i], d["flood_norm"][i], d["risk"][i]
+        if np.isfinite(x) and np.isfinite(y) and np.isfinite(risk):
+            self.bubble.set_offsets([[x, y]])
+            self.bubble.set_sizes([600 * (0.3 + risk)])
+            self.bubble.set_array(np.array([risk]))
+            risk_txt = f"risk {risk:.2f} ({d['risk_level'][i]})"
+        else:
+            self.bubble.set_offsets(np.empty((0, 2)))
+            risk_txt = "risk n/a"
+
+        name = d["locations"][i].replace("_", " ").title()
+        state = d["state"][i]
+        self.title.set_text(f"{name}{', ' + state if state else ''} — {risk_txt}")
+
+    def draw(self, i: int):
+        self.update(i)
+        if self.blit:
+            canvas = self.fig.canvas
+            canvas.restore_region(self.background)
+            for artist in self.dynamic:
+                self.fig.draw_artist(artist)
+
+    def save_png(self, i: int, path: Path):
+        self.draw(i)
+        if not self.blit:
+            self.fig.savefig(path, dpi=DPI)
+            return
+        Image.fromarray(np.asarray(self.fig.canvas.buffer_rgba())).save(
+            path, compress_level=PNG_COMPRESS
+        )
+
+    def close(self):
+        plt.close(self.fig)
+
+
+# ---------- 3. Workers ----------
+
+_DATA = None
+_PAGE = {}
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _page(blit: bool) -> ReportPage:
+    """One figure per worker process, built on first use."""
+    if blit not in _PAGE:
+        _PAGE[blit] = ReportPage(_DATA, blit=blit)
+    return _PAGE[blit]
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "location"
+
+
+def page_names(locations) -> list:
+    """One file stem per location; names with the same slug ("St. Louis",
+    "St Louis") get -2, -3, ... so no page overwrites another."""
+    taken = set()           # lower case: case-insensitive file systems
+    names = []
+    for loc in locations:
+        name = base = slug(loc)
+        k = 1
+        while name.lower() in taken:
+            k += 1
+            name = f"{base}-{k}"
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+
+def render_png_chunk(args):
+    indices, out_dir = args
+    page = _page(blit=True)
+    paths = []
+    for i in indices:
+        path = out_dir / "pages" / f"{_DATA['page_names'][i]}.png"
+        page.save_png(i, path)
+        paths.append(path)
+    return indices, paths
+
+
+def render_pdf_chunk(args):
+    indices, out_dir = args
+    page = _page(blit=False)
+    path = out_dir / f"locations_{indices[0] + 1:05d}-{indices[-1] + 1:05d}.pdf"
+    with PdfPages(path) as pdf:
+        for i in indices:
+            page.draw(i)
+            pdf.savefig(page.fig)
+    return indices, [path] * len(indices)
+
+
+def render_report(data: dict, out_dir: Path = OUT_DIR, fmt: str = "png",
+                  jobs: int = None, chunk_size: int = 250) -> pd.DataFrame:
+    """Write all pages plus the HTML index; returns location -> file table."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if fmt == "png":
+        (out_dir / "pages").mkdir(exist_ok=True)
+
+    n = len(data["locations"])
+    chunks = [(list(range(s, min(s + chunk_size, n))), out_dir) for s in range(0, n, chunk_size)]
+    worker = render_png_chunk if fmt == "png" else render_pdf_chunk
+
+    if jobs == 1 or len(chunks) == 1:
+        _init_worker(data)
+        results = list(map(worker, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(data,)) as pool:
+            results = list(pool.map(worker, chunks))
+
+    files = [None] * n
+    for indices, paths in results:
+        for i, p in zip(indices, paths):
+            files[i] = p
+
+    table = pd.DataFrame({
+        "location": data["locations"],
+        "state": data["state"],
+        "risk_2030": data["risk"],
+        "risk_level": data["risk_level"],
+        "file": [p.relative_to(out_dir).as_posix() for p in files],
+    })
+    if fmt == "pdf":
+        table["page"] = table.groupby("file").cumcount() + 1
+    write_index(table, out_dir, fmt)
+    return table
+
+
+# ---------- 4. HTML index ----------
+
+def write_index(table: pd.DataFrame, out_dir: Path, fmt: str, page_size: int = PAGE_SIZE):
+    table = table.sort_values("risk_2030", ascending=False, na_position="last").reset_index(drop=True)
+    n_pages = max(1, -(-len(table) // page_size))
+
+    def index_name(p):
+        return "index.html" if p == 0 else f"index_{p + 1:03d}.html"
+
+    for p in range(n_pages):
+        rows = []
+        for r in table.iloc[p * page_size:(p + 1) * page_size].itertuples():
+            name = html.escape(r.location.replace("_", " ").title())
+            risk = "" if pd.isna(r.risk_2030) else f"{r.risk_2030:.3f}"
+            href = html.escape(r.file) + (f"#page={r.page}" if fmt == "pdf" else "")
+            thumb = (f'<img src="{html.escape(r.file)}" width="220" loading="lazy">'
+                     if fmt == "png" else "")
+            rows.append(
+                f"<tr><td>{r.Index + 1}</td><td><a href=\"{href}\">{name}</a></td>"
+                f"<td>{html.escape(r.state)}</td><td>{risk}</td>"
+                f"<td>{html.escape(r.risk_level)}</td><td>{thumb}</td></tr>"
+            )
+        nav = " ".join(
+            f"<b>{q + 1}</b>" if q == p else f'<a href="{index_name(q)}">{q + 1}</a>'
+            for q in range(n_pages)
+        )
+        doc = (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            "<title>Coastal flood risk — location report</title>"
+            "<style>body{font-family:sans-serif} td,th{padding:4px 8px;text-align:left}"
+            "tr:nth-child(even){background:#f3f3f3}</style></head><body>\n"
+            f"<h1>Coastal flood risk — {len(table)} locations</h1>\n<p>Page {nav}</p>\n"
+            "<table><tr><th>#</th><th>Location</th><th>State</th><th>Risk 2030</th>"
+            "<th>Level</th><th></th></tr>\n" + "\n".join(rows) + "\n</table>\n"
+            f"<p>Page {nav}</p>\n</body></html>\n"
+        )
+        (out_dir / index_name(p)).write_text(doc, encoding="utf-8")
+
+
+# ---------- 5. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-location report pages + HTML index.")
+    parser.add_argument("--format", choices=["png", "pdf"], default="png")
+    parser.add_argument("--method", choices=["linear", "poisson"], default="linear")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=250, help="locations per worker task")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    data = build_report_data(
+        load("modeling"), load("flood_yearly"), load("exposure"),
+        method=args.method,
+    )
+    t1 = time.perf_counter()
+    table = render_report(data, args.out_dir, args.format, args.jobs, args.chunk_size)
+    t2 = time.perf_counter()
+
+    print(f"Prepared {len(table)} locations in {t1 - t0:.2f} s")
+    print(f"Rendered {len(table)} pages in {t2 - t1:.2f} s "
+          f"({1000 * (t2 - t1) / max(len(table), 1):.1f} ms / location)")
+    print("Index:", args.out_dir / "index.html")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,78 +3,84 @@
 High-quality, poster-ready model comparison plot.
 """
 
+import argparse
 import os
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+import sys
+from pathlib import Path
+
 from sklearn.metrics import r2_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-BASE_DIR = os.path.dirname(__file__)
-CSV_PATH = os.path.join(BASE_DIR, "modeling_dataset.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import FEATURES, TARGET, get_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
 SAVE_PATH = os.path.join(PROJECT_ROOT, "model_performance_comparison_poster.png")
 
-df = pd.read_csv(CSV_PATH)
-
-X = df[[
-    "urban_ratio",
-    "densityMi",
-    "sea_level_trend",
-    "sea_level_recent_mean",
-    "sea_level_max_anomaly",
-    "rain_daily_mean",
-    "rain_daily_max",
-    "heavy_rain_days_per_year",
-]].values
-y = df["exposure_index"].values
-
-lin = LinearRegression().fit(X, y)
-rf = RandomForestRegressor(n_estimators=200, random_state=42).fit(X, y)
-
-r2_lin = r2_score(y, lin.predict(X))
-r2_rf = r2_score(y, rf.predict(X))
-
-sns.set_theme(style="whitegrid")
-
-models = ["Linear Regression", "Random Forest"]
-scores = [r2_lin, r2_rf]
-
-palette = sns.color_palette("coolwarm", 2)
-
-plt.figure(figsize=(8, 5), dpi=300)
-
-bars = plt.bar(
-    models,
-    scores,
-    color=palette,
-    edgecolor="black",
-    linewidth=1.2,
-)
-
-for bar, score in zip(bars, scores):
-    plt.text(
-        bar.get_x() + bar.get_width()/2,
-        score + 0.03,
-        f"{score:.2f}",
-        ha="center", va="bottom",
-        fontsize=12, fontweight="bold"
+MODEL_LABELS = {
+    "linear_regression": "Linear Regression",
+    "random_forest": "Random Forest",
+    "hist_gradient_boosting": "Gradient Boosting",
+}
+
+
+def plot_model_performance(df, out_path=SAVE_PATH,
+                           model_names=("linear_regression", "random_forest")):
+    X = df[FEATURES]
+    y = df[TARGET].values
+
+    # reuse the registered models instead of refitting them here
+    scores = []
+    for name in model_names:
+        model, _ = get_model(name, df)
+        scores.append(r2_score(y, model.predict(X)))
+
+    sns.set_theme(style="whitegrid")
+
+    models = [MODEL_LABELS.get(name, name) for name in model_names]
+
+    palette = sns.color_palette("coolwarm", len(models))
+
+    plt.figure(figsize=(8, 5), dpi=300)
+
+    bars = plt.bar(
+        models,
+        scores,
+        color=palette,
+        edgecolor="black",
+        linewidth=1.2,
     )
 
-plt.ylim(0, 1.15)
+    for bar, score in zip(bars, scores):
+        plt.text(
+            bar.get_x() + bar.get_width()/2,
+            score + 0.03,
+            f"{score:.2f}",
+            ha="center", va="bottom",
+            fontsize=12, fontweight="bold"
+        )
 
-plt.title("Model Performance Comparison (R²)", fontsize=16, fontweight="bold", pad=15)
-plt.ylabel("R² Score", fontsize=12)
-plt.xticks(fontsize=12)
+    plt.ylim(0, 1.15)
 
-sns.despine()
+    plt.title("Model Performance Comparison (R²)", fontsize=16, fontweight="bold", pad=15)
+    plt.ylabel("R² Score", fontsize=12)
+    plt.xticks(fontsize=12)
 
-plt.tight_layout()
-plt.savefig(SAVE_PATH, dpi=300)
-plt.close()
+    sns.despine()
 
-print(f"Saved poster-ready plot to:\n{SAVE_PATH}")
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=300)
+    plt.close()
 
+    print(f"Saved poster-ready plot to:\n{out_path}")
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="R² bar chart of the registered models.")
+    parser.add_argument("--models", nargs="+", default=["linear_regression", "random_forest"],
+                        choices=list(MODEL_LABELS))
+    args = parser.parse_args()
+    plot_model_performance(load("modeling"), model_names=args.models)
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+model_registry.py
+-----------------------------------------
+Persistent store for fitted models so that the plotting / forecast
+scripts can reuse them instead of retraining on every run.
+
+Each registered model is saved as two files under model_registry/:
+    <name>.joblib   the fitted estimator (uncompressed, so it can be
+                    loaded memory-mapped with joblib mmap_mode="r")
+    <name>.json     metadata: feature list, target, training data hash,
+                    metrics, sklearn version, creation time
+
+Usage:
+    from model_registry import get_model
+    model, meta = get_model("random_forest")
+-----------------------------------------
+"""
+
+import hashlib
+import json
+import pickle
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+
+sys.path.insert(0, str(PROJECT_ROOT))  # instrumentation.py, data_access.py
+from data_access import load  # noqa: E402
+from instrumentation import stage  # noqa: E402
+
+REGISTRY_DIR = HERE / "model_registry"
+
+TARGET = "exposure_index"
+FEATURES = [
+    "urban_ratio",
+    "densityMi",
+    "sea_level_trend",
+    "sea_level_recent_mean",
+    "sea_level_max_anomaly",
+    "rain_daily_mean",
+    "rain_daily_max",
+    "heavy_rain_days_per_year",
+]
+
+
+# ---------- 1. Model definitions ----------
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=200, random_state=42)
+
+
+def _linear_regression():
+    from sklearn.linear_model import LinearRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("lr", LinearRegression()),
+    ])
+
+
+def _linear_regression_unscaled():
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression()
+
+
+class HistGBRegressor:
+    """
+    Histogram gradient boosting: a squared-error model for predict() and one
+    quantile-loss model per entry of `quantiles` for predict_quantiles() /
+    predict_interval().
+
+    Features are binned into at most 255 bins once, trees are grown on the
+    histograms with OpenMP threads, and early stopping holds out
+    validation_fraction of the rows (early_stopping="auto": from
+    EARLY_STOPPING_ROWS rows on). When fit on a DataFrame, pandas "category"
+    columns are split natively, without one-hot encoding; a category column
+    with more than 255 levels (the bin limit) is replaced by its levels'
+    mean target, the same ordering the native categorical splits use. The
+    training rows get out-of-fold means (ENCODING_FOLDS folds), so a row's
+    own target never enters its encoding; new rows get the means over all
+    training rows, with unseen levels as missing.
+    min_samples_leaf=None uses 20, or fewer on small tables, so the
+    three-city table can still split.
+
+    The registered model is trained on the numeric FEATURES only, like the
+    other engines, and cross_validation passes numpy arrays, so the
+    categorical path is used only by callers that fit on their own
+    DataFrame (e.g. with a "city" column).
+    """
+
+    EARLY_STOPPING_ROWS = 1000
+    ENCODING_FOLDS = 5
+
+    def __init__(self, quantiles=(0.05, 0.95), max_iter=300, learning_rate=0.1,
+                 max_leaf_nodes=31, min_samples_leaf=None, l2_regularization=0.0,
+                 early_stopping="auto", n_iter_no_change=20, validation_fraction=0.1,
+                 random_state=42):
+        self.quantiles = tuple(quantiles)
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.early_stopping = early_stopping
+        self.n_iter_no_change = n_iter_no_change
+        self.validation_fraction = validation_fraction
+        self.random_state = random_state
+
+    def _make(self, n_rows: int, **loss):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        leaf = self.min_samples_leaf
+        if leaf is None:
+            leaf = int(min(20, max(1, n_rows // 10)))
+        early = self.early_stopping
+        if early == "auto":
+            early = n_rows >= self.EARLY_STOPPING_ROWS
+        return HistGradientBoostingRegressor(
+            max_iter=self.max_iter, learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes, min_samples_leaf=leaf,
+            l2_regularization=self.l2_regularization, early_stopping=early,
+            n_iter_no_change=self.n_iter_no_change, validation_fraction=self.validation_fraction,
+            categorical_features="from_dtype", random_state=self.random_state, **loss)
+
+    def _encode(self, X):
+        if not self.target_maps_:
+            return X
+        X = X.copy()
+        for col, means in self.target_maps_.items():
+            X[col] = X[col].map(means).astype(float)
+        return X
+
+    def _encode_out_of_fold(self, X, y):
+        """Training-row encoding: each fold mapped with the level means of the other folds."""
+        from sklearn.model_selection import KFold
+        X = X.copy()
+        target = pd.Series(getattr(y, "values", y), index=X.index)
+        folds = KFold(self.ENCODING_FOLDS, shuffle=True, random_state=self.random_state)
+        for col in self.target_maps_:
+            codes = X[col]
+            encoded = np.full(len(X), np.nan)
+            for fit_idx, enc_idx in folds.split(X):
+                means = target.iloc[fit_idx].groupby(codes.iloc[fit_idx], observed=True).mean()
+                encoded[enc_idx] = codes.iloc[enc_idx].map(means).astype(float).to_numpy()
+            X[col] = encoded
+        return X
+
+    def fit(self, X, y):
+        self.target_maps_ = {}
+        if hasattr(X, "dtypes"):
+            for col in X.columns[(X.dtypes == "category").to_numpy()]:
+                if X[col].nunique() > 255:
+                    means = pd.Series(getattr(y, "values", y), index=X.index).groupby(
+                        X[col], observed=True).mean()
+                    self.target_maps_[col] = means.to_dict()
+        if self.target_maps_:
+            X = self._encode_out_of_fold(X, y)
+        self.model_ = self._make(len(X)).fit(X, y)
+        self.quantile_models_ = [self._make(len(X), loss="quantile", quantile=q).fit(X, y)
+                                 for q in self.quantiles]
+        self.n_iter_ = self.model_.n_iter_
+        self.feature_names_in_ = getattr(self.model_, "feature_names_in_", None)
+        return self
+
+    def predict(self, X):
+        return self.model_.predict(self._encode(X))
+
+    def predict_quantiles(self, X):
+        """(rows, len(quantiles)) predictions, sorted across quantiles so they never cross."""
+        X = self._encode(X)
+        return np.sort(np.column_stack([m.predict(X) for m in self.quantile_models_]), axis=1)
+
+    def predict_interval(self, X):
+        """(lower, upper) from the first and last quantile."""
+        q = self.predict_quantiles(X)
+        return q[:, 0], q[:, -1]
+
+
+def _hist_gradient_boosting():
+    return HistGBRegressor()
+
+
+# name -> factory returning an unfitted estimator
+MODEL_FACTORIES = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "linear_regression": _linear_regression,
+    "linear_regression_unscaled": _linear_regression_unscaled,
+}
+
+# in-process cache: name -> (model, meta)
+_LOADED = {}
+
+
+# ---------- 2. Helpers ----------
+
+def data_hash(df: pd.DataFrame, features=FEATURES, target=TARGET) -> str:
+    """Stable hash of the training columns (values + column names)."""
+    cols = list(features) + [target]
+    h = hashlib.sha256()
+    h.update(json.dumps(cols).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def model_path(name: str) -> Path:
+    return REGISTRY_DIR / f"{name}.joblib"
+
+
+def meta_path(name: str) -> Path:
+    return REGISTRY_DIR / f"{name}.json"
+
+
+def evaluate(model, X, y) -> dict:
+    """In-sample metrics stored next to the model."""
+    from sklearn.metrics import mean_absolute_error, r2_score
+    pred = model.predict(X)
+    return {
+        "r2": float(r2_score(y, pred)),
+        "mae": float(mean_absolute_error(y, pred)),
+        "n_rows": int(len(y)),
+    }
+
+
+# ---------- 3. Save / load ----------
+
+def save_model(name: str, model, df: pd.DataFrame,
+               features=FEATURES, target=TARGET, metrics=None) -> Path:
+    """Persist a fitted model and its metadata."""
+    import sklearn
+
+    REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+
+    out = model_path(name)
+    # compress=0 keeps numpy arrays raw on disk -> loadable with mmap_mode
+    joblib.dump(model, out, compress=0)
+
+    meta = {
+        "name": name,
+        "estimator": type(model).__name__,
+        "features": list(features),
+        "target": target,
+        "data_hash": data_hash(df, features, target),
+        "metrics": metrics or {},
+        "sklearn_version": sklearn.__version__,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    meta_path(name).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    _LOADED[name] = (model, meta)
+    print(f"Registered model '{name}' -> {out}")
+    return out
+
+
+def load_model(name: str, mmap_mode="r"):
+    """Load a registered model (memory-mapped by default) and its metadata."""
+    if name in _LOADED:
+        return _LOADED[name]
+
+    path = model_path(name)
+    if not path.exists() or not meta_path(name).exists():
+        raise FileNotFoundError(f"Model '{name}' is not registered: {path}")
+
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    meta = json.loads(meta_path(name).read_text(encoding="utf-8"))
+
+    _LOADED[name] = (model, meta)
+    return model, meta
+
+
+def train_model(name: str, df: pd.DataFrame = None,
+                features=FEATURES, target=TARGET):
+    """Fit the model defined in MODEL_FACTORIES and register it."""
+    if name not in MODEL_FACTORIES:
+        raise KeyError(f"Unknown model '{name}'. Choose from {sorted(MODEL_FACTORIES)}")
+    if df is None:
+        df = load("modeling")
+
+    X = df[features]
+    y = df[target]
+
+    model = MODEL_FACTORIES[name]()
+    with stage("model.fit", model=name, rows=len(X)):
+        model.fit(X, y)
+
+    save_model(name, model, df, features, target, metrics=evaluate(model, X, y))
+    return _LOADED[name]
+
+
+def get_model(name: str, df: pd.DataFrame = None,
+              features=FEATURES, target=TARGET):
+    """
+    Return (model, meta) for `name`, loading it from the registry when the
+    stored training data hash matches `df`, and (re)training otherwise.
+    """
+    if df is None:
+        df = load("modeling")
+
+    try:
+        model, meta = load_model(name)
+    except FileNotFoundError:
+        print(f"Model '{name}' not found in registry, training ...")
+        return train_model(name, df, features, target)
+    except (AttributeError, ImportError, EOFError, ValueError, pickle.UnpicklingError) as e:
+        # e.g. a class pickled as __main__.X, or a file from another sklearn version
+        print(f"Model '{name}' could not be loaded ({type(e).__name__}: {e}), retraining ...")
+        return train_model(name, df, features, target)
+
+    if (meta["features"] != list(features) or meta["target"] != target
+            or meta["data_hash"] != data_hash(df, features, target)):
+        print(f"Training data changed for '{name}', retraining ...")
+        _LOADED.pop(name, None)
+        return train_model(name, df, features, target)
+
+    return model, meta
+
+
+def list_models() -> list:
+    """Metadata for every registered model."""
+    if not REGISTRY_DIR.exists():
+        return []
+    return [json.loads(p.read_text(encoding="utf-8"))
+            for p in sorted(REGISTRY_DIR.glob("*.json"))]
+
+
+def main():
+    df = load("modeling")
+    for name in MODEL_FACTORIES:
+        _, meta = train_model(name, df)
+        print(f"  {name:28s} R²={meta['metrics']['r2']:.4f}  hash={meta['data_hash']}")
+
+
+if __name__ == "__main__":
+    # run through the importable module, so HistGBRegressor is pickled as
+    # model_registry.HistGBRegressor rather than __main__.HistGBRegressor
+    import model_registry
+    model_registry.main()
@@ -1,10 +1,15 @@
-import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
 import os
+import sys
+from pathlib import Path
 
-df = pd.read_csv("modeling_dataset.csv")  
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_PATH = os.path.join(BASE_DIR, "pca_environment_plot.png")
 
 feature_cols = [
     "urban_ratio", "densityMi",
@@ -12,29 +17,36 @@ feature_cols = [
     "rain_daily_mean", "rain_daily_max", "heavy_rain_days_per_year"
 ]
 
-X = df[feature_cols]
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+def plot_pca_environment(df, out_path=OUT_PATH):
+    df = df.copy()
+    X = df[feature_cols]
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    pca = PCA(n_components=2)
+    pca_result = pca.fit_transform(X_scaled)
+
+    df["PC1"] = pca_result[:, 0]
+    df["PC2"] = pca_result[:, 1]
 
-pca = PCA(n_components=2)
-pca_result = pca.fit_transform(X_scaled)
+    plt.figure(figsize=(10, 7))
+    plt.scatter(df["PC1"], df["PC2"], s=300)
 
-df["PC1"] = pca_result[:, 0]
-df["PC2"] = pca_result[:, 1]
+    for i in range(len(df)):
+        plt.text(df["PC1"][i] + 0.02, df["PC2"][i] + 0.02, df["city"][i], fontsize=14)
 
-plt.figure(figsize=(10, 7))
-plt.scatter(df["PC1"], df["PC2"], s=300)
+    plt.title("PCA of Environmental Features (3 Cities)", fontsize=18)
+    plt.xlabel(f"PC1 ({pca.explained_variance_ratio_[0]*100:.1f}% var)")
+    plt.ylabel(f"PC2 ({pca.explained_variance_ratio_[1]*100:.1f}% var)")
+    plt.grid(True, linestyle="--", alpha=0.5)
 
-for i in range(len(df)):
-    plt.text(df["PC1"][i] + 0.02, df["PC2"][i] + 0.02, df["city"][i], fontsize=14)
+    plt.savefig(out_path, dpi=300)
+    plt.close()
 
-plt.title("PCA of Environmental Features (3 Cities)", fontsize=18)
-plt.xlabel(f"PC1 ({pca.explained_variance_ratio_[0]*100:.1f}% var)")
-plt.ylabel(f"PC2 ({pca.explained_variance_ratio_[1]*100:.1f}% var)")
-plt.grid(True, linestyle="--", alpha=0.5)
+    print("Generated:", out_path)
 
-plt.savefig("pca_environment_plot.png", dpi=300)
-plt.close()
 
-print("Generated: pca_environment_plot.png")
+if __name__ == "__main__":
+    plot_pca_environment(load("modeling"))
@@ -1,17 +1,30 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-df = pd.read_csv("combined_dataset/flood_events_yearly.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+
+HERE = Path(__file__).resolve().parent
+OUT_PATH = HERE / "flood_timeseries.png"
+
+
+def plot_flood_timeseries(df, out_path=OUT_PATH):
+    fig = plt.figure(figsize=(10,6))
+    sns.lineplot(data=df, x="YEAR", y="flood_count", hue="city", marker="o")
+
+    plt.title("Observed Annual Flood Events (2010–2024)")
+    plt.xlabel("Year")
+    plt.ylabel("Flood Count")
+    plt.grid(True, linestyle="--", alpha=0.3)
+    plt.tight_layout()
 
-plt.figure(figsize=(10,6))
-sns.lineplot(data=df, x="YEAR", y="flood_count", hue="city", marker="o")
+    plt.savefig(out_path, dpi=300)
+    plt.close(fig)
+    print("Saved", out_path)
 
-plt.title("Observed Annual Flood Events (2010–2024)")
-plt.xlabel("Year")
-plt.ylabel("Flood Count")
-plt.grid(True, linestyle="--", alpha=0.3)
-plt.tight_layout()
 
-plt.savefig("combined_dataset/flood_timeseries.png", dpi=300)
-print("Saved flood_timeseries.png")
+if __name__ == "__main__":
+    plot_flood_timeseries(load("flood_yearly"))
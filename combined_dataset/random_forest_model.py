@@ -1,21 +1,21 @@
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+import sys
+from pathlib import Path
+
 from sklearn.metrics import r2_score
 import joblib
 
-df = pd.read_csv("modeling_dataset.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import FEATURES, HERE, train_model
+
+df = load("modeling")
 
 y = df["exposure_index"]
-feature_cols = [
-    "urban_ratio", "densityMi",
-    "sea_level_trend", "sea_level_recent_mean", "sea_level_max_anomaly",
-    "rain_daily_mean", "rain_daily_max",
-    "heavy_rain_days_per_year"
-]
+feature_cols = FEATURES
 X = df[feature_cols]
 
-rf = RandomForestRegressor(n_estimators=200, random_state=42)
-rf.fit(X, y)
+# fit + store in model_registry/ so the plot scripts can reuse it
+rf, meta = train_model("random_forest", df)
 
 preds = rf.predict(X)
 score = r2_score(y, preds)
@@ -27,5 +27,5 @@ importances = rf.feature_importances_
 for f, imp in zip(feature_cols, importances):
     print(f"{f:25s}  →  {imp:.4f}")
 
-joblib.dump(rf, "random_forest_model.pkl")
+joblib.dump(rf, HERE / "random_forest_model.pkl")
 print("\nModel saved: random_forest_model.pkl")
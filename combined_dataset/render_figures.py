@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+render_figures.py
+-----------------------------------------
+Render all project figures headless (Agg backend) in parallel.
+
+Every figure is registered below as a plot function from one of the plot
+scripts plus the datasets it needs and the file it writes. Datasets are
+read once per process (and before the pool starts, so forked workers
+inherit them); figures are spread over a process pool.
+
+A figure is skipped when its fingerprint -- hash of its input files and
+of the source files that draw it -- matches the one stored in
+.figure_manifest.json from the previous run and the output still exists.
+
+    python render_figures.py              # everything that changed
+    python render_figures.py --force      # everything
+    python render_figures.py risk_map pca --jobs 2
+    python render_figures.py --list
+-----------------------------------------
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import argparse
+import hashlib
+import importlib
+import json
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+
+sys.path.insert(0, str(PROJECT_ROOT))  # instrumentation.py, data_access.py
+from data_access import dataset_path, load  # noqa: E402
+from instrumentation import stage  # noqa: E402
+MANIFEST_PATH = HERE / ".figure_manifest.json"
+
+STATES_GEOJSON = HERE / "states.geojson"
+
+
+# ---------- 1. Datasets (loaded once per process) ----------
+
+def _load(name):
+    return lambda: load(name)
+
+
+def _load_states():
+    from risk_map_three_states import load_states
+    return load_states()
+
+
+def _warm_models():
+    """Make sure registered models are fresh before workers use them."""
+    from model_registry import get_model
+    df = dataset("modeling")
+    for name in ("random_forest", "linear_regression", "linear_regression_unscaled"):
+        get_model(name, df)
+
+
+# key -> (files it is read from, loader)
+DATASETS = {
+    "modeling": ([dataset_path("modeling")], _load("modeling")),
+    "flood_yearly": ([dataset_path("flood_yearly")], _load("flood_yearly")),
+    "exposure": ([dataset_path("exposure")], _load("exposure")),
+    "states": ([STATES_GEOJSON], _load_states),
+}
+
+_CACHE = {}
+
+
+def dataset(key: str):
+    if key not in _CACHE:
+        _CACHE[key] = DATASETS[key][1]()
+    return _CACHE[key]
+
+
+# ---------- 2. Figure registry ----------
+
+FIGURES = {}
+
+
+def register(name: str, module: str, func: str, needs, output: Path,
+             deps=(), uses_models: bool = False):
+    """
+    name        figure id used on the command line
+    module/func plot function, called as func(*datasets, out_path)
+    needs       dataset keys passed positionally, in order
+    output      file written by the figure
+    deps        extra source modules whose changes should trigger a re-render
+    """
+    FIGURES[name] = {
+        "module": module,
+        "func": func,
+        "needs": list(needs),
+        "output": Path(output),
+        "sources": [HERE / f"{m}.py" for m in (module, *deps)],
+        "uses_models": uses_models,
+    }
+
+
+register("city_radar", "city_radar_plot", "plot_city_radar",
+         ["modeling"], PROJECT_ROOT / "city_radar_plot.png")
+register("correlation_heatmap", "correlation_heatmap", "plot_correlation_heatmap",
+         ["modeling"], PROJECT_ROOT / "correlation_heatmap.png")
+register("pca_environment", "pca_environment_plot", "plot_pca_environment",
+         ["modeling"], HERE / "pca_environment_plot.png")
+register("pipeline_flowchart", "data_pipeline_flowchart", "draw_flowchart",
+         [], PROJECT_ROOT / "data_pipeline_flowchart.png")
+register("rf_importance", "random_forest_plots", "plot_rf_importance",
+         ["modeling"], PROJECT_ROOT / "random_forest_feature_importance.png",
+         deps=["model_registry"], uses_models=True)
+register("rf_actual_vs_predicted", "random_forest_plots", "plot_rf_actual_vs_predicted",
+         ["modeling"], PROJECT_ROOT / "random_forest_actual_vs_predicted.png",
+         deps=["model_registry"], uses_models=True)
+register("linear_coefficients", "linear_regression_plots", "plot_linear_coefficients",
+         ["modeling"], PROJECT_ROOT / "linear_coefficients.png",
+         deps=["model_registry"], uses_models=True)
+register("linear_actual_vs_predicted", "linear_regression_plots", "plot_linear_actual_vs_predicted",
+         ["modeling"], PROJECT_ROOT / "actual_vs_predicted.png",
+         deps=["model_registry"], uses_models=True)
+register("model_performance", "model_performance_plot", "plot_model_performance",
+         ["modeling"], PROJECT_ROOT / "model_performance_comparison_poster.png",
+         deps=["model_registry"], uses_models=True)
+register("flood_timeseries", "plot_flood_timeseries", "plot_flood_timeseries",
+         ["flood_yearly"], HERE / "flood_timeseries.png")
+register("flood_vs_exposure", "plot_exposure_vs_floods", "plot_exposure_vs_floods",
+         ["flood_yearly", "exposure"], HERE / "flood_vs_exposure.png")
+register("future_forecast", "future_flood_forecast", "plot_future_forecast",
+         ["flood_yearly"], HERE / "future_flood_forecast.png",
+         deps=["forecast_engine", "count_models"])
+register("risk_bubble", "exposure_risk_projection", "plot_risk_bubble_from",
+         ["exposure", "flood_yearly"], HERE / "projected_risk_2030_bubble.png",
+         deps=["risk_index"])
+register("risk_map", "risk_map_three_states", "plot_risk_map",
+         ["states", "exposure", "flood_yearly"], HERE / "three_state_risk_map.png",
+         deps=["risk_index", "geometry_cache"])
+
+
+# ---------- 3. Change detection ----------
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(name: str) -> str:
+    fig = FIGURES[name]
+    files = [p for key in fig["needs"] for p in DATASETS[key][0]] + fig["sources"]
+    h = hashlib.sha256(name.encode("utf-8"))
+    for p in files:
+        h.update(str(p).encode("utf-8"))
+        h.update(file_digest(p).encode("utf-8") if p.exists() else b"missing")
+    return h.hexdigest()[:16]
+
+
+def load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+# ---------- 4. Rendering ----------
+
+def render_one(name: str) -> dict:
+    """Draw one figure in this process; never raises."""
+    import matplotlib.pyplot as plt
+
+    fig = FIGURES[name]
+    t0 = time.perf_counter()
+    try:
+        func = getattr(importlib.import_module(fig["module"]), fig["func"])
+        args = [dataset(k) for k in fig["needs"]]
+        # plot scripts call sns.set / plt.style.use -> keep rcParams per figure
+        with stage(f"plot.{name}"), matplotlib.rc_context():
+            func(*args, fig["output"])
+        status, error = "ok", None
+    except Exception:
+        status, error = "failed", traceback.format_exc()
+    finally:
+        plt.close("all")
+    return {"name": name, "status": status, "seconds": time.perf_counter() - t0,
+            "error": error}
+
+
+def render(names=None, jobs: int = None, force: bool = False) -> list:
+    names = list(FIGURES) if not names else list(names)
+    unknown = [n for n in names if n not in FIGURES]
+    if unknown:
+        raise KeyError(f"Unknown figure(s) {unknown}; see --list")
+
+    manifest = load_manifest()
+    prints = {n: fingerprint(n) for n in names}
+    todo = [n for n in names
+            if force or manifest.get(n) != prints[n] or not FIGURES[n]["output"].exists()]
+    skipped = [n for n in names if n not in todo]
+    for n in skipped:
+        print(f"  skip   {n} (inputs unchanged)")
+    if not todo:
+        return []
+
+    # load shared inputs once in the parent so forked workers inherit them
+    if any(FIGURES[n]["uses_models"] for n in todo):
+        _warm_models()
+    for key in {k for n in todo for k in FIGURES[n]["needs"]}:
+        dataset(key)
+
+    with stage("plot.render_figures", figures=len(todo), jobs=jobs):
+        if jobs == 1 or len(todo) == 1:
+            results = [render_one(n) for n in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(render_one, todo))
+
+    for r in results:
+        if r["status"] == "ok":
+            manifest[r["name"]] = prints[r["name"]]
+            print(f"  ok     {r['name']:28s} {r['seconds']:.2f} s")
+        else:
+            manifest.pop(r["name"], None)
+            print(f"  FAILED {r['name']}\n{r['error']}")
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render project figures headless and in parallel.")
+    parser.add_argument("figures", nargs="*", help="figure names (default: all)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest")
+    parser.add_argument("--list", action="store_true", help="list registered figures")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, fig in FIGURES.items():
+            print(f"{name:28s} {fig['module']}.{fig['func']} -> {fig['output']}")
+        return
+
+    t0 = time.perf_counter()
+    results = render(args.figures, args.jobs, args.force)
+    n_failed = sum(r["status"] != "ok" for r in results)
+    print(f"\nRendered {len(results) - n_failed} figure(s), {n_failed} failed, "
+          f"in {time.perf_counter() - t0:.2f} s")
+    if n_failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+risk_index.py
+-----------------------------------------
+One place for the coastal flood risk index used by
+exposure_risk_projection.py, risk_map_three_states.py and
+risk_monte_carlo.py.
+
+    risk = sum_k  weight_k * normalize_k(column_k)
+
+Components are configured as
+    {"exposure": {"column": "exposure_index", "weight": 0.5, "norm": "none"},
+     "flood":    {"column": "mean_flood",     "weight": 0.5, "norm": "minmax"}}
+with norm one of: none, minmax, rank, zscore. minmax and rank map to [0, 1];
+zscore does not, so pass matching bins when using it.
+
+weight_sweep(...) evaluates thousands of weight vectors in one matrix
+product (locations x components) @ (components x samples) and reports how
+stable each city's rank is.
+
+CLI:
+    python risk_index.py --samples 5000
+-----------------------------------------
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import HERE
+
+OUT_CSV = HERE / "risk_weight_sensitivity.csv"
+
+DEFAULT_COMPONENTS = {
+    "exposure": {"column": "exposure_index", "weight": 0.5, "norm": "none"},
+    "flood":    {"column": "mean_flood",     "weight": 0.5, "norm": "minmax"},
+}
+
+RISK_BINS = [0, 0.33, 0.66, 1.0]
+RISK_LABELS = ["Low", "Medium", "High"]
+
+
+# ---------- 1. Normalizations (column-wise over locations) ----------
+
+def _minmax(a):
+    lo = a.min(axis=0, keepdims=True)
+    span = a.max(axis=0, keepdims=True) - lo
+    return np.divide(a - lo, span, out=np.full_like(a, 0.5), where=span > 0)
+
+
+def _rank(a):
+    ranks = pd.DataFrame(a).rank(axis=0, method="average").to_numpy()
+    n = a.shape[0]
+    return (ranks - 1) / (n - 1) if n > 1 else np.full_like(a, 0.5)
+
+
+def _zscore(a):
+    sd = a.std(axis=0, keepdims=True)
+    return np.divide(a - a.mean(axis=0, keepdims=True), sd,
+                     out=np.zeros_like(a), where=sd > 0)
+
+
+NORMALIZERS = {
+    "none": lambda a: a,
+    "minmax": _minmax,
+    "rank": _rank,
+    "zscore": _zscore,
+}
+
+
+def normalize(values, method: str = "minmax") -> np.ndarray:
+    """Normalize a (locations,) or (locations, k) array along locations."""
+    if method not in NORMALIZERS:
+        raise ValueError(f"Unknown normalization '{method}'; choose from {sorted(NORMALIZERS)}")
+    a = np.asarray(values, dtype=float)
+    return NORMALIZERS[method](a)
+
+
+# ---------- 2. Risk index ----------
+
+def city_inputs(exposure: pd.DataFrame, flood: pd.DataFrame) -> pd.DataFrame:
+    """Exposure table + mean yearly flood count per city (mean_flood)."""
+    flood_mean = (
+        flood.groupby("city")["flood_count"]
+        .mean()
+        .reset_index(name="mean_flood")
+    )
+    return exposure.merge(flood_mean, on="city", how="left")
+
+
+def load_city_inputs(exposure_csv=None, flood_csv=None) -> pd.DataFrame:
+    """city_inputs() read from exposure_dataset.csv and flood_events_yearly.csv."""
+    return city_inputs(load("exposure", path=exposure_csv), load("flood_yearly", path=flood_csv))
+
+
+def component_matrix(df: pd.DataFrame, components=DEFAULT_COMPONENTS) -> np.ndarray:
+    """Normalized components as a (locations x components) array."""
+    return np.column_stack([
+        normalize(df[spec["column"]].to_numpy(dtype=float), spec.get("norm", "minmax"))
+        for spec in components.values()
+    ])
+
+
+def compute_risk_index(df: pd.DataFrame, components=DEFAULT_COMPONENTS,
+                       bins=RISK_BINS, labels=RISK_LABELS,
+                       score_col: str = "risk_score") -> pd.DataFrame:
+    """Add <component>_norm columns, the weighted score and its risk level."""
+    out = df.copy()
+    N = component_matrix(out, components)
+    w = np.array([spec["weight"] for spec in components.values()], dtype=float)
+
+    for j, name in enumerate(components):
+        out[f"{name}_norm"] = N[:, j]
+    out[score_col] = N @ w
+
+    if bins is not None:
+        out["risk_level"] = pd.cut(out[score_col], bins=bins, labels=labels,
+                                   include_lowest=True)
+    return out
+
+
+# ---------- 3. Weight sensitivity ----------
+
+def weight_sweep(df: pd.DataFrame, components=DEFAULT_COMPONENTS, weights=None,
+                 n_samples: int = 5000, seed: int = 42, label_col: str = "city"):
+    """
+    Rank locations under many weight vectors at once.
+
+    weights: (samples x components) array; if None, n_samples vectors are
+    drawn uniformly from the simplex (Dirichlet(1, ..., 1)).
+    Returns (summary DataFrame per location, ranks array samples x locations,
+    Spearman correlation of every sample's ranking with the base ranking).
+    """
+    N = component_matrix(df, components)
+    L, C = N.shape
+    if weights is None:
+        weights = np.random.default_rng(seed).dirichlet(np.ones(C), size=n_samples)
+    weights = np.asarray(weights, dtype=float)
+
+    scores = weights @ N.T                                       # (K, L)
+    ranks = np.argsort(np.argsort(-scores, axis=1), axis=1) + 1  # 1 = highest risk
+
+    base_w = np.array([spec["weight"] for spec in components.values()], dtype=float)
+    base_rank = np.argsort(np.argsort(-(N @ base_w))) + 1
+
+    d2 = ((ranks - base_rank[None, :]) ** 2).sum(axis=1)
+    spearman = 1 - 6 * d2 / (L * (L ** 2 - 1)) if L > 1 else np.ones(len(ranks))
+
+    summary = pd.DataFrame({
+        label_col: df[label_col].to_numpy(),
+        "base_rank": base_rank,
+        "mean_rank": ranks.mean(axis=0),
+        "min_rank": ranks.min(axis=0),
+        "max_rank": ranks.max(axis=0),
+        "p_top": (ranks == 1).mean(axis=0),
+        "p_same_rank": (ranks == base_rank[None, :]).mean(axis=0),
+    }).sort_values("base_rank").reset_index(drop=True)
+
+    return summary, ranks, spearman
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risk index + weight sensitivity.")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = load_city_inputs().dropna(subset=["exposure_index", "mean_flood"])
+    risk = compute_risk_index(df)
+    print(risk[["city", "exposure_norm", "flood_norm", "risk_score", "risk_level"]]
+          .sort_values("risk_score").to_string(index=False))
+
+    summary, _, spearman = weight_sweep(df, n_samples=args.samples, seed=args.seed)
+    print(f"\nWeight sensitivity over {args.samples} weight vectors:")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"Spearman vs base ranking: mean={spearman.mean():.3f}, "
+          f"p05={np.quantile(spearman, 0.05):.3f}")
+
+    summary.to_csv(OUT_CSV, index=False)
+    print("\nSaved:", OUT_CSV)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,82 @@
 #!/usr/bin/env python3
 """
-Three-state coastal flood risk map using GeoJSON from Natural Earth GitHub mirror.
+Three-state coastal flood risk map using GeoJSON from Natural Earth GitHub mirror
+(read through the simplified geometry cache).
 """
 
 import os
-import requests
-import geopandas as gpd
-import pandas as pd
-import matplotlib.pyplot as plt
-
-BASE_DIR = os.path.dirname(__file__)
+import sys
+from pathlib import Path
 
+import matplotlib.pyplot as plt
 
-GEOJSON_PATH = os.path.join(BASE_DIR, "states.geojson")
-GEOJSON_URL = (
-    "https://raw.githubusercontent.com/nvkelso/natural-earth-vector/master/"
-    "geojson/ne_110m_admin_1_states_provinces.geojson"
-)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from geometry_cache import load_regions
+from risk_index import city_inputs, compute_risk_index
 
-if not os.path.exists(GEOJSON_PATH):
-    print("Downloading US states GeoJSON...")
-    r = requests.get(GEOJSON_URL)
-    r.raise_for_status()
-    with open(GEOJSON_PATH, "wb") as f:
-        f.write(r.content)
-    print("Saved:", GEOJSON_PATH)
-else:
-    print("GeoJSON already exists, skip download.")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_PATH = os.path.join(BASE_DIR, "three_state_risk_map.png")
 
-states = gpd.read_file(GEOJSON_PATH)
-states["name"] = states["name"].str.title()
+TARGET_STATES = ["Florida", "Louisiana", "Virginia"]
 
-exposure = pd.read_csv(os.path.join(BASE_DIR, "exposure_dataset.csv"))
-flood = pd.read_csv(os.path.join(BASE_DIR, "flood_events_yearly.csv"))
+# ~0.005 deg per pixel: finer than an 8 in / 300 dpi map of the three states
+MAP_ZOOM = 8
 
-flood_mean = (
-    flood.groupby("city")["flood_count"]
-    .mean()
-    .reset_index(name="flood_mean")
-)
+# both components min-max scaled, equal weights
+MAP_COMPONENTS = {
+    "exposure": {"column": "exposure_index", "weight": 0.5, "norm": "minmax"},
+    "flood":    {"column": "mean_flood",     "weight": 0.5, "norm": "minmax"},
+}
 
-df = exposure.merge(flood_mean, on="city", how="left")
-df["flood_mean"] = df["flood_mean"].fillna(0)
 
-def norm(col):
-    return (col - col.min()) / (col.max() - col.min()) if col.max() > col.min() else 0.5
+def load_states(names=None, zoom=MAP_ZOOM):
+    """State polygons from the simplified geometry cache (see geometry_cache.py)."""
+    return load_regions("states", zoom=zoom, names=names)
 
-df["exp_norm"] = norm(df["exposure_index"])
-df["flood_norm"] = norm(df["flood_mean"])
-df["risk_score"] = 0.5 * df["exp_norm"] + 0.5 * df["flood_norm"]
 
-state_risk = df.groupby("state")["risk_score"].mean().reset_index()
+def plot_risk_map(states, exposure, flood, out_path=OUT_PATH, target_states=TARGET_STATES):
+    df = city_inputs(exposure, flood)
+    df["mean_flood"] = df["mean_flood"].fillna(0)
+    df = compute_risk_index(df, MAP_COMPONENTS, bins=None)
 
-target_states = ["Florida", "Louisiana", "Virginia"]
-state_risk = state_risk[state_risk["state"].isin(target_states)]
+    state_risk = df.groupby("state")["risk_score"].mean().reset_index()
+    state_risk = state_risk[state_risk["state"].isin(target_states)]
 
-subset = states[states["name"].isin(target_states)].merge(
-    state_risk, left_on="name", right_on="state", how="left"
-)
+    subset = states[states["name"].isin(target_states)].merge(
+        state_risk, left_on="name", right_on="state", how="left"
+    )
 
-subset["risk_score"] = subset["risk_score"].fillna(0)
+    subset["risk_score"] = subset["risk_score"].fillna(0)
 
-fig, ax = plt.subplots(figsize=(8, 6))
+    fig, ax = plt.subplots(figsize=(8, 6))
 
-subset.boundary.plot(ax=ax, color="black", linewidth=1)
-subset.plot(
-    ax=ax,
-    column="risk_score",
-    cmap="Reds",
-    legend=True,
-    edgecolor="black",
-    linewidth=1,
-    legend_kwds={"label": "Relative Coastal Flood Risk", "shrink": 0.7}
-)
+    subset.boundary.plot(ax=ax, color="black", linewidth=1)
+    subset.plot(
+        ax=ax,
+        column="risk_score",
+        cmap="Reds",
+        legend=True,
+        edgecolor="black",
+        linewidth=1,
+        legend_kwds={"label": "Relative Coastal Flood Risk", "shrink": 0.7}
+    )
 
-ax.set_title(
-    "Coastal Flood Risk Heatmap (Florida, Louisiana, Virginia)",
-    fontsize=14
-)
-ax.axis("off")
+    ax.set_title(
+        "Coastal Flood Risk Heatmap (Florida, Louisiana, Virginia)",
+        fontsize=14
+    )
+    ax.axis("off")
 
-OUT_PATH = os.path.join(BASE_DIR, "three_state_risk_map.png")
-plt.tight_layout()
-plt.savefig(OUT_PATH, dpi=300)
-print("✔ Saved:", OUT_PATH)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=300)
+    plt.close(fig)
+    print("✔ Saved:", out_path)
 
-plt.show()
 
+if __name__ == "__main__":
+    plot_risk_map(
+        load_states(TARGET_STATES),
+        load("exposure"),
+        load("flood_yearly"),
+    )
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+risk_monte_carlo.py
+-----------------------------------------
+Monte Carlo version of the 2030 risk index in exposure_risk_projection.py
+
+    risk_2030 = w * exposure_index + (1 - w) * flood_norm
+
+Instead of one point value per city, every input is sampled as a
+(locations x draws) array and pushed through the same formula:
+
+  * flood rate 2030   Poisson log-linear trend per city (forecast_engine),
+                      log-rate drawn from N(eta_hat, var) -> parameter uncertainty
+  * sea-level rise    one scenario per draw (low / intermediate / high, meters
+                      of rise beyond the historical trend), scaled into the
+                      log flood rate by SLR_LOG_RATE_PER_M
+  * rainfall          lognormal multiplier per city and draw
+  * exposure growth   urban_ratio and densityMi grow by normal percentages,
+                      exposure_index is rebuilt per draw like build_exposure_index.py
+
+flood_norm maps the drawn log rate through a logistic curve fixed by the
+point forecasts eta without sea-level rise: the lowest and highest eta go
+to about 0.12 and 0.88. It stays strictly inside (0, 1), so every city's
+risk keeps responding to the draws. Per-draw min-max would cancel the
+sea-level term, which moves every location's log rate by the same amount,
+and clipping fixed min / max bounds pins the extreme cities at 0 or 1.
+--check verifies that a higher sea-level scenario raises the risk of
+every city.
+
+Draws are split into fixed-size chunks, each chunk has its own
+SeedSequence child, so results are identical for any number of workers.
+
+Output:
+    combined_dataset/risk_2030_monte_carlo.csv
+-----------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from forecast_engine import fit_poisson_trends
+from model_registry import HERE
+from risk_index import RISK_BINS, RISK_LABELS
+
+OUT_CSV = HERE / "risk_2030_monte_carlo.csv"
+
+TARGET_YEAR = 2030
+
+# sea-level rise by 2030 beyond the historical trend (m), with probabilities
+SLR_SCENARIOS = {"low": 0.05, "intermediate": 0.10, "high": 0.20}
+SLR_PROBS = [0.3, 0.5, 0.2]
+SLR_SD = 0.02                 # spread within a scenario (m)
+SLR_LOG_RATE_PER_M = 3.0      # +0.1 m  ->  flood rate x exp(0.3) ≈ 1.35
+
+RAIN_SIGMA = 0.15             # sd of log rainfall multiplier
+RAIN_ELASTICITY = 1.0         # flood rate ∝ rain_multiplier ** elasticity
+
+URBAN_GROWTH = (0.05, 0.03)   # mean, sd of relative urban_ratio growth to 2030
+DENSITY_GROWTH = (0.04, 0.03)
+
+RISK_WEIGHT = 0.5
+
+
+# ---------- 1. Inputs ----------
+
+def load_inputs(target_year: int = TARGET_YEAR) -> dict:
+    """Base exposure components and the 2030 log flood-rate distribution."""
+    exposure = load("exposure")
+    flood = load("flood_yearly")
+
+    res, locs, base_year = fit_poisson_trends(flood)
+    x = np.array([1.0, target_year - base_year])
+    eta = res["beta"] @ x
+    eta_sd = np.sqrt(np.einsum("p,lpq,q->l", x, res["cov"], x))
+
+    rates = pd.DataFrame({"city": locs, "eta": eta, "eta_sd": eta_sd})
+    df = exposure.merge(rates, on="city", how="inner")
+
+    return {
+        "city": df["city"].to_numpy(),
+        "urban_ratio": df["urban_ratio"].to_numpy(dtype=float),
+        "density": df["densityMi"].to_numpy(dtype=float),
+        "eta": df["eta"].to_numpy(dtype=float),
+        "eta_sd": df["eta_sd"].to_numpy(dtype=float),
+    }
+
+
+# ---------- 2. Simulation ----------
+
+def minmax_rows(a: np.ndarray) -> np.ndarray:
+    """Min-max scale across locations (axis 0) separately for every draw."""
+    lo = a.min(axis=0, keepdims=True)
+    span = a.max(axis=0, keepdims=True) - lo
+    return np.divide(a - lo, span, out=np.full_like(a, 0.5), where=span > 0)
+
+
+def log_rate_scale(log_rate: np.ndarray, eta: np.ndarray) -> np.ndarray:
+    """
+    Logistic map of log rates into (0, 1), centred on the point forecasts
+    eta: their midpoint goes to 0.5, min / max to 1 / (1 + e^2) ≈ 0.12 / 0.88.
+    """
+    center = (eta.max() + eta.min()) / 2
+    half = (eta.max() - eta.min()) / 2
+    z = (log_rate - center) / (half if half > 0 else 1.0)
+    return 1.0 / (1.0 + np.exp(-2.0 * z))
+
+
+def simulate_chunk(inputs: dict, n_draws: int, seed_seq: np.random.SeedSequence,
+                   weight: float = RISK_WEIGHT, slr_scenarios: dict = None) -> dict:
+    """Draw n_draws joint samples for all locations; arrays are (L, n_draws)."""
+    rng = np.random.default_rng(seed_seq)
+    L = len(inputs["city"])
+
+    # parameter uncertainty in the 2030 log flood rate
+    log_rate = inputs["eta"][:, None] + inputs["eta_sd"][:, None] * rng.standard_normal((L, n_draws))
+
+    # one sea-level scenario per draw, shared by all locations
+    levels = np.array(list((slr_scenarios or SLR_SCENARIOS).values()))
+    scenario = rng.choice(len(levels), size=n_draws, p=SLR_PROBS)
+    slr = levels[scenario] + SLR_SD * rng.standard_normal(n_draws)
+    log_rate += SLR_LOG_RATE_PER_M * slr[None, :]
+
+    # rainfall perturbation per location and draw
+    log_rate += RAIN_ELASTICITY * RAIN_SIGMA * rng.standard_normal((L, n_draws))
+    flood_rate = np.exp(log_rate)
+
+    # exposure growth -> exposure_raw -> exposure_index (min-max per draw)
+    urban = inputs["urban_ratio"][:, None] * (1 + rng.normal(*URBAN_GROWTH, size=(L, n_draws)))
+    density = inputs["density"][:, None] * (1 + rng.normal(*DENSITY_GROWTH, size=(L, n_draws)))
+    exposure_index = minmax_rows(np.clip(urban, 0, 1) * density)
+
+    # fixed scale: a per-draw min-max would cancel the shared sea-level shift
+    flood_norm = log_rate_scale(log_rate, inputs["eta"])
+    risk = weight * exposure_index + (1 - weight) * flood_norm
+
+    return {
+        "risk": risk.astype(np.float32),
+        "flood_rate": flood_rate.astype(np.float32),
+        "exposure_index": exposure_index.astype(np.float32),
+    }
+
+
+def _simulate_job(job):
+    inputs, n_draws, seed_seq, weight, slr_scenarios = job
+    return simulate_chunk(inputs, n_draws, seed_seq, weight, slr_scenarios)
+
+
+def run_monte_carlo(inputs: dict, n_draws: int = 10_000, seed: int = 42,
+                    chunk_size: int = 2_000, workers: int = 1,
+                    weight: float = RISK_WEIGHT, slr_scenarios: dict = None) -> dict:
+    """Run all draws (optionally across processes) and stack the chunks."""
+    sizes = [chunk_size] * (n_draws // chunk_size)
+    if n_draws % chunk_size:
+        sizes.append(n_draws % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(inputs, n, s, weight, slr_scenarios) for n, s in zip(sizes, seeds)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_job, jobs))
+    else:
+        parts = [_simulate_job(j) for j in jobs]
+
+    return {k: np.concatenate([p[k] for p in parts], axis=1) for k in parts[0]}
+
+
+# ---------- 3. Summary ----------
+
+def summarize(inputs: dict, draws: dict) -> pd.DataFrame:
+    risk = draws["risk"]
+    q05, q50, q95 = np.quantile(risk, [0.05, 0.5, 0.95], axis=1)
+
+    out = pd.DataFrame({
+        "city": inputs["city"],
+        "risk_mean": risk.mean(axis=1),
+        "risk_p05": q05,
+        "risk_p50": q50,
+        "risk_p95": q95,
+    })
+
+    # probability of each risk level, same bins as risk_index.py
+    level = np.digitize(risk, RISK_BINS[1:-1], right=True)
+    for k, label in enumerate(RISK_LABELS):
+        out[f"p_{label.lower()}"] = (level == k).mean(axis=1)
+
+    out["flood_rate_p50"] = np.median(draws["flood_rate"], axis=1)
+    out["exposure_index_p50"] = np.median(draws["exposure_index"], axis=1)
+    return out.sort_values("risk_mean").reset_index(drop=True)
+
+
+def check_slr_response(inputs: dict, n_draws: int = 2_000, seed: int = 42, shift: float = 0.3):
+    """Raise every sea-level scenario by `shift` m; every city's mean, p05 and p95 risk must go up."""
+    raised = {k: v + shift for k, v in SLR_SCENARIOS.items()}
+    base = summarize(inputs, run_monte_carlo(inputs, n_draws, seed)).set_index("city")
+    high = summarize(inputs, run_monte_carlo(inputs, n_draws, seed, slr_scenarios=raised)).set_index("city")
+    high = high.loc[base.index]
+
+    cols = ["risk_mean", "risk_p05", "risk_p95"]
+    print(f"SLR check, +{shift} m:")
+    for city in base.index:
+        print(f"  {city:12s} " + "  ".join(
+            f"{c[5:]} {base.at[city, c]:.4f} -> {high.at[city, c]:.4f}" for c in cols))
+    flat = [city for city in base.index if not (high.loc[city, cols] > base.loc[city, cols]).all()]
+    if flat:
+        raise AssertionError(f"risk does not respond to the sea-level scenarios for {flat}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo 2030 flood-risk ensemble.")
+    parser.add_argument("--draws", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=2_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--weight", type=float, default=RISK_WEIGHT,
+                        help="weight of exposure_index in the risk index")
+    parser.add_argument("--check", action="store_true",
+                        help="only check that higher sea-level rise raises the risk")
+    args = parser.parse_args()
+
+    inputs = load_inputs()
+    if args.check:
+        check_slr_response(inputs)
+        return
+
+    t0 = time.perf_counter()
+    draws = run_monte_carlo(inputs, args.draws, args.seed, args.chunk_size,
+                            args.workers, args.weight)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(inputs['city'])} locations x {args.draws} draws in {elapsed:.2f} s")
+
+    summary = summarize(inputs, draws)
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    summary.to_csv(OUT_CSV, index=False)
+    print("\nSaved:", OUT_CSV)
+
+
+if __name__ == "__main__":
+    main()
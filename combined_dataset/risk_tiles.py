@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+risk_tiles.py
+-----------------------------------------
+Export region-level risk scores as tiled GeoJSON plus a static Leaflet
+viewer, so thousands of polygons can be browsed without downloading them
+all.
+
+For every zoom level of geometry_cache (4, 6, 8, 10) the pre-simplified
+geometries of that level are written to slippy-map tiles
+
+    <out>/tiles/<z>/<x>/<y>.geojson
+
+Regions are clipped to each tile they touch and stored as a fill polygon
+plus its boundary lines, so tile size follows vertex count rather than
+region size and tile edges never show as borders. Fills are cut at the
+exact tile edges, so semi-transparent fills of neighbouring tiles do not
+overlap; only the lines extend one pixel into the next tile. Coordinates are rounded
+to about a tenth of a pixel at that zoom, which keeps tiles compact.
+<out>/metadata.json lists the tiles that exist; <out>/index.html loads only
+the tiles of the current view, at the closest exported level.
+
+Scores:
+    states    mean city risk per state (same index as risk_map_three_states)
+    counties  city risk on the county that contains the city (CITY_REGIONS)
+    --scores  any CSV with region_id,risk_score[,risk_level] instead
+
+    python risk_tiles.py --source states
+    python risk_tiles.py --source counties --scores county_risk.csv
+    cd risk_tiles && python -m http.server     # then open localhost:8000
+-----------------------------------------
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from geometry_cache import ZOOM_LEVELS, load_regions
+from risk_index import RISK_BINS, RISK_LABELS, city_inputs, compute_risk_index
+from risk_map_three_states import MAP_COMPONENTS
+
+HERE = Path(__file__).resolve().parent
+OUT_DIR = HERE / "risk_tiles"
+
+# study city -> region_id per source (state postal code, county FIPS)
+CITY_REGIONS = {
+    "miami":       {"states": "FL", "counties": "12086"},   # Miami-Dade County
+    "new_orleans": {"states": "LA", "counties": "22071"},   # Orleans Parish
+    "norfolk":     {"states": "VA", "counties": "51710"},   # Norfolk city
+}
+
+
+# map title label per source
+SOURCE_LABELS = {"states": "state", "counties": "county"}
+
+
+# ---------- 1. Scores ----------
+
+def city_region_scores(source: str, exposure: pd.DataFrame, flood: pd.DataFrame) -> pd.DataFrame:
+    """region_id, risk_score, risk_level from the city risk index."""
+    df = city_inputs(exposure, flood)
+    df["mean_flood"] = df["mean_flood"].fillna(0)
+    df = compute_risk_index(df, MAP_COMPONENTS, bins=None)
+    df["region_id"] = df["city"].map(lambda c: CITY_REGIONS.get(c, {}).get(source))
+
+    scores = df.dropna(subset=["region_id"]).groupby("region_id", as_index=False)["risk_score"].mean()
+    scores["risk_level"] = pd.cut(scores["risk_score"], bins=RISK_BINS, labels=RISK_LABELS,
+                                  include_lowest=True).astype(str)
+    return scores
+
+
+# ---------- 2. Tiling ----------
+
+def lonlat_to_tile(lon, lat, zoom: int):
+    """Slippy-map tile indices (x, y) for arrays of lon / lat."""
+    n = 2 ** zoom
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = np.floor((np.asarray(lon) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(int), np.clip(y, 0, n - 1).astype(int)
+
+
+def tile_bounds(x, y, zoom: int):
+    """(west, south, east, north) in degrees of slippy-map tiles."""
+    n = 2 ** zoom
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    west, east = x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def zoom_decimals(zoom: int) -> int:
+    """Decimal places giving ~0.1 px precision at this zoom."""
+    return int(np.ceil(np.log10(256 * 2 ** zoom / 360.0))) + 1
+
+
+def export_level(regions, zoom: int, tile_dir: Path) -> list:
+    """
+    Write the tiles of one zoom level; returns the 'x/y' keys written.
+
+    Each region is clipped to every tile its bounding box touches, as two
+    features: the fill polygon ("kind": "fill", drawn without stroke) and
+    its boundary lines ("kind": "edge"). Fills are clipped to the exact
+    tile box, so neighbouring tiles meet without overlapping (an overlap
+    of translucent fills would draw darker seams). Lines are clipped to the
+    box padded by one pixel, so no stroke ends short of a tile edge. The
+    outline comes from the lines, so tile edges never show up as borders.
+    """
+    geoms = regions.geometry.values
+    b = regions.geometry.bounds
+    x0, y1 = lonlat_to_tile(b["minx"].to_numpy(), b["miny"].to_numpy(), zoom)
+    x1, y0 = lonlat_to_tile(b["maxx"].to_numpy(), b["maxy"].to_numpy(), zoom)
+
+    # one (region, tile) pair per tile a region's bbox touches
+    idx, xs, ys = [], [], []
+    for i in range(len(regions)):
+        tx, ty = np.meshgrid(np.arange(x0[i], x1[i] + 1), np.arange(y0[i], y1[i] + 1))
+        idx.append(np.full(tx.size, i))
+        xs.append(tx.ravel())
+        ys.append(ty.ravel())
+    idx, xs, ys = np.concatenate(idx), np.concatenate(xs), np.concatenate(ys)
+
+    pad = 360.0 / (256 * 2 ** zoom)
+    west, south, east, north = tile_bounds(xs, ys, zoom)
+    boxes = shapely.box(west, south, east, north)
+    padded = shapely.box(west - pad, south - pad, east + pad, north + pad)
+
+    d = zoom_decimals(zoom)
+    fills = shapely.transform(shapely.intersection(geoms[idx], boxes), lambda c: np.round(c, d))
+    edges = shapely.transform(shapely.intersection(shapely.boundary(geoms)[idx], padded),
+                              lambda c: np.round(c, d))
+
+    props = regions[["region_id", "name", "risk_score", "risk_level"]].copy()
+    props["risk_score"] = props["risk_score"].round(4)
+    props = [json.dumps(p, separators=(",", ":"))[:-1]
+             for p in props.astype(object).where(props.notna(), None).to_dict("records")]
+
+    tiles = defaultdict(list)
+    for kind, parts in (("fill", fills), ("edge", edges)):
+        keep = ~shapely.is_empty(parts)
+        for i, x, y, g in zip(idx[keep], xs[keep], ys[keep], shapely.to_geojson(parts[keep])):
+            tiles[(x, y)].append(
+                '{"type":"Feature","properties":' + props[i] + f',"kind":"{kind}"}}'
+                + ',"geometry":' + g + "}"
+            )
+
+    for (x, y), feats in tiles.items():
+        path = tile_dir / str(zoom) / str(x) / f"{y}.geojson"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('{"type":"FeatureCollection","features":[' + ",".join(feats) + "]}",
+                        encoding="utf-8")
+    return sorted(f"{x}/{y}" for x, y in tiles)
+
+
+def export_tiles(regions, out_dir: Path = OUT_DIR, levels=ZOOM_LEVELS, source: str = "states",
+                 title: str = "Coastal flood risk") -> dict:
+    """regions: callable zoom -> GeoDataFrame with region_id, name, risk_score, risk_level."""
+    out_dir = Path(out_dir)
+    tile_dir = out_dir / "tiles"
+    if tile_dir.exists():
+        shutil.rmtree(tile_dir)
+
+    meta = {"title": title, "source": source, "levels": list(levels), "tiles": {}}
+    bounds = None
+    for z in levels:
+        gdf = regions(z)
+        meta["tiles"][str(z)] = export_level(gdf, z, tile_dir)
+        bounds = gdf.total_bounds.tolist()
+    meta["bounds"] = bounds
+
+    (out_dir / "metadata.json").write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+    (out_dir / "index.html").write_text(VIEWER_HTML.replace("__TITLE__", title), encoding="utf-8")
+    return meta
+
+
+# ---------- 3. Viewer ----------
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>
+  html, body, #map { height: 100%; margin: 0; }
+  .legend { background: white; padding: 6px 8px; font: 12px sans-serif; line-height: 18px; }
+  .legend i { width: 14px; height: 14px; float: left; margin-right: 6px; opacity: 0.8; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+// Loads only the tiles of the current view, at the closest exported level.
+const COLORS = ["#fee5d9", "#fcae91", "#fb6a4a", "#de2d26", "#a50f15"];
+function color(v) {
+  if (v === null || v === undefined) return "#cccccc";
+  return COLORS[Math.min(COLORS.length - 1, Math.floor(v * COLORS.length))];
+}
+function tileXY(lon, lat, z) {
+  const n = 2 ** z, r = Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI / 180;
+  return [
+    Math.min(n - 1, Math.max(0, Math.floor((lon + 180) / 360 * n))),
+    Math.min(n - 1, Math.max(0, Math.floor((1 - Math.log(Math.tan(r) + 1 / Math.cos(r)) / Math.PI) / 2 * n))),
+  ];
+}
+
+fetch("metadata.json").then(r => r.json()).then(meta => {
+  const map = L.map("map");
+  L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+              {attribution: "&copy; OpenStreetMap contributors", opacity: 0.5}).addTo(map);
+  const b = meta.bounds;
+  map.fitBounds([[b[1], b[0]], [b[3], b[2]]]);
+
+  const available = {};
+  for (const z of meta.levels) available[z] = new Set(meta.tiles[z]);
+  const layers = {}, requested = {};
+  let shown = null;
+
+  function levelFor(zoom) {
+    let best = meta.levels[0];
+    for (const z of meta.levels) if (z <= zoom) best = z;
+    return best;
+  }
+  function layerFor(z) {
+    if (!layers[z]) {
+      requested[z] = new Set();
+      layers[z] = L.geoJSON(null, {
+        style: f => f.properties.kind === "edge"
+          ? {color: "#333", weight: 0.6}
+          : {stroke: false, fillOpacity: 0.75, fillColor: color(f.properties.risk_score)},
+        onEachFeature: (f, l) => l.bindPopup(
+          "<b>" + f.properties.name + "</b><br>risk: " +
+          (f.properties.risk_score === null ? "n/a" :
+           f.properties.risk_score.toFixed(3) + " (" + f.properties.risk_level + ")")),
+      });
+    }
+    return layers[z];
+  }
+  function refresh() {
+    const z = levelFor(map.getZoom()), layer = layerFor(z);
+    if (shown !== layer) {
+      if (shown) map.removeLayer(shown);
+      layer.addTo(map); shown = layer;
+    }
+    const bb = map.getBounds();
+    const [x0, y0] = tileXY(bb.getWest(), bb.getNorth(), z);
+    const [x1, y1] = tileXY(bb.getEast(), bb.getSouth(), z);
+    for (let x = x0; x <= x1; x++) for (let y = y0; y <= y1; y++) {
+      const key = x + "/" + y;
+      if (!available[z].has(key) || requested[z].has(key)) continue;
+      requested[z].add(key);
+      fetch("tiles/" + z + "/" + key + ".geojson").then(r => r.json()).then(d => layer.addData(d));
+    }
+  }
+  map.on("moveend", refresh);
+  refresh();
+
+  const legend = L.control({position: "bottomright"});
+  legend.onAdd = () => {
+    const div = L.DomUtil.create("div", "legend");
+    div.innerHTML = "<b>" + meta.title + "</b><br>" + COLORS.map((c, i) =>
+      '<i style="background:' + c + '"></i>' + (i / COLORS.length).toFixed(1) + "–" +
+      ((i + 1) / COLORS.length).toFixed(1)).join("<br>") +
+      '<br><i style="background:#cccccc"></i>no data';
+    return div;
+  };
+  legend.addTo(map);
+});
+</script>
+</body>
+</html>
+"""
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiled GeoJSON risk export + Leaflet viewer.")
+    parser.add_argument("--source", choices=["states", "counties"], default="states")
+    parser.add_argument("--scores", type=Path, default=None,
+                        help="CSV with region_id,risk_score[,risk_level] (default: study cities)")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--all-regions", action="store_true",
+                        help="also export regions without a score (drawn grey)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.scores is not None:
+        scores = pd.read_csv(args.scores, dtype={"region_id": str})
+        if "risk_level" not in scores:
+            scores["risk_level"] = pd.cut(scores["risk_score"], bins=RISK_BINS,
+                                          labels=RISK_LABELS, include_lowest=True).astype(str)
+    else:
+        scores = city_region_scores(args.source, load("exposure"), load("flood_yearly"))
+
+    how = "left" if args.all_regions else "inner"
+
+    def regions(zoom):
+        gdf = load_regions(args.source, zoom=zoom)
+        return gdf.merge(scores[["region_id", "risk_score", "risk_level"]], on="region_id", how=how)
+
+    meta = export_tiles(regions, args.out_dir, source=args.source,
+                        title=f"Coastal flood risk by {SOURCE_LABELS[args.source]}")
+    n_tiles = sum(len(v) for v in meta["tiles"].values())
+    print(f"Wrote {n_tiles} tiles over zoom levels {meta['levels']} "
+          f"in {time.perf_counter() - t0:.2f} s")
+    print(f"Viewer: cd {args.out_dir} && python -m http.server  ->  http://localhost:8000")
+
+
+if __name__ == "__main__":
+    main()
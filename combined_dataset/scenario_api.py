@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+scenario_api.py
+-----------------------------------------
+What-if scenarios on modeling_dataset.csv, evaluated against a registered
+model in one batched prediction.
+
+A scenario is a set of perturbation values, e.g.
+    {"sea_level_rise_m": 0.3, "urban_growth": 0.05}
+Each perturbation is mapped onto the feature columns it touches
+(see PERTURBATIONS). A grid of perturbations is expanded into all
+combinations, the (scenarios x locations x features) array is built from
+the cached base features (only perturbed columns are recomputed), and the
+whole array goes through a single model.predict call.
+
+    from scenario_api import ScenarioEngine
+    engine = ScenarioEngine("random_forest")
+    res = engine.evaluate_grid({"sea_level_rise_m": [0, 0.1, 0.3],
+                                "urban_growth": [0, 0.05]})
+
+CLI:
+    python scenario_api.py --slr 0 0.1 0.3 --urban-growth 0 0.05 --rain-scale 1 1.1
+    python scenario_api.py --compiled ...   # load the flat-array forest (forest_compiler.py);
+                                            # faster start-up, same predictions and speed
+-----------------------------------------
+"""
+
+import argparse
+import sys
+import itertools
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: data_access.py
+from data_access import load
+from model_registry import HERE, get_model
+
+OUT_CSV = HERE / "scenario_results.csv"
+
+# perturbation -> list of (feature column, operation)
+#   add      x + v
+#   mul      x * v
+#   growth   x * (1 + v)
+PERTURBATIONS = {
+    "sea_level_rise_m":      [("sea_level_recent_mean", "add"),
+                              ("sea_level_max_anomaly", "add")],
+    "sea_level_trend_delta": [("sea_level_trend", "add")],
+    "urban_growth":          [("urban_ratio", "growth")],
+    "density_growth":        [("densityMi", "growth")],
+    "rain_scale":            [("rain_daily_mean", "mul"),
+                              ("rain_daily_max", "mul")],
+    "heavy_rain_days_delta": [("heavy_rain_days_per_year", "add")],
+}
+
+_OPS = {
+    "add": lambda x, v: x + v,
+    "mul": lambda x, v: x * v,
+    "growth": lambda x, v: x * (1 + v),
+}
+
+
+def expand_grid(grid: dict) -> pd.DataFrame:
+    """All combinations of the perturbation values in `grid`."""
+    unknown = set(grid) - set(PERTURBATIONS)
+    if unknown:
+        raise KeyError(f"Unknown perturbation(s) {sorted(unknown)}; "
+                       f"choose from {sorted(PERTURBATIONS)}")
+    names = list(grid)
+    rows = list(itertools.product(*(np.atleast_1d(grid[n]) for n in names)))
+    return pd.DataFrame(rows, columns=names)
+
+
+class ScenarioEngine:
+    """
+    Holds the model and base features once; evaluates scenario tables.
+    The last CACHE_SIZE results are kept; callers get a copy of them.
+    """
+
+    CACHE_SIZE = 32
+
+    def __init__(self, model_name: str = "random_forest", df: pd.DataFrame = None,
+                 compiled: bool = False):
+        self.df = load("modeling") if df is None else df.reset_index(drop=True)
+        if compiled:
+            from forest_compiler import load_compiled
+            self.model, self.meta = load_compiled(model_name, self.df)
+        else:
+            self.model, self.meta = get_model(model_name, self.df)
+        self.features = self.meta["features"]
+        self.col_index = {c: j for j, c in enumerate(self.features)}
+
+        # cached base features (locations x features)
+        self.base = self.df[self.features].to_numpy(dtype=np.float64)
+        self.locations = self.df["city"].to_numpy()
+        self._cache = OrderedDict()
+        self._base_pred = None
+
+    def _exposure_index(self, X: np.ndarray) -> np.ndarray:
+        """Rebuild exposure_index per scenario like build_exposure_index.py."""
+        raw = X[..., self.col_index["urban_ratio"]] * X[..., self.col_index["densityMi"]]
+        lo = raw.min(axis=1, keepdims=True)
+        span = raw.max(axis=1, keepdims=True) - lo
+        return np.divide(raw - lo, span, out=np.zeros_like(raw), where=span > 0)
+
+    def build_features(self, scenarios: pd.DataFrame) -> np.ndarray:
+        """(scenarios x locations x features) array; only perturbed columns change."""
+        S = len(scenarios)
+        X = np.broadcast_to(self.base, (S,) + self.base.shape).copy()
+
+        for name in scenarios.columns:
+            values = scenarios[name].to_numpy(dtype=np.float64)[:, None]
+            for col, op in PERTURBATIONS[name]:
+                if col not in self.col_index:
+                    continue
+                j = self.col_index[col]
+                X[:, :, j] = _OPS[op](X[:, :, j], values)
+        return X
+
+    def evaluate(self, scenarios: pd.DataFrame) -> pd.DataFrame:
+        """Predict every scenario row for every location in one model call."""
+        scenarios = scenarios.reset_index(drop=True)
+        key = (tuple(scenarios.columns), scenarios.to_numpy().tobytes())
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key].copy()
+
+        X = self.build_features(scenarios)
+        S, L, F = X.shape
+
+        flat = pd.DataFrame(X.reshape(S * L, F), columns=self.features, copy=False)
+        pred = self.model.predict(flat).reshape(S, L)
+
+        out = scenarios.loc[np.repeat(np.arange(S), L)].reset_index(drop=True)
+        out.insert(0, "scenario_id", np.repeat(np.arange(S), L))
+        out["city"] = np.tile(self.locations, S)
+        out["exposure_index"] = self._exposure_index(X).ravel()
+        out["prediction"] = pred.ravel()
+        out["delta_vs_base"] = out["prediction"] - np.tile(self.base_prediction(), S)
+
+        self._cache[key] = out
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return out.copy()
+
+    def evaluate_grid(self, grid: dict) -> pd.DataFrame:
+        return self.evaluate(expand_grid(grid))
+
+    def base_prediction(self) -> np.ndarray:
+        if self._base_pred is None:
+            base = pd.DataFrame(self.base, columns=self.features)
+            self._base_pred = self.model.predict(base)
+        return self._base_pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched what-if scenarios.")
+    parser.add_argument("--model", default="random_forest")
+    parser.add_argument("--slr", type=float, nargs="+", default=[0.0, 0.1, 0.3],
+                        help="sea_level_rise_m values")
+    parser.add_argument("--urban-growth", type=float, nargs="+", default=[0.0, 0.05])
+    parser.add_argument("--density-growth", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--rain-scale", type=float, nargs="+", default=[1.0, 1.1])
+    parser.add_argument("--compiled", action="store_true", help="load the flat-array forest (forest_compiler.py): faster start-up only")
+    args = parser.parse_args()
+
+    engine = ScenarioEngine(args.model, compiled=args.compiled)
+    grid = {
+        "sea_level_rise_m": args.slr,
+        "urban_growth": args.urban_growth,
+        "density_growth": args.density_growth,
+        "rain_scale": args.rain_scale,
+    }
+
+    t0 = time.perf_counter()
+    res = engine.evaluate_grid(grid)
+    elapsed = (time.perf_counter() - t0) * 1000
+    n_scen = res["scenario_id"].nunique()
+    print(f"{n_scen} scenarios x {len(engine.locations)} locations in {elapsed:.1f} ms")
+
+    print(res.pivot_table(index=list(grid), columns="city", values="prediction")
+             .to_string(float_format=lambda v: f"{v:.3f}"))
+
+    res.to_csv(OUT_CSV, index=False)
+    print("\nSaved:", OUT_CSV)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+score_models.py
+-----------------------------------------
+Inference entry point for the registered flood-risk models.
+
+Batch / streaming mode (CSV in, CSV out, scored in chunks):
+    python score_models.py batch --model random_forest --input tracts.csv --output scored.csv
+    cat tracts.csv | python score_models.py batch --input - --output - > scored.csv
+
+HTTP mode (local, single-location requests are micro-batched):
+    python score_models.py serve --model random_forest --port 8765 [--compiled]
+    curl -X POST localhost:8765/score -d '{"urban_ratio": 0.2, "densityMi": 300, ...}'
+    curl localhost:8765/stats
+
+Input tables must contain every feature column the model was trained on;
+all other columns are passed through to the output unchanged. --compiled
+loads a random forest in its flat-array form (forest_compiler.py),
+memory-mapped without unpickling. This only shortens start-up: the
+predictions and their throughput are the same as sklearn's.
+-----------------------------------------
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from model_registry import load_model
+
+
+# ---------- 1. Shared helpers ----------
+
+def latency_summary(latencies_ms) -> dict:
+    """p50 / p90 / p99 / max of a list of latencies in milliseconds."""
+    if len(latencies_ms) == 0:
+        return {"count": 0}
+    arr = np.asarray(latencies_ms, dtype=float)
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {
+        "count": int(arr.size),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+def to_matrix(df: pd.DataFrame, features) -> np.ndarray:
+    """Feature matrix in the model's column order."""
+    missing = [c for c in features if c not in df.columns]
+    if missing:
+        raise KeyError(f"Missing feature columns: {missing}")
+    return df[features].to_numpy(dtype=np.float64)
+
+
+class Scorer:
+    """Loads a registered model once and scores feature matrices with it."""
+
+    def __init__(self, model_name: str, compiled: bool = False):
+        t0 = time.perf_counter()
+        self.compiled = compiled
+        if compiled:
+            from forest_compiler import load_compiled
+            self.model, self.meta = load_compiled(model_name)
+        else:
+            self.model, self.meta = load_model(model_name)
+        self.features = self.meta["features"]
+        self.load_ms = (time.perf_counter() - t0) * 1000
+        print(f"Loaded '{model_name}'{' (compiled)' if compiled else ''} in {self.load_ms:.1f} ms "
+              f"({len(self.features)} features)", file=sys.stderr)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.compiled:
+            return self.model.predict(X)
+        # sklearn warns when fitted on a DataFrame and given an array,
+        # so wrap the matrix back into named columns
+        return self.model.predict(pd.DataFrame(X, columns=self.features, copy=False))
+
+
+# ---------- 2. Batch / streaming scoring ----------
+
+def score_stream(scorer: Scorer, src, dst, chunksize: int = 100_000,
+                 output_col: str = "prediction") -> dict:
+    """Score a CSV stream chunk by chunk and write the scored rows to dst."""
+    chunk_ms = []
+    n_rows = 0
+    t_start = time.perf_counter()
+
+    reader = pd.read_csv(src, chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        t0 = time.perf_counter()
+        chunk[output_col] = scorer.predict(to_matrix(chunk, scorer.features))
+        chunk_ms.append((time.perf_counter() - t0) * 1000)
+
+        chunk.to_csv(dst, index=False, header=(i == 0))
+        n_rows += len(chunk)
+
+    elapsed = time.perf_counter() - t_start
+    report = {
+        "rows": n_rows,
+        "chunks": len(chunk_ms),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(n_rows / elapsed, 1) if elapsed > 0 else None,
+        "chunk_latency": latency_summary(chunk_ms),
+    }
+    return report
+
+
+def run_batch(args):
+    scorer = Scorer(args.model, compiled=args.compiled)
+
+    src = sys.stdin if args.input == "-" else args.input
+    if args.output == "-":
+        report = score_stream(scorer, src, sys.stdout, args.chunksize)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as dst:
+            report = score_stream(scorer, src, dst, args.chunksize)
+
+    print(json.dumps(report, indent=2), file=sys.stderr)
+
+
+# ---------- 3. HTTP endpoint with request batching ----------
+
+class MicroBatcher:
+    """
+    Collects single-row requests from many HTTP threads and scores them
+    together: a batch is flushed when it reaches max_batch rows or when the
+    oldest request has waited max_wait_ms. /stats covers the last
+    STATS_WINDOW batches and requests.
+    """
+
+    STATS_WINDOW = 10_000
+
+    def __init__(self, scorer: Scorer, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.scorer = scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.n_batches = 0
+        self.batch_sizes = deque(maxlen=self.STATS_WINDOW)
+        self.latencies_ms = deque(maxlen=self.STATS_WINDOW)
+        self.lock = threading.Lock()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, rows: np.ndarray) -> Future:
+        fut = Future()
+        self.requests.put((rows, fut, time.perf_counter()))
+        return fut
+
+    def _loop(self):
+        while True:
+            pending = [self.requests.get()]
+            n = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n += len(item[0])
+            self._flush(pending)
+
+    def _flush(self, pending):
+        try:
+            X = np.vstack([rows for rows, _, _ in pending])
+            preds = self.scorer.predict(X)
+        except Exception as e:
+            for _, fut, _ in pending:
+                fut.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        start = 0
+        with self.lock:
+            self.n_batches += 1
+            self.batch_sizes.append(len(X))
+            for rows, fut, t_submit in pending:
+                fut.set_result(preds[start:start + len(rows)])
+                start += len(rows)
+                self.latencies_ms.append((done - t_submit) * 1000)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lat = list(self.latencies_ms)
+            sizes = list(self.batch_sizes)
+            n_batches = self.n_batches
+        return {
+            "model": self.scorer.meta["name"],
+            "batches": n_batches,
+            "mean_batch_size": round(float(np.mean(sizes)), 2) if sizes else 0,
+            "latency": latency_summary(lat),
+        }
+
+
+def make_handler(batcher: MicroBatcher):
+    features = batcher.scorer.features
+
+    class ScoreHandler(BaseHTTPRequestHandler):
+
+        def _send(self, code: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, batcher.stats())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok", "features": features})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                records = payload if isinstance(payload, list) else [payload]
+                if not records:
+                    raise ValueError("no records")
+                X = np.array([[float(r[f]) for f in features] for r in records])
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {"error": f"bad request: {e}", "features": features})
+                return
+
+            try:
+                preds = batcher.submit(X).result()
+            except Exception as e:
+                self._send(500, {"error": f"scoring failed: {e}"})
+                return
+            self._send(200, {"predictions": preds.tolist()})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return ScoreHandler
+
+
+def run_server(args):
+    scorer = Scorer(args.model, compiled=args.compiled)
+    batcher = MicroBatcher(scorer, args.max_batch, args.max_wait_ms)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    print(f"Serving '{args.model}' on http://{args.host}:{args.port} "
+          f"(POST /score, GET /stats)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(batcher.stats(), indent=2), file=sys.stderr)
+
+
+# ---------- 4. Main ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score feature tables with a registered model.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p_batch = sub.add_parser("batch", help="score a CSV file or stdin in chunks")
+    p_batch.add_argument("--model", default="random_forest")
+    p_batch.add_argument("--input", default="-", help="CSV path or '-' for stdin")
+    p_batch.add_argument("--output", default="-", help="CSV path or '-' for stdout")
+    p_batch.add_argument("--chunksize", type=int, default=100_000)
+    p_batch.add_argument("--compiled", action="store_true", help="load the flat-array forest (forest_compiler.py): faster start-up only")
+    p_batch.set_defaults(func=run_batch)
+
+    p_serve = sub.add_parser("serve", help="local HTTP endpoint")
+    p_serve.add_argument("--model", default="random_forest")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--max-batch", type=int, default=256)
+    p_serve.add_argument("--max-wait-ms", type=float, default=2.0)
+    p_serve.add_argument("--compiled", action="store_true", help="load the flat-array forest (forest_compiler.py): faster start-up only")
+    p_serve.set_defaults(func=run_server)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
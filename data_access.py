@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+data_access.py
+-----------------------------------------
+Typed, memoized loading of the project's tabular datasets.
+
+Every dataset has a schema below: its file (relative to the project root),
+the dtypes of its columns, which columns are categoricals, and which
+columns must be present.
+
+    from data_access import load
+
+    df = load("modeling")                                  # whole table
+    flood = load("flood_yearly", columns=["city", "YEAR", "flood_count"])
+    raw = load("storm_events", path="data_download/my_copy.csv")
+
+Reading goes through two caches:
+
+  * in-process: a frame is parsed once per process; later calls get a
+    copy (callers are free to modify it). Large raw inputs are not kept
+    (memo=False), they are read once per run anyway.
+  * on disk: the parsed, typed frame is written as Parquet to
+    .data_cache/<dataset>-<source path hash>-<file hash>-<schema hash>.parquet,
+    so the next process skips CSV parsing and dtype inference and reads
+    only the requested columns. A changed file or schema gives a new key;
+    a rewrite replaces only the entries of the same source file.
+
+    python data_access.py                  # datasets, sizes, cache status
+    python data_access.py --clear-cache
+
+Environment switches:
+    PIPELINE_DATA_CACHE=0        no on-disk cache (CSV read with usecols)
+    PIPELINE_DATA_CACHE_DIR=...  where the cache goes (default <project>/.data_cache)
+-----------------------------------------
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from instrumentation import stage
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+CACHE_DIR = Path(os.environ.get("PIPELINE_DATA_CACHE_DIR", PROJECT_ROOT / ".data_cache"))
+USE_DISK_CACHE = os.environ.get("PIPELINE_DATA_CACHE", "1") != "0"
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:
+    USE_DISK_CACHE = False
+
+
+# ---------- 1. Schemas ----------
+# path         file relative to the project root
+# dtypes       column -> dtype; columns not listed are inferred
+# categoricals low-cardinality text columns read as "category"
+# required     columns that must exist (RuntimeError otherwise)
+# parse_dates  columns parsed as datetimes
+# read_kwargs  extra pd.read_csv arguments
+# memo         keep the parsed frame in memory (default True)
+
+_CITY = {"city": str, "state": str}
+
+SCHEMAS = {
+    "modeling": {
+        "path": "combined_dataset/modeling_dataset.csv",
+        "dtypes": {
+            **_CITY,
+            "exposure_index": "float64", "exposure_raw": "float64",
+            "urban_ratio": "float64", "densityMi": "float64",
+            "sea_level_trend": "float64", "sea_level_recent_mean": "float64",
+            "sea_level_max_anomaly": "float64", "years_covered": str,
+            "rain_daily_mean": "float64", "rain_daily_max": "float64",
+            "heavy_rain_threshold": "float64", "heavy_rain_days_per_year": "float64",
+            "met_years": str,
+        },
+        "required": ["city", "state", "exposure_index", "urban_ratio", "densityMi",
+                     "sea_level_trend", "sea_level_recent_mean", "sea_level_max_anomaly",
+                     "rain_daily_mean", "rain_daily_max", "heavy_rain_threshold",
+                     "heavy_rain_days_per_year"],
+    },
+    "exposure": {
+        "path": "combined_dataset/exposure_dataset.csv",
+        "dtypes": {**_CITY, "urban_ratio": "float64", "densityMi": "float64",
+                   "exposure_raw": "float64", "exposure_index": "float64"},
+        "required": ["city", "state", "exposure_index"],
+    },
+    "flood_yearly": {
+        "path": "combined_dataset/flood_events_yearly.csv",
+        "dtypes": {"city": str, "YEAR": "int64", "flood_count": "int64"},
+        "required": ["city", "YEAR", "flood_count"],
+    },
+    "combined": {
+        "path": "combined_dataset/combined_dataset.csv",
+        "dtypes": {**_CITY, "pixels_total": "int64", "urban_pixels": "int64",
+                   "urban_ratio": "float64", "water_pixels": "int64", "densityMi": "float64",
+                   "population": "float64", "TotalArea": "float64", "tif_path": str},
+        "required": ["city", "state", "urban_ratio", "densityMi"],
+    },
+    "land_cover_summary": {
+        "path": "land_cover/land_cover_outputs/nlcd_exposure_summary.csv",
+        "dtypes": {"city": str, "pixels_total": "int64", "urban_pixels": "int64",
+                   "urban_ratio": "float64", "water_pixels": "int64", "tif_path": str},
+        "required": ["city", "urban_ratio"],
+    },
+    "population": {
+        "path": "population/united-states-by-density-2025.csv",
+        "dtypes": {"stateFlagCode": str, "state": str, "TotalArea": "float64",
+                   "densityMi": "float64", "population": "float64"},
+        "required": ["state", "densityMi", "population", "TotalArea"],
+    },
+    "sea_level_features": {
+        "path": "sea_level/sea_level_features.csv",
+        "dtypes": {"city": str, "sea_level_trend": "float64", "sea_level_recent_mean": "float64",
+                   "sea_level_max_anomaly": "float64", "years_covered": str},
+        "required": ["city"],
+    },
+    "meteorological_features": {
+        "path": "Meteorological/meteorological_features.csv",
+        "dtypes": {"city": str, "rain_daily_mean": "float64", "rain_daily_max": "float64",
+                   "heavy_rain_threshold": "float64", "heavy_rain_days_per_year": "float64",
+                   "years_covered": str},
+        "required": ["city"],
+    },
+    # NOAA StormEvents "details" rows, 2010-2024 (data_download/noaa_flood_download.py)
+    "storm_events": {
+        "path": "data_download/flood_events_2010_2024.csv",
+        "dtypes": {"BEGIN_YEARMONTH": "int64", "BEGIN_DAY": "int64", "BEGIN_TIME": "int64",
+                   "END_YEARMONTH": "int64", "END_DAY": "int64", "END_TIME": "int64",
+                   "EPISODE_ID": "Int64", "EVENT_ID": "int64", "STATE_FIPS": "Int64",
+                   "YEAR": "int64", "CZ_FIPS": "Int64", "DAMAGE_PROPERTY": str,
+                   "DAMAGE_CROPS": str, "BEGIN_LAT": "float64", "BEGIN_LON": "float64"},
+        "categoricals": ["STATE", "EVENT_TYPE", "CZ_TYPE", "CZ_NAME", "MONTH_NAME",
+                         "CZ_TIMEZONE", "SOURCE", "FLOOD_CAUSE", "WFO"],
+        "required": ["BEGIN_YEARMONTH", "BEGIN_DAY", "EVENT_TYPE", "CZ_NAME", "DAMAGE_PROPERTY"],
+        "read_kwargs": {"low_memory": False},
+        "memo": False,
+    },
+    # flood rows kept by combined_dataset/flood_cleaning.py
+    "storm_events_cleaned": {
+        "path": "combined_dataset/flood_events_cleaned.csv",
+        "dtypes": {"BEGIN_YEARMONTH": "int64", "BEGIN_DAY": "int64", "EVENT_ID": "int64",
+                   "YEAR": "float64", "MONTH": "float64", "DAMAGE_PROPERTY": str,
+                   "DAMAGE_PROPERTY_CLEAN": "float64"},
+        "categoricals": ["STATE", "EVENT_TYPE", "CZ_TYPE", "CZ_NAME", "MONTH_NAME",
+                         "CZ_TIMEZONE", "SOURCE", "FLOOD_CAUSE", "WFO"],
+        "parse_dates": ["BEGIN_DATE"],
+        "required": ["EVENT_TYPE", "CZ_NAME", "YEAR"],
+        "read_kwargs": {"low_memory": False},
+        "memo": False,
+    },
+    # merged episodes, combined_dataset/flood_episodes.py
+    "flood_episodes": {
+        "path": "combined_dataset/flood_episodes.csv",
+        "dtypes": {"EPISODE_ID": "Int64", "region": str, "state": str, "YEAR": "int64",
+                   "duration_h": "float64", "n_events": "int64", "n_zones": "int64",
+                   "n_flash_flood": "int64", "extent_km": "float64", "damage_property": "float64"},
+        "parse_dates": ["begin", "end"],
+        "required": ["region", "YEAR", "begin", "n_events"],
+    },
+}
+
+
+def dataset_path(name: str, path=None) -> Path:
+    """Absolute path of a dataset (or of `path`, relative to the project root)."""
+    if name not in SCHEMAS:
+        raise KeyError(f"Unknown dataset '{name}'. Choose from {sorted(SCHEMAS)}")
+    p = Path(path if path is not None else SCHEMAS[name]["path"])
+    return p if p.is_absolute() else PROJECT_ROOT / p
+
+
+# ---------- 2. Keys ----------
+
+_FILE_HASHES = {}   # path -> ((size, mtime_ns), digest)
+
+
+def file_hash(path: Path) -> str:
+    """Content hash of a file; re-hashed only when its size or mtime changes."""
+    st = path.stat()
+    stamp = (st.st_size, st.st_mtime_ns)
+    hit = _FILE_HASHES.get(path)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    h = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    _FILE_HASHES[path] = (stamp, h.hexdigest())
+    return h.hexdigest()
+
+
+def schema_hash(name: str) -> str:
+    text = json.dumps(SCHEMAS[name], sort_keys=True, default=lambda t: getattr(t, "__name__", str(t)))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def source_key(src: Path) -> str:
+    """Short hash of the source file's path, so other files of a dataset keep their entries."""
+    return hashlib.blake2b(str(Path(src).resolve()).encode("utf-8"), digest_size=4).hexdigest()
+
+
+def cache_path(name: str, src: Path) -> Path:
+    return CACHE_DIR / f"{name}-{source_key(src)}-{file_hash(src)}-{schema_hash(name)}.parquet"
+
+
+# ---------- 3. Reading ----------
+
+def _read_csv(name: str, src: Path, columns=None) -> pd.DataFrame:
+    schema = SCHEMAS[name]
+    header = pd.read_csv(src, nrows=0, **schema.get("read_kwargs", {})).columns
+    if columns is not None:
+        _check_columns(name, columns, header, src)
+    wanted = set(header if columns is None else columns)
+
+    dtypes = {c: t for c, t in schema.get("dtypes", {}).items() if c in wanted}
+    dtypes.update({c: "category" for c in schema.get("categoricals", []) if c in wanted})
+    dates = [c for c in schema.get("parse_dates", []) if c in wanted]
+
+    with stage("data.read_csv", dataset=name):
+        return pd.read_csv(src, usecols=columns, dtype=dtypes, parse_dates=dates or None,
+                           **schema.get("read_kwargs", {}))
+
+
+def _check_columns(name: str, columns, available, src: Path):
+    missing = [c for c in columns if c not in set(available)]
+    if missing:
+        raise KeyError(f"Columns {missing} not in {name} ({src})")
+
+
+def _check_required(name: str, df: pd.DataFrame, src: Path):
+    for col in SCHEMAS[name].get("required", []):
+        if col not in df.columns:
+            raise RuntimeError(f" Missing required column '{col}' in {name} ({src})")
+
+
+def _read(name: str, src: Path, columns=None) -> pd.DataFrame:
+    """Parsed frame of `src`, from the disk cache when possible."""
+    if not USE_DISK_CACHE:
+        df = _read_csv(name, src, columns)
+        if columns is None:
+            _check_required(name, df, src)
+        return df
+
+    cached = cache_path(name, src)
+    if cached.exists():
+        if columns is not None:
+            import pyarrow.parquet as pq
+            _check_columns(name, columns, pq.read_schema(cached).names, src)
+        with stage("data.read_cache", dataset=name):
+            return pd.read_parquet(cached, columns=columns)
+
+    df = _read_csv(name, src)
+    _check_required(name, df, src)
+    if columns is not None:
+        _check_columns(name, columns, df.columns, src)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # older versions of this source file only; other files of the dataset keep theirs
+    for old in CACHE_DIR.glob(f"{name}-{source_key(src)}-*.parquet"):
+        if old != cached:
+            old.unlink(missing_ok=True)
+    # unique per writer: pool workers may fill the same entry at once
+    tmp = cached.with_name(f"{cached.stem}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(cached)
+    return df if columns is None else df[columns]
+
+
+_MEMO = {}   # (dataset, path, columns) -> (file hash, DataFrame)
+
+
+def load(name: str, columns=None, path=None) -> pd.DataFrame:
+    """
+    Typed DataFrame of dataset `name` (see SCHEMAS).
+
+    columns  only these columns (KeyError if one does not exist)
+    path     read this file instead of the default one, with the same schema
+    """
+    src = dataset_path(name, path)
+    if columns is not None:
+        columns = list(columns)
+    if not SCHEMAS[name].get("memo", True):
+        return _read(name, src, columns)
+
+    digest = file_hash(src)
+    df = None
+    for key in ((name, src, None), (name, src, None if columns is None else tuple(columns))):
+        hit = _MEMO.get(key)
+        if hit and hit[0] == digest:
+            df = hit[1]
+            break
+    if df is None:
+        df = _read(name, src, columns)
+        _MEMO[(name, src, None if columns is None else tuple(columns))] = (digest, df)
+
+    return (df if columns is None else df[columns]).copy()
+
+
+def parquet_path(name: str, path=None) -> Path:
+    """The on-disk cache file of a dataset (written first if missing), for Parquet readers."""
+    if not USE_DISK_CACHE:
+        raise RuntimeError("Parquet copies need the disk cache (pyarrow installed, PIPELINE_DATA_CACHE != 0)")
+    src = dataset_path(name, path)
+    cached = cache_path(name, src)
+    if not cached.exists():
+        _read(name, src)
+    return cached
+
+
+def clear(disk: bool = False):
+    """Forget memoized frames; with disk=True also delete the on-disk cache."""
+    _MEMO.clear()
+    if disk and CACHE_DIR.exists():
+        for p in CACHE_DIR.glob("*.parquet"):
+            p.unlink()
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Project datasets and their on-disk cache.")
+    parser.add_argument("names", nargs="*", help="datasets to show (default: all)")
+    parser.add_argument("--clear-cache", action="store_true", help="delete the on-disk cache")
+    args = parser.parse_args()
+
+    if args.clear_cache:
+        clear(disk=True)
+        print("Cleared:", CACHE_DIR)
+        return
+
+    print(f"Disk cache: {CACHE_DIR if USE_DISK_CACHE else 'off'}")
+    for name in args.names or SCHEMAS:
+        src = dataset_path(name)
+        if not src.exists():
+            print(f"  {name:24s} {'missing':>8s}     {'':18s} {src.relative_to(PROJECT_ROOT)}")
+            continue
+        cached = cache_path(name, src)
+        status = f"cached {cached.stat().st_size / 1e6:.2f} MB" if cached.exists() else "not cached"
+        print(f"  {name:24s} {src.stat().st_size / 1e6:8.2f} MB  {status:18s} "
+              f"{src.relative_to(PROJECT_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
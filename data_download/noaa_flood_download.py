@@ -1,46 +1,83 @@
 import os
+import sys
+from pathlib import Path
 import requests
 import pandas as pd
 import gzip
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
+
 # NOAA bulk directory
 base = "https://www1.ncdc.noaa.gov/pub/data/swdi/stormevents/csvfiles/"
 
 years = range(2010, 2025)   # 2010–2024
 save_dir = "storm_downloads"
-os.makedirs(save_dir, exist_ok=True)
 
-all_records = []
+STATES = ["FLORIDA", "LOUISIANA", "VIRGINIA"]
+
+
+def download(fname, gz_path):
+    # written to a temp file and renamed when complete, so an HTTP error or
+    # an interrupted transfer never leaves a file that looks downloaded
+    tmp = f"{gz_path}.tmp"
+    with requests.get(base + fname, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(tmp, "wb") as f:
+            for block in r.iter_content(chunk_size=1 << 20):
+                f.write(block)
+    os.replace(tmp, gz_path)
 
-for y in years:
-    fname = f"StormEvents_details-ftp_v1.0_d{y}_c20250520.csv.gz"
-    url = base + fname
-    print("Downloading:", url)
 
-    # download file
-    gz_path = f"{save_dir}/{fname}"
-    with open(gz_path, "wb") as f:
-        f.write(requests.get(url).content)
+def read_details(gz_path):
+    with gzip.open(gz_path, 'rb') as f_in:
+        return pd.read_csv(f_in, low_memory=False)
 
-    # unzip
-    try:
-        with gzip.open(gz_path, 'rb') as f_in:
-            df = pd.read_csv(f_in, low_memory=False)
-    except:
-        print(f"Error reading {fname}, skipping")
-        continue
 
+def filter_floods(df):
     # filter flood-related events
     flood_df = df[df["EVENT_TYPE"].str.contains("Flood", case=False, na=False)]
 
     # filter 3 cities states
-    flood_df = flood_df[flood_df["STATE"].isin(["FLORIDA","LOUISIANA","VIRGINIA"])]
+    return flood_df[flood_df["STATE"].isin(STATES)]
+
+
+def main():
+    os.makedirs(save_dir, exist_ok=True)
+    all_records = []
+
+    for y in years:
+        fname = f"StormEvents_details-ftp_v1.0_d{y}_c20250520.csv.gz"
+        print("Downloading:", base + fname)
+
+        # download file
+        gz_path = f"{save_dir}/{fname}"
+        try:
+            with stage("storm_events.download", year=y):
+                download(fname, gz_path)
+        except requests.RequestException as e:
+            print(f"Error downloading {fname} ({e}), skipping")
+            continue
+
+        # unzip
+        try:
+            with stage("storm_events.read", year=y):
+                df = read_details(gz_path)
+        except:
+            print(f"Error reading {fname}, skipping")
+            continue
+
+        with stage("storm_events.filter", year=y):
+            all_records.append(filter_floods(df))
+
+    # combine
+    with stage("storm_events.combine"):
+        final = pd.concat(all_records, ignore_index=True)
+        final.to_csv("flood_events_2010_2024.csv", index=False)
 
-    all_records.append(flood_df)
+    print("\n✔ FINISHED — saved: flood_events_2010_2024.csv")
+    print("Total rows:", len(final))
 
-# combine
-final = pd.concat(all_records, ignore_index=True)
-final.to_csv("flood_events_2010_2024.csv", index=False)
 
-print("\n✔ FINISHED — saved: flood_events_2010_2024.csv")
-print("Total rows:", len(final))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+storm_refresh.py
+-----------------------------------------
+Incremental refresh of the StormEvents flood tables.
+
+NOAA republishes a year's details file under a new creation-date suffix
+(StormEvents_details-ftp_v1.0_d2023_c20250915.csv.gz) whenever that year is
+revised. This script compares the newest revision of every year in the NOAA
+directory listing with the revision recorded in storm_store/state.json and
+re-ingests only the years that changed:
+
+    download the year file -> filter_floods()          (noaa_flood_download.py)
+                           -> clean_flood_events()     (flood_cleaning.py)
+                           -> process_flood_data()     (flood_preprocess.py)
+
+Each result replaces that year's partition, and no other partition is touched:
+
+    storm_store/raw/year=2023/part.parquet       flood rows of the 3 states
+    storm_store/cleaned/year=2023/part.parquet   Flood / Flash Flood rows, cleaned
+    storm_store/yearly/year=2023/part.parquet    flood_count per city and YEAR
+
+The state entry of a year is written only after all three of its partitions
+are written, so an interrupted run simply redoes that year next time.
+Afterwards the usual CSVs are re-assembled from the partitions. This is a
+concatenation, with no re-parsing or re-cleaning:
+
+    data_download/flood_events_2010_2024.csv
+    combined_dataset/flood_events_cleaned.csv
+    combined_dataset/flood_events_yearly.csv
+
+The CSVs are written only when every year in `years` has its partitions.
+Otherwise they would be replaced by the subset of years ingested so far.
+--export-partial overrides this. The first run (empty state) ingests every
+year. Files that are already in storm_downloads/ are not downloaded again.
+
+    python storm_refresh.py                 # NOAA listing, changed years only
+    python storm_refresh.py --dry-run       # show what would be refreshed
+    python storm_refresh.py --local         # use the files in storm_downloads/ (offline)
+    python storm_refresh.py --force 2023    # re-ingest a year regardless
+-----------------------------------------
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+
+sys.path.insert(0, str(PROJECT_ROOT))  # instrumentation.py, data_access.py
+sys.path.insert(0, str(PROJECT_ROOT / "combined_dataset"))
+from instrumentation import stage  # noqa: E402
+from flood_cleaning import OUT_CSV as CLEANED_CSV, clean_flood_events  # noqa: E402
+from flood_preprocess import process_flood_data  # noqa: E402
+from noaa_flood_download import base, filter_floods, read_details, save_dir, years  # noqa: E402
+
+DOWNLOAD_DIR = HERE / save_dir
+STORE_DIR = HERE / "storm_store"
+STATE_PATH = STORE_DIR / "state.json"
+RAW_CSV = HERE / "flood_events_2010_2024.csv"
+YEARLY_CSV = PROJECT_ROOT / "combined_dataset" / "flood_events_yearly.csv"
+
+TABLES = ("raw", "cleaned", "yearly")
+FILE_RE = re.compile(r"StormEvents_details-ftp_v1\.0_d(\d{4})_c(\d{8})\.csv\.gz")
+
+
+# ---------- 1. Revisions ----------
+
+def latest_revisions(names, wanted=years) -> dict:
+    """File names -> {year: (revision, file name)} with the newest revision per year."""
+    latest = {}
+    for name in names:
+        m = FILE_RE.fullmatch(name)
+        if m is None or int(m.group(1)) not in wanted:
+            continue
+        year, rev = int(m.group(1)), m.group(2)
+        if year not in latest or rev > latest[year][0]:
+            latest[year] = (rev, name)
+    return dict(sorted(latest.items()))
+
+
+def remote_listing() -> list:
+    import requests
+
+    html = requests.get(base, timeout=60).text
+    return sorted({m.group(0) for m in FILE_RE.finditer(html)})
+
+
+def local_listing() -> list:
+    return sorted(p.name for p in DOWNLOAD_DIR.glob("StormEvents_details-*.csv.gz"))
+
+
+def load_state() -> dict:
+    if not STATE_PATH.exists():
+        return {}
+    return {int(y): v for y, v in json.loads(STATE_PATH.read_text(encoding="utf-8")).items()}
+
+
+def save_state(state: dict):
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({str(y): state[y] for y in sorted(state)}, indent=2), encoding="utf-8")
+    tmp.replace(STATE_PATH)
+
+
+def plan(latest: dict, state: dict, force=()) -> list:
+    """Years whose newest revision differs from the recorded one (or forced)."""
+    return [y for y, (rev, _) in latest.items()
+            if y in force or state.get(y, {}).get("revision") != rev]
+
+
+# ---------- 2. Partitions ----------
+
+def partition_path(table: str, year: int) -> Path:
+    return STORE_DIR / table / f"year={year}" / "part.parquet"
+
+
+def write_partition(table: str, year: int, df: pd.DataFrame):
+    path = partition_path(table, year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(path)
+
+
+def read_table(table: str, years_=None) -> pd.DataFrame:
+    """Partitions of one table in year order."""
+    parts = sorted(STORE_DIR.glob(f"{table}/year=*/part.parquet"),
+                   key=lambda p: int(p.parent.name.split("=")[1]))
+    if years_ is not None:
+        parts = [p for p in parts if int(p.parent.name.split("=")[1]) in years_]
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+def ingest_year(year: int, fname: str, local: bool = False):
+    """
+    Download (unless present), filter, clean and aggregate one year file into
+    its partitions. Returns the year's state entry, or None if the file cannot
+    be read: the file is deleted, so the year stays unrecorded and is
+    downloaded again on the next run.
+    """
+    gz_path = DOWNLOAD_DIR / fname
+    if not gz_path.exists():
+        if local:
+            raise FileNotFoundError(gz_path)
+        import requests
+        from noaa_flood_download import download
+
+        DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            with stage("storm_refresh.download", year=year):
+                download(fname, gz_path)
+        except requests.RequestException as e:
+            print(f"  {year}: error downloading {fname} ({e}), skipping")
+            return None
+
+    try:
+        details = read_details(gz_path)
+    except Exception as e:
+        print(f"  {year}: error reading {fname} ({e}), removed it, skipping")
+        gz_path.unlink(missing_ok=True)
+        return None
+
+    with stage("storm_refresh.ingest", year=year):
+        raw = filter_floods(details).reset_index(drop=True)
+        cleaned = clean_flood_events(raw)
+        yearly = process_flood_data(cleaned)
+
+    for table, df in zip(TABLES, (raw, cleaned, yearly)):
+        write_partition(table, year, df)
+    return {"revision": FILE_RE.fullmatch(fname).group(2), "file": fname,
+            "rows_raw": len(raw), "rows_cleaned": len(cleaned),
+            "refreshed": datetime.now().isoformat(timespec="seconds")}
+
+
+# ---------- 3. Exports ----------
+
+def missing_partitions(wanted=years) -> list:
+    """Years of `wanted` without all TABLES partitions."""
+    return [y for y in wanted if not all(partition_path(t, y).exists() for t in TABLES)]
+
+
+@stage("storm_refresh.export")
+def export_csvs(raw_csv=RAW_CSV, cleaned_csv=CLEANED_CSV, yearly_csv=YEARLY_CSV):
+    """Re-assemble the flat CSVs the rest of the pipeline reads from the partitions."""
+    read_table("raw").to_csv(raw_csv, index=False)
+    read_table("cleaned").to_csv(cleaned_csv, index=False)
+    yearly = (read_table("yearly")
+              .groupby(["city", "YEAR"], as_index=False)["flood_count"].sum()
+              .sort_values(["city", "YEAR"]))
+    yearly.to_csv(yearly_csv, index=False)
+    for path in (raw_csv, cleaned_csv, yearly_csv):
+        print("Saved:", path)
+
+
+# ---------- 4. CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh only the StormEvents years NOAA has revised.")
+    parser.add_argument("--local", action="store_true",
+                        help=f"take revisions from {save_dir}/ instead of the NOAA listing")
+    parser.add_argument("--force", type=int, nargs="*", default=[], metavar="YEAR",
+                        help="re-ingest these years even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only show the years to refresh")
+    parser.add_argument("--no-export", action="store_true", help="update partitions only")
+    parser.add_argument("--export-partial", action="store_true",
+                        help="write the CSVs even if some years have no partitions yet")
+    args = parser.parse_args()
+
+    latest = latest_revisions(local_listing() if args.local else remote_listing())
+    state = load_state()
+    todo = plan(latest, state, set(args.force))
+
+    for y in todo:
+        old = state.get(y, {}).get("revision", "-")
+        print(f"  {y}: {old} -> {latest[y][0]}")
+    missing = [y for y in years if y not in latest]
+    if missing:
+        print(f"  no file listed for {missing}")
+    if not todo:
+        print("All years current; nothing to do.")
+        return
+    if args.dry_run:
+        print(f"{len(todo)} of {len(latest)} years would be refreshed.")
+        return
+
+    t0 = time.perf_counter()
+    done = 0
+    for y in todo:
+        entry = ingest_year(y, latest[y][1], local=args.local)
+        if entry is None:
+            continue
+        state[y] = entry
+        save_state(state)
+        done += 1
+        print(f"  {y}: {entry['rows_raw']} flood rows, {entry['rows_cleaned']} cleaned")
+    print(f"Refreshed {done} of {len(latest)} years in {time.perf_counter() - t0:.1f} s")
+
+    if done and not args.no_export:
+        gaps = missing_partitions()
+        if gaps and not args.export_partial:
+            print(f"Not exporting: no partitions for {gaps}; the CSVs would lose those years "
+                  f"(use --export-partial to write them anyway)")
+        else:
+            export_csvs()
+
+
+if __name__ == "__main__":
+    main()
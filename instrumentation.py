@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+instrumentation.py
+-----------------------------------------
+Stage-level timing and memory tracking shared by all pipeline scripts.
+
+    from instrumentation import stage
+
+    @stage("tide.hourly_to_daily_max")          # as a decorator
+    def hourly_to_daily_max(...): ...
+
+    with stage("flood.read_storm_events", year=y):   # or a context manager
+        df = pd.read_csv(...)
+
+Every stage records wall / CPU seconds, peak resident memory (RSS sampled
+by a background thread) and, when tracemalloc is on, the peak of Python
+allocations inside the stage. Stages nest; each record keeps its parent.
+
+With PIPELINE_REPORT=1 (set by pipeline.py), a JSON run report (every
+stage call plus per-name totals) is written to
+run_reports/<script>_<timestamp>.json when the process exits, so scripts
+run on their own leave no files behind. Compare two reports to spot
+regressions:
+
+    python instrumentation.py compare run_reports/old.json run_reports/new.json
+
+Environment switches:
+    PIPELINE_REPORT=1          write the report file (default 0)
+    PIPELINE_REPORT_DIR=...    where reports go (default <project>/run_reports)
+    PIPELINE_TRACEMALLOC=1     trace Python allocations (slows code ~2x)
+    PIPELINE_PROFILE_DIR=...   cProfile dump per outermost stage (.prof)
+    PIPELINE_RSS_INTERVAL=0.05 RSS sampling period in seconds
+-----------------------------------------
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import json
+import multiprocessing
+import os
+import platform
+import re
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+REPORT_DIR = Path(os.environ.get("PIPELINE_REPORT_DIR", PROJECT_ROOT / "run_reports"))
+
+WRITE_REPORT = os.environ.get("PIPELINE_REPORT", "0") == "1"
+TRACE_PY_MEMORY = os.environ.get("PIPELINE_TRACEMALLOC", "0") == "1"
+PROFILE_DIR = os.environ.get("PIPELINE_PROFILE_DIR")
+RSS_INTERVAL = float(os.environ.get("PIPELINE_RSS_INTERVAL", "0.05"))
+
+MB = 1024 * 1024
+
+
+# ---------- 1. Memory probes ----------
+
+def _rss_reader():
+    """Function returning current RSS in bytes (psutil, /proc, or peak RSS)."""
+    try:
+        import psutil
+        proc = psutil.Process()
+        return lambda: proc.memory_info().rss
+    except ImportError:
+        pass
+    if Path("/proc/self/statm").exists():
+        page = os.sysconf("SC_PAGE_SIZE")
+
+        def from_proc():
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * page
+        return from_proc
+
+    import resource
+    # ru_maxrss is a running peak: KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+rss_bytes = _rss_reader()
+
+
+class _Frame:
+    __slots__ = ("name", "parent", "extra", "t0", "cpu0", "rss0", "rss_peak",
+                 "py_start", "py_peak", "profiler")
+
+    def __init__(self, name, parent, extra):
+        self.name = name
+        self.parent = parent
+        self.extra = extra
+        self.rss0 = self.rss_peak = rss_bytes()
+        self.py_start = self.py_peak = 0
+        self.profiler = None
+        self.t0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+
+
+class _RssSampler(threading.Thread):
+    """Raises rss_peak of every open stage while at least one is open."""
+
+    def __init__(self, recorder):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.recorder = recorder
+        self.wake = threading.Event()
+
+    def run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            while self.recorder.active:
+                rss = rss_bytes()
+                with self.recorder.lock:
+                    for frame in self.recorder.active:
+                        if rss > frame.rss_peak:
+                            frame.rss_peak = rss
+                time.sleep(RSS_INTERVAL)
+
+
+# ---------- 2. Recorder ----------
+
+class Recorder:
+    """Collects stage records for one process."""
+
+    def __init__(self):
+        self.records = []
+        self.active = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.sampler = None
+
+    def _stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def enter(self, name, extra):
+        stack = self._stack()
+        frame = _Frame(name, stack[-1].name if stack else None, extra)
+
+        if TRACE_PY_MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            # keep the outer stages' peak before resetting it for this one
+            for outer in stack:
+                outer.py_peak = max(outer.py_peak, peak)
+            tracemalloc.reset_peak()
+            frame.py_start = frame.py_peak = current
+
+        if PROFILE_DIR and not stack:
+            frame.profiler = cProfile.Profile()
+            try:
+                frame.profiler.enable()
+            except ValueError:   # another profiler is already active
+                frame.profiler = None
+
+        stack.append(frame)
+        with self.lock:
+            self.active.append(frame)
+        if self.sampler is None:
+            self.sampler = _RssSampler(self)
+            self.sampler.start()
+        self.sampler.wake.set()
+        return frame
+
+    def exit(self, frame, error=None):
+        wall = time.perf_counter() - frame.t0
+        cpu = time.process_time() - frame.cpu0
+        if frame.profiler is not None:
+            frame.profiler.disable()
+
+        stack = self._stack()
+        stack.pop()
+        rss_end = rss_bytes()
+        with self.lock:
+            self.active.remove(frame)
+            frame.rss_peak = max(frame.rss_peak, rss_end)
+            for outer in self.active:
+                outer.rss_peak = max(outer.rss_peak, frame.rss_peak)
+
+        record = {
+            "name": frame.name,
+            "parent": frame.parent,
+            "depth": len(stack),
+            "start_s": round(frame.t0 - self.t0, 6),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "rss_start_mb": round(frame.rss0 / MB, 2),
+            "rss_end_mb": round(rss_end / MB, 2),
+            "rss_peak_mb": round(frame.rss_peak / MB, 2),
+            "status": "ok" if error is None else f"error: {type(error).__name__}",
+        }
+        if TRACE_PY_MEMORY and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            frame.py_peak = max(frame.py_peak, peak)
+            for outer in stack:
+                outer.py_peak = max(outer.py_peak, frame.py_peak)
+            record["py_peak_mb"] = round((frame.py_peak - frame.py_start) / MB, 3)
+        if frame.profiler is not None:
+            out = Path(PROFILE_DIR)
+            out.mkdir(parents=True, exist_ok=True)
+            path = out / f"{_safe(frame.name)}_{os.getpid()}_{len(self.records)}.prof"
+            frame.profiler.dump_stats(path)
+            record["profile"] = str(path)
+        if frame.extra:
+            record["extra"] = frame.extra
+
+        with self.lock:
+            self.records.append(record)
+        return record
+
+    def summary(self):
+        """Per stage name: calls, total / max wall, max RSS peak."""
+        out = {}
+        for r in self.records:
+            s = out.setdefault(r["name"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                           "max_wall_s": 0.0, "rss_peak_mb": 0.0})
+            s["calls"] += 1
+            s["wall_s"] += r["wall_s"]
+            s["cpu_s"] += r["cpu_s"]
+            s["max_wall_s"] = max(s["max_wall_s"], r["wall_s"])
+            s["rss_peak_mb"] = max(s["rss_peak_mb"], r["rss_peak_mb"])
+            if "py_peak_mb" in r:
+                s["py_peak_mb"] = max(s.get("py_peak_mb", 0.0), r["py_peak_mb"])
+        for s in out.values():
+            s["wall_s"] = round(s["wall_s"], 6)
+            s["cpu_s"] = round(s["cpu_s"], 6)
+        return out
+
+    def report(self):
+        script = Path(sys.argv[0]).name if sys.argv and sys.argv[0] else "python"
+        return {
+            "script": script,
+            "argv": sys.argv[1:],
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self.t0, 6),
+            "host": socket.gethostname(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pid": os.getpid(),
+            "tracemalloc": TRACE_PY_MEMORY,
+            "stages": self.records,
+            "summary": self.summary(),
+        }
+
+    def write_report(self, path=None):
+        rep = self.report()
+        if path is None:
+            stamp = self.started.strftime("%Y%m%dT%H%M%SZ")
+            path = REPORT_DIR / f"{_safe(Path(rep['script']).stem)}_{stamp}_{rep['pid']}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(rep, indent=2, default=str), encoding="utf-8")
+        return path
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+RUN = Recorder()
+
+
+@contextlib.contextmanager
+def stage(name: str, **extra):
+    """Time one pipeline stage; usable as `with stage(...)` or `@stage(...)`."""
+    frame = RUN.enter(name, extra)
+    try:
+        yield frame
+    except BaseException as e:
+        RUN.exit(frame, error=e)
+        raise
+    RUN.exit(frame)
+
+
+def _report_at_exit():
+    # pool workers (forked or spawned) do not write reports
+    if WRITE_REPORT and RUN.records and multiprocessing.parent_process() is None:
+        print(f"\n[instrumentation] run report -> {RUN.write_report()}")
+
+
+atexit.register(_report_at_exit)
+
+
+# ---------- 3. Comparing runs ----------
+
+def compare_reports(old: dict, new: dict, threshold: float = 0.2, min_seconds: float = 0.05):
+    """
+    Stage totals of two reports side by side. A stage regresses when its
+    total wall time or RSS peak grows by more than `threshold` (relative)
+    and the wall time difference is above `min_seconds`.
+    """
+    rows = []
+    a, b = old["summary"], new["summary"]
+    for name in sorted(set(a) | set(b)):
+        sa, sb = a.get(name), b.get(name)
+        row = {"stage": name,
+               "old_wall_s": sa["wall_s"] if sa else None,
+               "new_wall_s": sb["wall_s"] if sb else None,
+               "old_rss_mb": sa["rss_peak_mb"] if sa else None,
+               "new_rss_mb": sb["rss_peak_mb"] if sb else None,
+               "regression": False}
+        if sa and sb:
+            slower = (sb["wall_s"] > sa["wall_s"] * (1 + threshold)
+                      and sb["wall_s"] - sa["wall_s"] > min_seconds)
+            bigger = sb["rss_peak_mb"] > sa["rss_peak_mb"] * (1 + threshold)
+            row["regression"] = slower or bigger
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect pipeline run reports.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_show = sub.add_parser("show", help="print the stage summary of a report")
+    p_show.add_argument("report", type=Path)
+    p_cmp = sub.add_parser("compare", help="compare two reports")
+    p_cmp.add_argument("old", type=Path)
+    p_cmp.add_argument("new", type=Path)
+    p_cmp.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.cmd == "show":
+        rep = json.loads(args.report.read_text(encoding="utf-8"))
+        print(f"{rep['script']} {' '.join(rep['argv'])}  started {rep['started']}  "
+              f"total {rep['wall_s']:.2f} s")
+        print(f"{'stage':40s} {'calls':>5s} {'wall s':>9s} {'cpu s':>9s} {'peak RSS MB':>12s}")
+        for name, s in sorted(rep["summary"].items(), key=lambda kv: -kv[1]["wall_s"]):
+            print(f"{name:40s} {s['calls']:5d} {s['wall_s']:9.3f} {s['cpu_s']:9.3f} "
+                  f"{s['rss_peak_mb']:12.1f}")
+        return
+
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    rows = compare_reports(old, new, args.threshold)
+
+    def fmt(v, spec):
+        return format(v, spec) if v is not None else "-".rjust(len(format(0, spec)))
+
+    print(f"{'stage':40s} {'old s':>9s} {'new s':>9s} {'old MB':>9s} {'new MB':>9s}")
+    for r in rows:
+        flag = "  <-- regression" if r["regression"] else ""
+        print(f"{r['stage']:40s} {fmt(r['old_wall_s'], '9.3f')} {fmt(r['new_wall_s'], '9.3f')} "
+              f"{fmt(r['old_rss_mb'], '9.1f')} {fmt(r['new_rss_mb'], '9.1f')}{flag}")
+    if any(r["regression"] for r in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,13 @@ Outputs are saved in a subfolder under this script folder:
   - land_cover_outputs/nlcd_exposure_summary.csv
 """
 
+import sys
 from pathlib import Path
 import numpy as np
 import pandas as pd
-import rasterio
-from rasterio.mask import mask
-from pyproj import CRS, Transformer
-from shapely.geometry import box, mapping
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
 
 PROJECT_DIR = Path(__file__).resolve().parent
 
@@ -35,11 +35,19 @@ BBOXES_WGS84 = {
 
 URBAN_CLASSES = (21, 22, 23, 24) 
 
-def clip_by_bbox(src: rasterio.DatasetReader, name: str, bbox_lonlat):
+@stage("land_cover.clip_by_bbox")
+def clip_by_bbox(src: "rasterio.DatasetReader", name: str, bbox_lonlat):
     """
     Clip the NLCD raster by a WGS84 bbox. We avoid EPSG lookups to bypass
     PROJ database conflicts: we build CRS from a proj-string and the raster's WKT.
     """
+    # raster / projection libraries are imported here, not at module level, so
+    # summarize() and the pipeline CLI do not pay for them
+    import rasterio
+    from rasterio.mask import mask
+    from pyproj import CRS, Transformer
+    from shapely.geometry import box, mapping
+
     left, bottom, right, top = bbox_lonlat
 
     # Build source/target CRS without EPSG database lookup
@@ -73,6 +81,7 @@ def clip_by_bbox(src: rasterio.DatasetReader, name: str, bbox_lonlat):
         dst.write(out_image)
 
     return out_tif, out_image[0] 
+@stage("land_cover.summarize")
 def summarize(arr: np.ndarray):
     """
     Compute exposure metrics: total pixels, urban pixels (21–24),
@@ -92,6 +101,8 @@ def summarize(arr: np.ndarray):
     }
 
 def main():
+    import rasterio
+
     if not NLCD_PATH.exists():
         raise FileNotFoundError(f"NLCD file not found: {NLCD_PATH}\n"
                                 f"Ensure .img/.ige/.xml are in the same folder.")
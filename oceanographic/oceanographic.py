@@ -7,12 +7,16 @@ NOAA Tide Data Downloader & Daily Aggregator
 """
 
 import os
+import sys
 import time
 from pathlib import Path
 from typing import List, Dict
 import requests
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
+
 BASE_URL = "https://api.tidesandcurrents.noaa.gov/api/prod/datagetter"
 
 # ====== 你可以在这里修改配置 ======
@@ -34,6 +38,7 @@ def ensure_dir(p: Path) -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+@stage("tide.download")
 def fetch_one_year(station_id: str, year: int, out_dir: Path, retries: int = 3, sleep_base: int = 2) -> Path:
     """下载某站点某一年的逐小时潮位CSV，返回保存路径。"""
     params = {
@@ -66,6 +71,7 @@ def fetch_one_year(station_id: str, year: int, out_dir: Path, retries: int = 3,
             time.sleep(sleep_base * attempt)
     raise RuntimeError(f"❌ failed {station_id}-{year}")
 
+@stage("tide.merge_years")
 def merge_years(station_id: str, year_files: List[Path], out_dir: Path) -> Path:
     """合并年度CSV为一个大CSV。"""
     dfs = []
@@ -78,6 +84,7 @@ def merge_years(station_id: str, year_files: List[Path], out_dir: Path) -> Path:
     print(f"📦 merged -> {merged_fn.name}")
     return merged_fn
 
+@stage("tide.hourly_to_daily_max")
 def hourly_to_daily_max(in_csv: Path, city_label: str, out_dir: Path) -> Path:
     """从逐小时CSV生成逐日最大潮位CSV。"""
     df = pd.read_csv(in_csv)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+-----------------------------------------
+One entry point for every pipeline stage.
+
+    python pipeline.py download                 # NOAA StormEvents 2010-2024
+    python pipeline.py refresh                  # only the years NOAA has revised
+    python pipeline.py tides                    # CO-OPS hourly -> daily max
+    python pipeline.py land-cover               # clip NLCD, urban ratios
+    python pipeline.py features                 # all feature tables, in order
+    python pipeline.py features --steps flood,modeling
+    python pipeline.py model                    # (re)train registered models
+    python pipeline.py model --list
+    python pipeline.py forecast --method poisson --years 2025-2030
+    python pipeline.py plots -- --force --jobs 2   # arguments for render_figures.py
+    python pipeline.py compound -- --lag=-1:1       # arguments for compound_events.py
+    python pipeline.py extremes -- --boot 500 --workers 4   # arguments for extreme_values.py
+    python pipeline.py sql "SELECT city, sum(flood_count) FROM flood_yearly GROUP BY city"
+
+Only the standard library is imported at startup. Each subcommand imports
+the stage modules it runs (and through them pandas, sklearn, geopandas,
+rasterio, ...) when it runs, so `python pipeline.py features --steps flood`
+never loads matplotlib or rasterio, and `--help` loads nothing heavy.
+
+At exit a one-line timing summary goes to stderr:
+
+    [pipeline] features: imports 0.58 s (412 modules), run 1.21 s, total 1.79 s
+
+--import-report adds the import time of each stage module; for a full
+per-package breakdown use `python -X importtime pipeline.py ...`.
+Stage timings are also written as a run report to run_reports/ (see
+instrumentation.py); PIPELINE_REPORT=0 turns that off.
+-----------------------------------------
+"""
+
+import argparse
+import contextlib
+import importlib
+import os
+import runpy
+import sys
+import time
+from pathlib import Path
+
+_T0 = time.perf_counter()
+
+os.environ.setdefault("PIPELINE_REPORT", "1")   # run reports for pipeline runs only
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# (stage module, seconds, modules loaded by it)
+IMPORTS = []
+
+
+def lazy_import(module: str, folder: str = "combined_dataset"):
+    """Import a stage module from its folder (the folders are not packages), timed.
+    folder="" is the project root."""
+    path = str(PROJECT_ROOT / folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    t0, n0 = time.perf_counter(), len(sys.modules)
+    mod = importlib.import_module(module)
+    label = f"{folder}/{module}" if folder else module
+    IMPORTS.append((label, time.perf_counter() - t0, len(sys.modules) - n0))
+    return mod
+
+
+def run_script(rel_path: str, argv=()):
+    """Run a top-level script as __main__ in its own folder, import time included in the run."""
+    path = PROJECT_ROOT / rel_path
+    sys.path.insert(0, str(path.parent))
+    old_argv = sys.argv
+    sys.argv = [str(path), *argv]
+    try:
+        with contextlib.chdir(path.parent):
+            runpy.run_path(str(path), run_name="__main__")
+    finally:
+        sys.argv = old_argv
+
+
+# ---------- 1. Subcommands ----------
+
+def cmd_download(args):
+    # writes data_download/flood_events_2010_2024.csv ("storm_events" in data_access)
+    run_script("data_download/noaa_flood_download.py")
+
+
+def cmd_refresh(args):
+    refresh = lazy_import("storm_refresh", "data_download")
+    sys.argv = ["storm_refresh.py", *args.rest]
+    refresh.main()
+
+
+def cmd_tides(args):
+    lazy_import("oceanographic", "oceanographic").main()
+
+
+def cmd_land_cover(args):
+    lazy_import("land_cover", "land_cover").main()
+
+
+def _flood_step():
+    lazy_import("flood_cleaning").main()
+    lazy_import("flood_preprocess").load_and_process_flood_data()
+
+
+# step -> runner, in dependency order
+FEATURE_STEPS = {
+    "sea_level": lambda: lazy_import("sea_level_features", "sea_level").main(),
+    "meteorological": lambda: lazy_import("meteorological_features", "Meteorological").main(),
+    "flood": _flood_step,
+    "combined": lambda: lazy_import("build_combined_dataset").main(),
+    "exposure": lambda: run_script("combined_dataset/build_exposure_index.py"),
+    "modeling": lambda: run_script("combined_dataset/build_model_dataset.py"),
+    "point_in_time": lambda: lazy_import("feature_store").materialize(),
+}
+
+
+def cmd_features(args):
+    steps = FEATURE_STEPS if args.steps is None else [s.strip() for s in args.steps.split(",")]
+    unknown = [s for s in steps if s not in FEATURE_STEPS]
+    if unknown:
+        raise SystemExit(f"unknown step(s) {unknown}; choose from {list(FEATURE_STEPS)}")
+    for step in FEATURE_STEPS:          # keep dependency order whatever the order given
+        if step in steps:
+            print(f"\n===== features: {step} =====")
+            FEATURE_STEPS[step]()
+
+
+def cmd_model(args):
+    registry = lazy_import("model_registry")
+    if args.list:
+        for meta in registry.list_models():
+            print(f"  {meta['name']:28s} R²={meta['metrics']['r2']:.4f}  "
+                  f"created {meta['created']}  hash={meta['data_hash']}")
+        return
+    names = args.names or list(registry.MODEL_FACTORIES)
+    df = lazy_import("data_access", "").load("modeling")
+    for name in names:
+        _, meta = registry.train_model(name, df)
+        print(f"  {name:28s} R²={meta['metrics']['r2']:.4f}  hash={meta['data_hash']}")
+
+
+def _year_range(text: str):
+    start, _, end = text.partition("-")
+    return list(range(int(start), int(end or start) + 1))
+
+
+def cmd_forecast(args):
+    forecast = lazy_import("forecast_engine").forecast
+    flood = lazy_import("data_access", "").load("flood_yearly")
+    res = forecast(flood, args.years, method=args.method, level=args.level)
+    res = res[res["YEAR"].isin(args.years)]
+    print(res.to_string(index=False))
+    if args.out is not None:
+        res.to_csv(args.out, index=False)
+        print("\nSaved:", args.out)
+
+
+def cmd_plots(args):
+    render = lazy_import("render_figures")
+    sys.argv = ["render_figures.py", *args.rest]
+    render.main()
+
+
+def cmd_compound(args):
+    compound = lazy_import("compound_events")
+    sys.argv = ["compound_events.py", *args.rest]
+    compound.main()
+
+
+def cmd_sql(args):
+    query = lazy_import("query", "")
+    sys.argv = ["query.py", *args.rest]
+    query.main()
+
+
+def cmd_extremes(args):
+    extremes = lazy_import("extreme_values")
+    sys.argv = ["extreme_values.py", *args.rest]
+    extremes.main()
+
+
+# ---------- 2. CLI ----------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Coastal flood risk pipeline.")
+    parser.add_argument("--import-report", action="store_true",
+                        help="list the import time of every stage module")
+    parser.add_argument("--quiet", action="store_true", help="no timing line on stderr")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    sub.add_parser("download", help="download NOAA StormEvents flood rows").set_defaults(func=cmd_download)
+    p = sub.add_parser("refresh", help="re-ingest revised StormEvents years (arguments go to storm_refresh.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_refresh)
+    sub.add_parser("tides", help="CO-OPS tide gauges to daily maxima").set_defaults(func=cmd_tides)
+    sub.add_parser("land-cover", help="clip NLCD and compute urban ratios").set_defaults(func=cmd_land_cover)
+
+    p = sub.add_parser("features", help="build the feature tables")
+    p.add_argument("--steps", default=None,
+                   help=f"comma-separated subset of {','.join(FEATURE_STEPS)}")
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser("model", help="train registered models")
+    p.add_argument("names", nargs="*", help="models to train (default: all)")
+    p.add_argument("--list", action="store_true", help="show registered models and exit")
+    p.set_defaults(func=cmd_model)
+
+    p = sub.add_parser("forecast", help="per-city flood count forecast")
+    p.add_argument("--method", default="linear", choices=["linear", "poisson"])
+    p.add_argument("--years", type=_year_range, default=_year_range("2025-2030"),
+                   help="year or range, e.g. 2030 or 2025-2030")
+    p.add_argument("--level", type=float, default=0.9, help="prediction interval level")
+    p.add_argument("--out", type=Path, default=None, help="also write a CSV")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser("plots", help="render figures (arguments go to render_figures.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_plots)
+
+    p = sub.add_parser("compound", help="tide x rain compound statistics (arguments go to compound_events.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_compound)
+
+    p = sub.add_parser("extremes", help="GEV / GPD return levels (arguments go to extreme_values.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_extremes)
+
+    p = sub.add_parser("sql", help="SQL over the datasets (arguments go to query.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_sql)
+    return parser
+
+
+def report(command: str, t_start: float, show_modules: bool):
+    imports = sum(s for _, s, _ in IMPORTS)
+    total = time.perf_counter() - t_start
+    print(f"[pipeline] {command}: imports {imports:.2f} s ({sum(n for *_, n in IMPORTS)} modules), "
+          f"run {total - imports:.2f} s, total {total:.2f} s (cli {t_start - _T0:.3f} s)",
+          file=sys.stderr)
+    if show_modules:
+        for name, s, n in IMPORTS:
+            print(f"[pipeline]   {name:45s} {s:6.3f} s  {n:4d} modules", file=sys.stderr)
+
+
+def main():
+    args = build_parser().parse_args()
+    if args.command in ("refresh", "plots", "compound", "extremes", "sql") and args.rest[:1] == ["--"]:
+        args.rest = args.rest[1:]
+
+    t_start = time.perf_counter()
+    try:
+        args.func(args)
+    finally:
+        if not args.quiet:
+            report(args.command, t_start, args.import_report)
+
+
+if __name__ == "__main__":
+    main()
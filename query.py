@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+query.py
+-----------------------------------------
+SQL over the project's outputs, in process (DuckDB), without loading the
+tables into pandas first.
+
+Views (those whose files are missing are skipped):
+
+    events         cleaned flood rows     storm_store/cleaned/year=*/ partitions,
+                                          else the flood_events_cleaned cache
+    events_raw     3-state flood rows     storm_store/raw/year=*/ partitions,
+                                          else the flood_events_2010_2024 cache
+    episodes       merged flood episodes  (flood_episodes.py)
+    flood_yearly   flood_count per city and YEAR
+    tides          station, date, daily_max_tide_m   (<tide dir>/*_daily_max.csv)
+    rainfall       station (city), date, prcp_mm     (Meteorological station CSVs)
+    modeling, exposure, combined, sea_level_features, meteorological_features
+
+The table views read Parquet: the StormEvents partitions written by
+data_download/storm_refresh.py, or otherwise the .data_cache copy that
+data_access.py keeps of every CSV (data_access.parquet_path writes it when
+it is missing). DuckDB reads only the columns a query uses. It skips
+partition files and row groups whose min/max statistics cannot match the
+WHERE clause, so a filter on YEAR or EVENT_TYPE never reads the other
+years. EXPLAIN (--explain) shows the pushed-down filters and projections
+on each PARQUET_SCAN.
+
+    python query.py "SELECT MONTH, count(*) AS n, sum(DAMAGE_PROPERTY_CLEAN) AS damage
+                     FROM events
+                     WHERE EVENT_TYPE = 'Flash Flood' AND CZ_NAME = 'JEFFERSON'
+                       AND DAMAGE_PROPERTY_CLEAN > 1e6
+                     GROUP BY MONTH ORDER BY MONTH"
+    python query.py --views                 # registered views and their sources
+    python query.py --explain "SELECT ..."
+    python query.py                         # interactive; end statements with ';'
+    python query.py --smoke                 # self-check on a temporary partitioned store
+
+Needs the duckdb package (pip install duckdb); nothing else in the
+pipeline imports it.
+-----------------------------------------
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+STORE_DIR = PROJECT_ROOT / "data_download" / "storm_store"
+TIDE_DIR = Path.home() / "Desktop" / "noaa_daily"   # where oceanographic.py writes
+
+# view -> data_access dataset
+DATASET_VIEWS = {
+    "episodes": "flood_episodes",
+    "flood_yearly": "flood_yearly",
+    "modeling": "modeling",
+    "exposure": "exposure",
+    "combined": "combined",
+    "sea_level_features": "sea_level_features",
+    "meteorological_features": "meteorological_features",
+}
+
+
+def _sql_path(path) -> str:
+    return "'" + Path(path).as_posix().replace("'", "''") + "'"
+
+
+# ---------- 1. Views ----------
+
+def _partitioned(table: str, dataset: str, store_dir: Path = STORE_DIR) -> str:
+    """read_parquet() over the store partitions if any, else over the dataset's cache file."""
+    if any(store_dir.glob(f"{table}/year=*/part.parquet")):
+        # the files carry their own YEAR column; a hive "year" column derived
+        # from the directory names would clash with it (DuckDB names are
+        # case-insensitive) and break filters on YEAR
+        source = store_dir / table / "year=*" / "part.parquet"
+        return f"read_parquet({_sql_path(source)}, union_by_name = true, hive_partitioning = false)"
+
+    from data_access import dataset_path, parquet_path
+
+    if not dataset_path(dataset).exists():
+        return None
+    return f"read_parquet({_sql_path(parquet_path(dataset))}, union_by_name = true)"
+
+
+def view_sources(tide_dir: Path = TIDE_DIR, store_dir: Path = STORE_DIR) -> dict:
+    """view -> SQL source expression (None if its files are missing)."""
+    from data_access import dataset_path, parquet_path
+
+    sources = {
+        "events": _partitioned("cleaned", "storm_events_cleaned", store_dir),
+        "events_raw": _partitioned("raw", "storm_events", store_dir),
+    }
+    for view, dataset in DATASET_VIEWS.items():
+        sources[view] = (f"read_parquet({_sql_path(parquet_path(dataset))})"
+                         if dataset_path(dataset).exists() else None)
+
+    tide_glob = Path(tide_dir) / "*_daily_max.csv"
+    sources["tides"] = None
+    if any(Path(tide_dir).glob("*_daily_max.csv")):
+        sources["tides"] = (
+            "(SELECT split_part(parse_filename(filename), '_', 1) AS station, "
+            "CAST(date AS DATE) AS date, daily_max_tide_m "
+            f"FROM read_csv({_sql_path(tide_glob)}, header = true, filename = true))"
+        )
+    return sources
+
+
+def _rainfall_frame():
+    """Long daily precipitation of the Meteorological stations (small; registered from pandas)."""
+    sys.path.insert(0, str(PROJECT_ROOT / "combined_dataset"))
+    from compound_events import read_rain_daily
+
+    rain = read_rain_daily()
+    rain["date"] = rain["day"].to_numpy().astype("datetime64[D]")
+    return rain.rename(columns={"value": "prcp_mm"})[["station", "date", "prcp_mm"]]
+
+
+def connect(tide_dir: Path = TIDE_DIR, verbose: bool = False, store_dir: Path = STORE_DIR):
+    """In-memory DuckDB connection with every available view registered."""
+    try:
+        import duckdb
+    except ImportError:
+        raise SystemExit("query.py needs duckdb: pip install duckdb")
+
+    con = duckdb.connect(database=":memory:")
+    for view, source in view_sources(tide_dir, store_dir).items():
+        if source is None:
+            if verbose:
+                print(f"  {view:24s} (missing, skipped)")
+            continue
+        con.execute(f"CREATE VIEW {view} AS SELECT * FROM {source}")
+        if verbose:
+            print(f"  {view:24s} {source}")
+
+    try:
+        con.register("rainfall", _rainfall_frame())
+        if verbose:
+            print(f"  {'rainfall':24s} Meteorological station CSVs (in memory)")
+    except FileNotFoundError:
+        if verbose:
+            print(f"  {'rainfall':24s} (missing, skipped)")
+    return con
+
+
+def sql(query: str, con=None):
+    """Run one query and return a pandas DataFrame."""
+    con = con or connect()
+    return con.execute(query).df()
+
+
+def smoke_test():
+    """Filter and EXPLAIN on a two-year partitioned store in a temporary directory."""
+    import tempfile
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp)
+        for year, n in ((2015, 80), (2016, 20)):
+            part = store / "cleaned" / f"year={year}" / "part.parquet"
+            part.parent.mkdir(parents=True)
+            pd.DataFrame({"EVENT_ID": range(n), "YEAR": year,
+                          "EVENT_TYPE": "Flash Flood"}).to_parquet(part, index=False)
+
+        con = connect(store_dir=store)
+        n = con.execute("SELECT count(*) FROM events WHERE YEAR = 2015").fetchone()[0]
+        if n != 80:
+            raise AssertionError(f"expected 80 rows for YEAR = 2015, got {n}")
+        con.execute("EXPLAIN SELECT count(*) FROM events WHERE YEAR = 2015").fetchall()
+        print(f"smoke test passed: {n} rows for YEAR = 2015, EXPLAIN ok")
+
+
+# ---------- 2. CLI ----------
+
+def _repl(con):
+    print("Views:", ", ".join(r[0] for r in con.execute("SHOW TABLES").fetchall()))
+    print("End statements with ';'. Ctrl-D to quit.")
+    buf = []
+    while True:
+        try:
+            line = input("sql> " if not buf else "...> ")
+        except EOFError:
+            print()
+            return
+        buf.append(line)
+        if line.rstrip().endswith(";"):
+            try:
+                print(con.execute("\n".join(buf)).df().to_string(index=False))
+            except Exception as e:
+                print("Error:", e)
+            buf = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL over the project's datasets (DuckDB).")
+    parser.add_argument("query", nargs="?", help="SQL statement (omit for an interactive prompt)")
+    parser.add_argument("--views", action="store_true", help="list the registered views and exit")
+    parser.add_argument("--explain", action="store_true", help="show the query plan instead")
+    parser.add_argument("--tide-dir", type=Path, default=TIDE_DIR)
+    parser.add_argument("--out", type=Path, default=None, help="also write the result as CSV")
+    parser.add_argument("--smoke", action="store_true", help="run the self-check and exit")
+    args = parser.parse_args()
+
+    if args.smoke:
+        smoke_test()
+        return
+
+    con = connect(args.tide_dir, verbose=args.views)
+    if args.views:
+        return
+    if args.query is None:
+        _repl(con)
+        return
+
+    if args.explain:
+        for _, plan in con.execute("EXPLAIN " + args.query).fetchall():
+            print(plan)
+        return
+
+    res = con.execute(args.query).df()
+    print(res.to_string(index=False))
+    if args.out is not None:
+        res.to_csv(args.out, index=False)
+        print("\nSaved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
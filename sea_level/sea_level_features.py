@@ -8,9 +8,13 @@ Creates: sea_level_features.csv
 # Extract simple sea-level features for Miami / New Orleans / Norfolk
 # and save a small CSV for modeling.
 
+import sys
 import pandas as pd
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # project root: instrumentation.py
+from instrumentation import stage
+
 PROJECT_DIR = Path(__file__).resolve().parent
 
 SEA_LEVEL_FILES = {
@@ -19,6 +23,7 @@ SEA_LEVEL_FILES = {
     "norfolk":     PROJECT_DIR / "sea_level_virginia.csv",
 }
 
+@stage("sea_level.load_and_extract")
 def load_and_extract(city: str, csv_path: Path) -> dict:
     """Load a NOAA monthly sea-level CSV and compute a few features."""
 